@@ -27,6 +27,7 @@ from folium.features import (
     CustomIcon,
     DivIcon,
     GeoJson,
+    GeoJsonDataset,
     GeoJsonTooltip,
     LatLngPopup,
     RegularPolygonMarker,
@@ -76,6 +77,7 @@ __all__ = [
     'Figure',
     'FitBounds',
     'GeoJson',
+    'GeoJsonDataset',
     'GeoJsonTooltip',
     'Html',
     'IFrame',
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""
+Rendering and saving many maps in parallel.
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import multiprocessing
+import time
+import traceback
+from collections import namedtuple
+
+
+BatchResult = namedtuple('BatchResult',
+                         ['outfile', 'seconds', 'error', 'digest'])
+BatchResult.__doc__ = """
+The outcome of saving one map: the file it was saved to, the time spent
+building, rendering and saving it in seconds, the formatted traceback if it
+failed, else None, and the digest returned by `Map.save`.
+"""
+
+# The read-only inputs shared by all the jobs of a worker process, and the
+# keyword arguments of `save`.
+_shared = None
+_save_kwargs = {}
+
+
+def _init_worker(shared, save_kwargs=None):
+    global _shared, _save_kwargs
+    _shared = shared
+    _save_kwargs = save_kwargs or {}
+
+
+def _run_job(job):
+    """Builds a map from a job and saves it, catching any error."""
+    outfile, factory = job[0], job[1]
+    kwargs = job[2] if len(job) > 2 else {}
+    start = time.time()
+    try:
+        if _shared is None:
+            m = factory(**kwargs)
+        else:
+            m = factory(_shared, **kwargs)
+        digest = m.save(outfile, **_save_kwargs)
+    except Exception:
+        return BatchResult(outfile, time.time() - start,
+                           traceback.format_exc(), None)
+    return BatchResult(outfile, time.time() - start, None, digest)
+
+
+def save_maps(jobs, processes=None, shared=None, chunksize=1,
+              deterministic=False):
+    """
+    Builds and saves maps across a pool of processes.
+
+    Parameters
+    ----------
+    jobs: iterable of tuples (outfile, factory) or (outfile, factory, kwargs)
+        For each map, the file to save it to and a function returning the
+        map, or any element with a `save` method, called with the keyword
+        arguments `kwargs`. With the 'spawn' start method, used on Windows,
+        the factories must be defined at the top level of a module.
+    processes: int, default None
+        Number of worker processes, the number of CPUs if None. With 1, the
+        maps are saved in the current process.
+    shared: object, default None
+        Read-only inputs used by all the maps, such as a large GeoJSON,
+        passed as first argument to the factories. They are sent once to
+        each worker instead of with every job; with the 'fork' start method,
+        the default on Linux, the workers share the memory of the parent
+        and nothing is copied. The factories must not modify them.
+    chunksize: int, default 1
+        Number of jobs sent to a worker at once. Larger values reduce the
+        overhead for many small maps.
+    deterministic: bool, default False
+        Whether the maps are saved with `Map.save(deterministic=True)`, so
+        that the digests of the results only change with the maps.
+
+    Returns
+    -------
+    list of BatchResult, in the order of the jobs. A failing map does not
+    stop the others; check the `error` field of the results.
+
+    Examples
+    --------
+    >>> def region_map(regions, name):
+    ...     m = folium.Map()
+    ...     folium.GeoJson(regions[name]).add_to(m)
+    ...     return m
+    >>> results = save_maps(
+    ...     [(name + '.html', region_map, {'name': name}) for name in names],
+    ...     shared=regions)
+    >>> failed = [r for r in results if r.error is not None]
+    >>> changed = [r.outfile for r in results
+    ...            if r.digest != previous_digests.get(r.outfile)]
+
+    """
+    jobs = list(jobs)
+    save_kwargs = {'deterministic': True} if deterministic else {}
+    if processes == 1 or len(jobs) <= 1:
+        _init_worker(shared, save_kwargs)
+        try:
+            return [_run_job(job) for job in jobs]
+        finally:
+            _init_worker(None)
+    pool = multiprocessing.Pool(processes, initializer=_init_worker,
+                                initargs=(shared, save_kwargs))
+    try:
+        return pool.map(_run_job, jobs, chunksize=chunksize)
+    finally:
+        pool.close()
+        pool.join()
@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+
+"""
+Base elements shared by the folium classes.
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import hashlib
+import itertools
+import os
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from branca.element import ENV as _BRANCA_ENV
+from branca.element import Element as _BrancaElement
+from branca.element import Figure
+from branca.element import MacroElement as _BrancaMacroElement
+
+from jinja2 import (BaseLoader, ChoiceLoader, Environment,
+                    FileSystemBytecodeCache, PackageLoader, TemplateNotFound)
+
+
+class _SourceLoader(BaseLoader):
+    """Loads the templates registered by `Template` from their source."""
+    def __init__(self):
+        self.sources = {}
+
+    def get_source(self, environment, name):
+        if name not in self.sources:
+            raise TemplateNotFound(name)
+        return self.sources[name], None, lambda: True
+
+    def list_templates(self):
+        # Only the templates of the templates directory are listed.
+        return []
+
+
+def _bytecode_cache():
+    """
+    The cache of compiled templates shared by all processes, in the
+    directory given by the FOLIUM_TEMPLATE_CACHE environment variable, or
+    in the temporary directory if it is not set. Set it to an empty string
+    to disable the cache.
+
+    """
+    directory = os.environ.get('FOLIUM_TEMPLATE_CACHE')
+    if directory == '':
+        return None
+    try:
+        if directory is not None and not os.path.isdir(directory):
+            os.makedirs(directory)
+        return FileSystemBytecodeCache(directory)
+    except (OSError, RuntimeError):
+        return None
+
+
+# The environment of all the folium templates, those of the elements and
+# those in the folium/templates directory.
+ENV = Environment(loader=ChoiceLoader([_SourceLoader(),
+                                       PackageLoader('folium', 'templates')]),
+                  bytecode_cache=_bytecode_cache(), cache_size=-1)
+
+
+def Template(source):
+    """
+    Compiles a template in the shared environment.
+
+    This is a drop-in replacement for `jinja2.Template`: the templates of
+    all the folium elements are compiled once per process, and their
+    compiled code is kept in the bytecode cache, so that other processes
+    load it instead of compiling the templates again.
+
+    """
+    return ENV.get_template(_register_source(source))
+
+
+def _register_source(source):
+    """Adds a template source to the shared environment without compiling
+    it, and returns its name."""
+    name = hashlib.sha1(source.encode('utf-8')).hexdigest()
+    ENV.loader.loaders[0].sources.setdefault(name, source)
+    return name
+
+
+# The attributes holding the content of Figure and Popup.
+_containers = ('header', 'html', 'script')
+
+# Numbers of the elements, unique within the process.
+_counter = itertools.count()
+
+
+def _new_id():
+    """
+    Returns a new element id, used in the JavaScript names of the elements.
+
+    The ids are numbered in the order the elements are created, so a script
+    building the same maps names their elements the same way on every run.
+    They are only unique within a process: elements created in different
+    processes should not be added to the same figure.
+
+    """
+    return format(next(_counter), 'x')
+
+
+def _tree(element):
+    """Yields an element and the elements under it, depth first, with the
+    content containers of elements like Popup. The containers of a Figure
+    are skipped: they hold the rendered fragments."""
+    yield element
+    children = list(element._children.values())
+    if not isinstance(element, Figure):
+        children = [container for container in (
+            getattr(element, name, None) for name in _containers)
+            if isinstance(container, _BrancaElement) and
+            container._parent is element] + children
+    for child in children:
+        for descendant in _tree(child):
+            yield descendant
+
+
+def _set_ids(root, ids):
+    """
+    Sets the ids of elements of the figure of `root`, given as (element, id)
+    pairs, and renames the keys of the children named after them.
+
+    """
+    renamed = {}
+    for item, new_id in ids:
+        old_name = item.get_name()
+        item._id = new_id
+        renamed[old_name] = item.get_name()
+    parents = list(_tree(root))
+    if isinstance(root, Figure):
+        parents.extend([root.header, root.html, root.script])
+    for parent in parents:
+        if any(key in renamed for key in parent._children):
+            parent._children = OrderedDict(
+                (renamed.get(key, key), child)
+                for key, child in parent._children.items())
+
+
+def assign_tree_ids(element):
+    """
+    Renames all the elements of the figure of an element after their
+    position in its tree.
+
+    The names then only depend on the structure of the tree, and not on the
+    order the elements were created in, so that rendering the same map
+    gives the same HTML in any process. The keys of the children named
+    after the elements are renamed too.
+
+    Returns the previous ids, as (element, id) pairs.
+
+    """
+    root = element.get_root()
+    previous = [(item, item._id) for item in _tree(root)]
+    _set_ids(root, [(item, 't{:x}'.format(number))
+                    for number, (item, _) in enumerate(previous)])
+    return previous
+
+
+@contextmanager
+def tree_ids(element):
+    """
+    Renames the elements of the figure of an element after their position
+    in its tree, see `assign_tree_ids`, and restores their ids on exit.
+
+    """
+    previous = assign_tree_ids(element)
+    try:
+        yield
+    finally:
+        _set_ids(element.get_root(), previous)
+
+
+class Element(_BrancaElement):
+    """
+    A branca Element with a short, sequential id.
+
+    Generating the random uuid of branca's ids is the main cost of
+    creating small elements.
+
+    """
+    def __init__(self, template=None, template_name=None):
+        self._name = 'Element'
+        self._id = _new_id()
+        self._env = _BRANCA_ENV
+        self._children = OrderedDict()
+        self._parent = None
+
+        if template is not None:
+            self._template = Template(template)
+        elif template_name is not None:
+            self._template = self._env.get_template(template_name)
+
+
+class StaticElement(Element):
+    """
+    An Element whose text is output as-is. Unlike `Element(text)`, the
+    text is not compiled as a template, which is expensive for large
+    rendered outputs.
+
+    """
+    def __init__(self, text):
+        super(StaticElement, self).__init__()
+        self.text = text
+
+    def render(self, **kwargs):
+        """Renders the HTML representation of the element."""
+        return self.text
+
+
+class MacroElement(_BrancaMacroElement):
+    """
+    A branca MacroElement that caches the output of its template, and has
+    a short, sequential id like `Element`.
+
+    The header, html and script fragments rendered from the template are
+    reused by the next renders as long as the element is unchanged, so that
+    rendering a map again after adding an element only renders the new
+    element. Setting an attribute or adding a child marks the element as
+    changed. In-place changes to its attributes, like mutating a dict of
+    data, are not detected: call `invalidate` after them.
+
+    The children are still visited on every render, and use their own cache.
+
+    """
+    _macro_names = ('header', 'html', 'script')
+
+    def __init__(self):
+        # Same attributes as branca's MacroElement, with a short id.
+        self.__dict__.update(_name='MacroElement', _id=_new_id(),
+                             _env=_BRANCA_ENV, _children=OrderedDict(),
+                             _parent=None, _rendered=None)
+
+    def __setattr__(self, name, value):
+        self.__dict__['_rendered'] = None
+        object.__setattr__(self, name, value)
+
+    def invalidate(self):
+        """Discards the cached output, so that the next render runs the
+        template again."""
+        self.__dict__['_rendered'] = None
+
+    def add_child(self, child, name=None, index=None):
+        """Add a child."""
+        self.invalidate()
+        return super(MacroElement, self).add_child(child, name=name,
+                                                   index=index)
+
+    def _render_macros(self, kwargs):
+        """Renders the macros of the template into Elements, or reuses the
+        ones of the previous render."""
+        cached = self.__dict__.get('_rendered')
+        if cached is not None and cached[0] == kwargs:
+            return cached[1]
+        fragments = []
+        for macro_name in self._macro_names:
+            macro = self._template.module.__dict__.get(macro_name, None)
+            if macro is not None:
+                fragments.append(
+                    (macro_name, StaticElement(macro(self, kwargs))))
+        self.__dict__['_rendered'] = (dict(kwargs), fragments)
+        return fragments
+
+    def render(self, **kwargs):
+        """Renders the HTML representation of the element."""
+        figure = self.get_root()
+        assert isinstance(figure, Figure), ('You cannot render this Element '
+                                            'if it is not in a Figure.')
+
+        for macro_name, element in self._render_macros(kwargs):
+            getattr(figure, macro_name).add_child(element,
+                                                  name=self.get_name())
+
+        for name, element in self._children.items():
+            element.render(**kwargs)
+
+
+def share_data(element):
+    """
+    Makes the layers under an element, like GeoJson and HeatMap, declare
+    their data once in a JavaScript variable of the figure, instead of
+    inline in their script.
+
+    The copies of these layers made afterwards, for instance by
+    `folium.utilities.deep_copy` to show the same layer on several maps,
+    read the same variable, so that the data is written once in the page
+    and serialized once.
+
+    """
+    for item in _tree(element):
+        if isinstance(item, SharedDataMixin) and item.data_source is None:
+            item.data_source = item
+
+
+class SharedDataMixin(object):
+    """
+    Lets an element read its data from a variable declared in the figure,
+    see `share_data`. Subclasses implement `_data_json`, returning the
+    data as JavaScript, and write `this.data_var` in their template instead
+    of their data when it is not None.
+
+    """
+    data_source = None
+
+    @property
+    def data_var(self):
+        """Name of the variable holding the data, or None if the data is
+        not shared."""
+        if self.data_source is None:
+            return None
+        return 'data_' + self.data_source.get_name()
+
+    def _data_json(self):
+        raise NotImplementedError
+
+    def _declare_data(self):
+        """Declares the variable of the data at the beginning of the script
+        of the figure, if it is shared and not declared yet. The element the
+        data comes from declares it again when it has changed."""
+        if self.data_source is None:
+            return
+        name = self.data_var
+        source = self.data_source
+        script = self.get_root().script
+        # The key does not depend on the name of the variable, which
+        # changes with the ids of the elements.
+        key = 'data_{}'.format(id(source))
+        declared = script._children.get(key)
+        if declared is not None and declared.var_name == name and (
+                self is not source or
+                source.__dict__.get('_rendered') is not None):
+            return
+        declaration = StaticElement(
+            u'var {} = {};'.format(name, self._data_json()))
+        declaration.var_name = name
+        if declared is None:
+            script.add_child(declaration, name=key, index=0)
+        else:
+            script._children[key] = declaration
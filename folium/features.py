@@ -7,15 +7,24 @@ Leaflet GeoJson and miscellaneous features.
 
 from __future__ import (absolute_import, division, print_function)
 
+import hashlib
 import json
+import re
 import warnings
 
 from branca.colormap import LinearColormap, StepColormap
-from branca.element import (Element, Figure, JavascriptLink, MacroElement)
+from branca.element import Figure, JavascriptLink
 from branca.utilities import color_brewer
 
+from folium.elements import (Element, MacroElement, SharedDataMixin,
+                             StaticElement, Template)
 from folium.folium import Map
 from folium.map import (FeatureGroup, Icon, Layer, Marker, Tooltip)
+from folium.spatial_index import (
+    _geometry_coordinates,
+    bounds_intersect,
+    feature_boxes,
+)
 from folium.utilities import (
     _iter_tolist,
     _parse_size,
@@ -26,8 +35,6 @@ from folium.utilities import (
 )
 from folium.vector_layers import PolyLine
 
-from jinja2 import Template
-
 import numpy as np
 
 import requests
@@ -103,6 +110,10 @@ class RegularPolygonMarker(Marker):
         self.rotation = rotation
         self.radius = radius
 
+    def _vector_stats(self):
+        """Returns the number of paths and vertices drawn by this object."""
+        return 1, self.number_of_sides
+
     def render(self, **kwargs):
         """Renders the HTML representation of the element."""
         super(RegularPolygonMarker, self).render()
@@ -117,6 +128,46 @@ class RegularPolygonMarker(Marker):
             name='dvf_js')
 
 
+# Templates shared by Vega and VegaLite, compiled once instead of at each
+# render.
+_vega_div_template = Template(u"""
+            <div id="{{this.get_name()}}"></div>
+            """)
+
+_vega_style_template = Template(u"""
+            <style> #{{this.get_name()}} {
+                position : {{this.position}};
+                width : {{this.width[0]}}{{this.width[1]}};
+                height: {{this.height[0]}}{{this.height[1]}};
+                left: {{this.left[0]}}{{this.left[1]}};
+                top: {{this.top[0]}}{{this.top[1]}};
+            </style>
+            """)
+
+_vega_parse_call_template = Template(u"""
+            vega_parse({{this.json}},{{this.get_name()}});
+            """)
+
+_vega_parse_script = u"""function vega_parse(spec, div) {
+            vg.parse.spec(spec, function(chart) { chart({el:div}).update(); });}"""  # noqa
+
+_vega_embed_template = Template(u"""
+                    vegaEmbed({{this.get_name()}}, {{this.json}})
+                        .then(function(result) {})
+                        .catch(console.error);
+                """)
+
+_vega_embed_v1_template = Template(u"""
+                    var embedSpec = {
+                        mode: "vega-lite",
+                        spec: {{this.json}}
+                    };
+                    vg.embed(
+                        {{this.get_name()}}, embedSpec, function(error, result) {}
+                    );
+                """)
+
+
 class Vega(Element):
     """
     Creates a Vega chart element.
@@ -169,27 +220,21 @@ class Vega(Element):
         """Renders the HTML representation of the element."""
         self.json = json.dumps(self.data)
 
-        self._parent.html.add_child(Element(Template("""
-            <div id="{{this.get_name()}}"></div>
-            """).render(this=self, kwargs=kwargs)), name=self.get_name())
+        self._parent.html.add_child(StaticElement(
+            _vega_div_template.render(this=self, kwargs=kwargs)),
+            name=self.get_name())
 
-        self._parent.script.add_child(Element(Template("""
-            vega_parse({{this.json}},{{this.get_name()}});
-            """).render(this=self)), name=self.get_name())
+        self._parent.script.add_child(StaticElement(
+            _vega_parse_call_template.render(this=self)),
+            name=self.get_name())
 
         figure = self.get_root()
         assert isinstance(figure, Figure), ('You cannot render this Element '
                                             'if it is not in a Figure.')
 
-        figure.header.add_child(Element(Template("""
-            <style> #{{this.get_name()}} {
-                position : {{this.position}};
-                width : {{this.width[0]}}{{this.width[1]}};
-                height: {{this.height[0]}}{{this.height[1]}};
-                left: {{this.left[0]}}{{this.left[1]}};
-                top: {{this.top[0]}}{{this.top[1]}};
-            </style>
-            """).render(this=self, **kwargs)), name=self.get_name())
+        figure.header.add_child(StaticElement(
+            _vega_style_template.render(this=self, **kwargs)),
+            name=self.get_name())
 
         figure.header.add_child(
             JavascriptLink('https://cdnjs.cloudflare.com/ajax/libs/d3/3.5.5/d3.min.js'),  # noqa
@@ -203,10 +248,8 @@ class Vega(Element):
             JavascriptLink('https://code.jquery.com/jquery-2.1.0.min.js'),
             name='jquery')
 
-        figure.script.add_child(
-            Template("""function vega_parse(spec, div) {
-            vg.parse.spec(spec, function(chart) { chart({el:div}).update(); });}"""),  # noqa
-            name='vega_parse')
+        figure.script.add_child(StaticElement(_vega_parse_script),
+                                name='vega_parse')
 
 
 class VegaLite(Element):
@@ -263,23 +306,17 @@ class VegaLite(Element):
         """Renders the HTML representation of the element."""
         vegalite_major_version = self._get_vegalite_major_versions(self.data)
 
-        self._parent.html.add_child(Element(Template("""
-            <div id="{{this.get_name()}}"></div>
-            """).render(this=self, kwargs=kwargs)), name=self.get_name())
+        self._parent.html.add_child(StaticElement(
+            _vega_div_template.render(this=self, kwargs=kwargs)),
+            name=self.get_name())
 
         figure = self.get_root()
         assert isinstance(figure, Figure), ('You cannot render this Element '
                                             'if it is not in a Figure.')
 
-        figure.header.add_child(Element(Template("""
-            <style> #{{this.get_name()}} {
-                position : {{this.position}};
-                width : {{this.width[0]}}{{this.width[1]}};
-                height: {{this.height[0]}}{{this.height[1]}};
-                left: {{this.left[0]}}{{this.left[1]}};
-                top: {{this.top[0]}}{{this.top[1]}};
-            </style>
-            """).render(this=self, **kwargs)), name=self.get_name())
+        figure.header.add_child(StaticElement(
+            _vega_style_template.render(this=self, **kwargs)),
+            name=self.get_name())
 
         if vegalite_major_version == '1':
             self._embed_vegalite_v1(figure)
@@ -316,22 +353,12 @@ class VegaLite(Element):
         figure.header.add_child(JavascriptLink('https://cdn.jsdelivr.net/npm/vega-embed@3'), name='vega-embed')
 
     def _vega_embed(self):
-        self._parent.script.add_child(Element(Template("""
-                    vegaEmbed({{this.get_name()}}, {{this.json}})
-                        .then(function(result) {})
-                        .catch(console.error);
-                """).render(this=self)), name=self.get_name())
+        self._parent.script.add_child(StaticElement(
+            _vega_embed_template.render(this=self)), name=self.get_name())
 
     def _embed_vegalite_v1(self, figure):
-        self._parent.script.add_child(Element(Template("""
-                    var embedSpec = {
-                        mode: "vega-lite",
-                        spec: {{this.json}}
-                    };
-                    vg.embed(
-                        {{this.get_name()}}, embedSpec, function(error, result) {}
-                    );
-                """).render(this=self)), name=self.get_name())
+        self._parent.script.add_child(StaticElement(
+            _vega_embed_v1_template.render(this=self)), name=self.get_name())
 
         figure.header.add_child(JavascriptLink('https://d3js.org/d3.v3.min.js'), name='d3')
         figure.header.add_child(JavascriptLink('https://cdnjs.cloudflare.com/ajax/libs/vega/2.6.5/vega.js'), name='vega')  # noqa
@@ -339,19 +366,108 @@ class VegaLite(Element):
         figure.header.add_child(JavascriptLink('https://cdnjs.cloudflare.com/ajax/libs/vega-embed/2.2.0/vega-embed.js'), name='vega-embed')  # noqa
 
 
-class GeoJson(Layer):
+def _read_geojson(data):
+    """
+    Returns the GeoJSON `data` as a dict: `data` is a dict, a URL, a JSON
+    string, a filename, or an object with a `__geo_interface__`.
+
+    """
+    if isinstance(data, dict):
+        return data
+    elif isinstance(data, text_type) or isinstance(data, binary_type):
+        if data.lower().startswith(('http:', 'ftp:', 'https:')):
+            return requests.get(data).json()
+        elif data.lstrip()[0] in '[{':  # This is a GeoJSON inline string
+            return json.loads(data)
+        else:  # This is a filename
+            with open(data) as f:
+                return json.loads(f.read())
+    elif hasattr(data, '__geo_interface__'):
+        if hasattr(data, 'to_crs'):
+            data = data.to_crs(epsg='4326')
+        return json.loads(json.dumps(data.__geo_interface__))
+    raise ValueError('Unhandled object {!r}.'.format(data))
+
+
+class GeoJsonDataset(object):
+    """
+    A GeoJSON written once in the page and drawn by several layers.
+
+    A GeoJson layer given a dataset instead of data, like the layers built
+    on it, such as Choropleth, TimeSliderChoropleth or a GeoJson indexed by
+    Search, reads the features from a variable declared once at the
+    beginning of the script of the figure. Each layer writes its own styles
+    separately, so that the layers style the same features differently
+    while the geometries are written only once.
+
+    Parameters
+    ----------
+    data: dict or str
+        The GeoJSON, as accepted by GeoJson. It is converted to a
+        FeatureCollection, and must not be modified afterwards.
+    name: str, default None
+        Name of the dataset, a JavaScript identifier, unique in the figure.
+        By default it is derived from the content of the dataset.
+
+    Examples
+    --------
+    >>> states = GeoJsonDataset('us-states.json', name='states')
+    >>> Choropleth(states, data=df, columns=['State', 'Unemployment'],
+    ...            key_on='feature.id').add_to(m)
+    >>> GeoJson(states, style_function=lambda x: {'fillOpacity': 0},
+    ...         highlight_function=lambda x: {'weight': 3}).add_to(m)
+
+    """
+    def __init__(self, data, name=None):
+        if name is not None and not re.match(r'^[A-Za-z_$][\w$]*$', name):
+            raise ValueError('The name of a dataset must be a JavaScript '
+                             'identifier, got {!r}.'.format(name))
+        data = _read_geojson(data)
+        if 'features' not in data:
+            # Catch case when GeoJSON is just a single Feature or a geometry.
+            if 'geometry' not in data:
+                data = {'type': 'Feature', 'geometry': data}
+            data = {'type': 'FeatureCollection', 'features': [data]}
+        self.data = data
+        self._name = name
+        self._json = None
+
+    def to_json(self):
+        """The dataset as JSON, serialized once."""
+        if self._json is None:
+            self._json = json.dumps(self.data, sort_keys=True)
+        return self._json
+
+    def get_name(self):
+        if self._name is None:
+            digest = hashlib.sha1(self.to_json().encode('utf-8')).hexdigest()
+            self._name = 'geojson_' + digest[:12]
+        return self._name
+
+    def _data_json(self):
+        """The dataset as JavaScript, numbering the features so that the
+        layers find their styles."""
+        return (u'(function(data) {{ data.features.forEach('
+                u'function(feature, i) {{ feature.foliumIndex = i; }}); '
+                u'return data; }})({})'.format(self.to_json()))
+
+
+class GeoJson(SharedDataMixin, Layer):
     """
     Creates a GeoJson object for plotting into a Map.
 
     Parameters
     ----------
-    data: file, dict or str.
+    data: file, dict, str or GeoJsonDataset.
         The GeoJSON data you want to plot.
         * If file, then data will be read in the file and fully
         embedded in Leaflet's JavaScript.
         * If dict, then data will be converted to JSON and embedded
         in the JavaScript.
         * If str, then data will be passed to the JavaScript as-is.
+        * If GeoJsonDataset, then the layer reads the features of the
+        dataset, written once in the page, and only its styles are
+        embedded.
     style_function: function, default None
         Function mapping a GeoJson Feature to a style dict.
     highlight_function: function, default None
@@ -371,6 +487,9 @@ class GeoJson(Layer):
     tooltip: GeoJsonTooltip, Tooltip or str, default None
         Display a text when hovering over the object. Can utilize the data,
         see folium.GeoJsonTooltip for info on how to do that.
+    clip_to_bounds: list of (latitude, longitude) points, default None
+        If provided, only the features of a FeatureCollection intersecting
+        this bounding box [southwest, northeast] are kept.
 
     Examples
     --------
@@ -389,23 +508,40 @@ class GeoJson(Layer):
     ...                             '#00ff00'}
     >>> GeoJson(geojson, style_function=style_function)
 
+    >>> # Only keep the features around Paris.
+    >>> GeoJson(geojson, clip_to_bounds=[[48.7, 2.1], [49.0, 2.6]])
+
     """
     _template = Template(u"""
         {% macro script(this, kwargs) %}
+        {% if this.dataset is not none %}
+            var {{this.get_name()}}_styles = {{this._feature_styles()}};
+            {{this.get_name()}}_styles.get = function(feature, kind) {
+                return this.styles[this[kind][feature.foliumIndex]];
+            };
+        {% endif %}
         {% if this.highlight %}
             {{this.get_name()}}_onEachFeature = function onEachFeature(feature, layer) {
                 layer.on({
                     mouseout: function(e) {
+                        {% if this.dataset is not none %}
+                        e.target.setStyle({{this.get_name()}}_styles.get(e.target.feature, 'style'));},
+                        {% else %}
                         e.target.setStyle(e.target.feature.properties.style);},
+                        {% endif %}
                     mouseover: function(e) {
+                        {% if this.dataset is not none %}
+                        e.target.setStyle({{this.get_name()}}_styles.get(e.target.feature, 'highlight'));},
+                        {% else %}
                         e.target.setStyle(e.target.feature.properties.highlight);},
+                        {% endif %}
                     click: function(e) {
                         {{this._parent.get_name()}}.fitBounds(e.target.getBounds());}
                     });
             };
         {% endif %}
         var {{this.get_name()}} = L.geoJson(
-            {% if this.embed %}{{this.style_data()}}{% else %}"{{this.data}}"{% endif %}
+            {% if this.data_var %}{{this.data_var}}{% elif this.embed %}{{this.style_data()}}{% else %}"{{this.data}}"{% endif %}
             {% if this.smooth_factor is not none or this.highlight %}
                 , {
                 {% if this.smooth_factor is not none  %}
@@ -421,35 +557,31 @@ class GeoJson(Layer):
                 }
             {% endif %}
             ).addTo({{this._parent.get_name()}});
+        {% if this.dataset is not none %}
+        {{this.get_name()}}.setStyle(function(feature) {return {{this.get_name()}}_styles.get(feature, 'style');});
+        {% else %}
         {{this.get_name()}}.setStyle(function(feature) {return feature.properties.style;});
+        {% endif %}
         {% endmacro %}
         """)  # noqa
 
     def __init__(self, data, style_function=None, name=None,
                  overlay=True, control=True, show=True,
-                 smooth_factor=None, highlight_function=None, tooltip=None):
+                 smooth_factor=None, highlight_function=None, tooltip=None,
+                 clip_to_bounds=None):
         super(GeoJson, self).__init__(name=name, overlay=overlay,
                                       control=control, show=show)
         self._name = 'GeoJson'
-        if isinstance(data, dict):
-            self.embed = True
-            self.data = data
-        elif isinstance(data, text_type) or isinstance(data, binary_type):
-            self.embed = True
-            if data.lower().startswith(('http:', 'ftp:', 'https:')):
-                self.data = requests.get(data).json()
-            elif data.lstrip()[0] in '[{':  # This is a GeoJSON inline string
-                self.data = json.loads(data)
-            else:  # This is a filename
-                with open(data) as f:
-                    self.data = json.loads(f.read())
-        elif hasattr(data, '__geo_interface__'):
-            self.embed = True
-            if hasattr(data, 'to_crs'):
-                data = data.to_crs(epsg='4326')
-            self.data = json.loads(json.dumps(data.__geo_interface__))  # noqa
-        else:
-            raise ValueError('Unhandled object {!r}.'.format(data))
+        self.dataset = None
+        if isinstance(data, GeoJsonDataset):
+            if clip_to_bounds is not None:
+                raise ValueError('A GeoJsonDataset cannot be clipped, clip '
+                                 'its data instead.')
+            self.dataset = data
+            self.data_source = data
+            data = data.data
+        self.embed = True
+        self.data = _read_geojson(data)
 
         self.style_function = style_function or (lambda x: {})
 
@@ -462,11 +594,30 @@ class GeoJson(Layer):
         self._validate_function(self.style_function, 'style_function')
         self._validate_function(self.highlight_function, 'highlight_function')
 
+        if clip_to_bounds is not None:
+            self.data = self._clip_to_bounds(self.data, clip_to_bounds)
+
         if isinstance(tooltip, (GeoJsonTooltip, Tooltip)):
             self.add_child(tooltip)
         elif tooltip is not None:
             self.add_child(Tooltip(tooltip))
 
+    @staticmethod
+    def _clip_to_bounds(data, bounds):
+        """
+        Return a copy of a FeatureCollection without the features lying
+        outside of `bounds`. Features without coordinates are kept.
+
+        """
+        if 'features' not in data:
+            return data
+        boxes = feature_boxes(data['features'])
+        keep = bounds_intersect(boxes, bounds) | np.isnan(boxes[:, 0])
+        clipped = dict(data)
+        clipped['features'] = [feature for feature, kept in
+                               zip(data['features'], keep) if kept]
+        return clipped
+
     def _validate_function(self, func, name):
         """
         Tests `self.style_function` and `self.highlight_function` to ensure
@@ -497,6 +648,60 @@ class GeoJson(Layer):
                 self.highlight_function(feature))  # noqa
         return json.dumps(self.data, sort_keys=True)
 
+    def _data_json(self):
+        if self.dataset is not None:
+            return self.dataset._data_json()
+        return self.style_data()
+
+    def _feature_styles(self):
+        """
+        Returns the styles of the features of the dataset as JSON: the
+        distinct styles, and for each feature the index of its style and of
+        its highlight style.
+
+        """
+        styles, codes = [], {}
+
+        def code(style):
+            key = json.dumps(style, sort_keys=True)
+            if key not in codes:
+                codes[key] = len(styles)
+                styles.append(style)
+            return codes[key]
+
+        features = self.data['features']
+        result = {'styles': styles,
+                  'style': [code(self.style_function(feature))
+                            for feature in features]}
+        if self.highlight:
+            result['highlight'] = [code(self.highlight_function(feature))
+                                   for feature in features]
+        return json.dumps(result, sort_keys=True)
+
+    def render(self, **kwargs):
+        """Renders the HTML representation of the element."""
+        self._declare_data()
+        super(GeoJson, self).render(**kwargs)
+
+    def _vector_stats(self):
+        """
+        Returns the number of paths and vertices drawn by this object.
+        Points are drawn as markers and are not counted.
+
+        """
+        if 'features' in self.data:
+            geometries = [feature.get('geometry')
+                          for feature in self.data['features']]
+        else:
+            geometries = [self.data.get('geometry', self.data)]
+        paths = vertices = 0
+        for geometry in geometries:
+            if not geometry or geometry.get('type') in ('Point', 'MultiPoint'):
+                continue
+            paths += 1
+            vertices += len(_geometry_coordinates(geometry))
+        return paths, vertices
+
     def _get_self_bounds(self):
         """
         Computes the bounds of the object itself (not including it's children)
@@ -7,18 +7,21 @@ Make beautiful, interactive maps with Python and Leaflet.js
 
 from __future__ import (absolute_import, division, print_function)
 
-import time
+import hashlib
+import os
+import sys
 import warnings
 
-from branca.element import CssLink, Element, Figure, JavascriptLink, MacroElement
+from branca.element import CssLink, Figure, JavascriptLink
 
+from folium.elements import (ENV, Element, MacroElement, StaticElement,
+                             Template, tree_ids)
 from folium.map import FitBounds
 from folium.raster_layers import TileLayer
-from folium.utilities import _parse_size, _tmp_html, _validate_location
+from folium.spatial_index import pruned_to_bounds
+from folium.utilities import _parse_size, _validate_location
 
-from jinja2 import Environment, PackageLoader, Template
-
-ENV = Environment(loader=PackageLoader('folium', 'templates'))
+from six import binary_type, text_type
 
 
 _default_js = [
@@ -130,11 +133,13 @@ class Map(MacroElement):
         (going from bottom to top).
     control_scale : bool, default False
         Whether to add a control scale on the map.
-    prefer_canvas : bool, default False
+    prefer_canvas : bool or 'auto', default False
         Forces Leaflet to use the Canvas back-end (if available) for
         vector layers instead of SVG. This can increase performance
         considerably in some cases (e.g. many thousands of circle
-        markers on the map).
+        markers on the map). With 'auto', the back-end is chosen when
+        the map is rendered, from the number of paths and vertices of
+        its vector layers, see `Map.get_vector_stats`.
     no_touch : bool, default False
         Forces Leaflet to not use touch events even if it detects them.
     disable_3d : bool, default False
@@ -143,6 +148,9 @@ class Map(MacroElement):
         rare environments) even if they're supported.
     zoom_control : bool, default True
         Display zoom controls on the map.
+    tile_proxy : folium.tile_server.TileProxy, default None
+        A local tile server the tiles are requested from, which fetches
+        them once and caches them on disk.
 
     Returns
     -------
@@ -164,6 +172,11 @@ class Map(MacroElement):
     ...)
 
     """
+    # Above these numbers of paths or vertices, prefer_canvas='auto' switches
+    # to the Canvas back-end: every SVG path is a DOM node.
+    max_svg_paths = 2000
+    max_svg_vertices = 100000
+
     _template = Template(u"""
 {% macro header(this, kwargs) %}
     <meta name="viewport" content="width=device-width,
@@ -199,6 +212,9 @@ class Map(MacroElement):
         worldCopyJump: {{this.world_copy_jump.__str__().lower()}},
         crs: L.CRS.{{this.crs}},
         zoomControl: {{this.zoom_control.__str__().lower()}},
+        {%- if this.global_switches.prefer_canvas %}
+        preferCanvas: true,
+        {%- endif %}
         });
 {% if this.control_scale %}L.control.scale().addTo({{this.get_name()}});{% endif %}
 
@@ -223,7 +239,8 @@ $(document).ready(objects_in_front);
                  min_lon=-180, max_lon=180, max_bounds=False,
                  detect_retina=False, crs='EPSG3857', control_scale=False,
                  prefer_canvas=False, no_touch=False, disable_3d=False,
-                 subdomains='abc', png_enabled=False, zoom_control=True):
+                 subdomains='abc', png_enabled=False, zoom_control=True,
+                 tile_proxy=None):
         super(Map, self).__init__()
         self._name = 'Map'
         self._env = ENV
@@ -260,8 +277,13 @@ $(document).ready(objects_in_front);
         self.control_scale = control_scale
         self.zoom_control = zoom_control
 
+        if prefer_canvas not in (True, False, 'auto'):
+            raise ValueError("prefer_canvas should be True, False or 'auto', "
+                             "got {!r}.".format(prefer_canvas))
+        self.prefer_canvas = prefer_canvas
+        self.vector_stats = None
         self.global_switches = GlobalSwitches(
-            prefer_canvas,
+            prefer_canvas is True,
             no_touch,
             disable_3d
         )
@@ -273,7 +295,7 @@ $(document).ready(objects_in_front);
                 tiles=tiles, min_zoom=min_zoom, max_zoom=max_zoom,
                 max_native_zoom=max_native_zoom, no_wrap=no_wrap, attr=attr,
                 API_key=API_key, detect_retina=detect_retina,
-                subdomains=subdomains
+                subdomains=subdomains, proxy=tile_proxy
             )
 
     def _repr_html_(self, **kwargs):
@@ -286,34 +308,34 @@ $(document).ready(objects_in_front);
             out = self._parent._repr_html_(**kwargs)
         return out
 
-    def _to_png(self, delay=3):
+    def _to_png(self, delay=3, engine=None):
         """Export the HTML to byte representation of a PNG image.
 
-        Uses selenium to render the HTML and record a PNG. You may need to
-        adjust the `delay` time keyword argument if maps render without data or tiles.
+        Uses selenium to render the HTML and record a PNG, with a browser
+        that is kept open for the next calls. The snapshot is taken as soon
+        as the page and its tiles are loaded, or after `delay` seconds.
+
+        Parameters
+        ----------
+        delay: float, default 3
+            Maximum time to wait for the map to be ready, in seconds.
+        engine: folium.screenshot.ScreenshotEngine, default None
+            The engine taking the snapshot, to choose its size or serve
+            local tiles. By default, a shared engine with a 1024x768
+            viewport.
 
         Examples
         --------
         >>> map._to_png()
-        >>> map._to_png(time=10)  # Wait 10 seconds between render and snapshot.
+        >>> map._to_png(delay=10)  # Wait at most 10 seconds for the tiles.
 
         """
         if self._png_image is None:
-            from selenium import webdriver
-
-            options = webdriver.firefox.options.Options()
-            options.add_argument('--headless')
-            driver = webdriver.Firefox(options=options)
-
-            html = self.get_root().render()
-            with _tmp_html(html) as fname:
-                # We need the tempfile to avoid JS security issues.
-                driver.get('file:///{path}'.format(path=fname))
-                driver.maximize_window()
-                time.sleep(delay)
-                png = driver.get_screenshot_as_png()
-                driver.quit()
-            self._png_image = png
+            from folium.screenshot import get_default_engine
+
+            if engine is None:
+                engine = get_default_engine()
+            self._png_image = engine.screenshot(self, timeout=delay)
         return self._png_image
 
     def _repr_png_(self):
@@ -328,7 +350,7 @@ $(document).ready(objects_in_front);
                        API_key=None, max_zoom=18, min_zoom=0,
                        max_native_zoom=None, attr=None, active=False,
                        detect_retina=False, no_wrap=False, subdomains='abc',
-                       **kwargs):
+                       proxy=None, **kwargs):
         """
         Add a tile layer to the map. See TileLayer for options.
 
@@ -339,15 +361,93 @@ $(document).ready(objects_in_front);
                                attr=attr, API_key=API_key,
                                detect_retina=detect_retina,
                                subdomains=subdomains,
-                               no_wrap=no_wrap)
+                               no_wrap=no_wrap, proxy=proxy)
         self.add_child(tile_layer, name=tile_layer.tile_name)
 
+    def save(self, outfile, close_file=True, bounds=None, margin=0.,
+             deterministic=False, **kwargs):
+        """Saves the Map into a file.
+
+        Parameters
+        ----------
+        outfile : str or file object
+            The file (or filename) where you want to output the html. The
+            files written next to it, like the chunks of frames of
+            time-dimension layers, are placed relative to its directory.
+        close_file : bool, default True
+            Whether the file has to be closed after write.
+        bounds: list of (latitude, longitude) points, default None
+            If provided, only the elements intersecting this bounding box
+            [southwest, northeast] are written to the file. Elements
+            without bounds of their own, such as tile layers or controls,
+            are always kept.
+        margin: float, default 0.
+            Margin in degrees added around `bounds` before pruning.
+        deterministic: bool, default False
+            If True, the elements are renamed after their position in the
+            map while it is saved, see `folium.elements.tree_ids`, so that
+            the same map is saved to the same HTML by any process. Their
+            ids are restored afterwards.
+
+        Returns
+        -------
+        The SHA-256 hex digest of the saved HTML, to detect maps that did
+        not change since they were last saved or published.
+
+        Examples
+        --------
+        >>> m.save('map.html', bounds=[[52.19, -2.22], [52.63, -1.13]],
+        ...        margin=0.05)
+        >>> digest = m.save('map.html', deterministic=True)
+        >>> if digest != manifest.get('map.html'):
+        ...     publish('map.html')
+
+        """
+        filename = outfile
+        if not isinstance(filename, (text_type, binary_type)):
+            filename = getattr(outfile, 'name', None)
+        if isinstance(filename, (text_type, binary_type)):
+            # Files written next to the page, like the chunks of frames,
+            # are placed relative to its directory.
+            directory = os.path.dirname(os.path.abspath(filename))
+            if not isinstance(directory, (str, text_type)):
+                directory = directory.decode(sys.getfilesystemencoding())
+            kwargs.setdefault('output_dir', directory)
+        if deterministic:
+            with tree_ids(self):
+                html = self._render_html(bounds, margin, **kwargs)
+        else:
+            html = self._render_html(bounds, margin, **kwargs)
+        data = html.encode('utf8')
+        if isinstance(outfile, (text_type, binary_type)):
+            with open(outfile, 'wb') as f:
+                f.write(data)
+        else:
+            outfile.write(data)
+            if close_file:
+                outfile.close()
+        return hashlib.sha256(data).hexdigest()
+
+    def _render_html(self, bounds, margin, **kwargs):
+        """Renders the figure, pruned to `bounds` if not None."""
+        if bounds is None:
+            return self.get_root().render(**kwargs)
+        with pruned_to_bounds(self, bounds, margin=margin):
+            return self.get_root().render(**kwargs)
+
     def render(self, **kwargs):
         """Renders the HTML representation of the element."""
         figure = self.get_root()
         assert isinstance(figure, Figure), ('You cannot render this Element '
                                             'if it is not in a Figure.')
 
+        # Follows prefer_canvas if it was changed after the construction.
+        if self.prefer_canvas == 'auto':
+            self.vector_stats = self.get_vector_stats()
+            self.global_switches.prefer_canvas = self.vector_stats['canvas']
+        else:
+            self.global_switches.prefer_canvas = self.prefer_canvas is True
+
         # Set global switches
         figure.header.add_child(self.global_switches, name='global_switches')
 
@@ -359,7 +459,7 @@ $(document).ready(objects_in_front);
         for name, url in _default_css:
             figure.header.add_child(CssLink(url), name=name)
 
-        figure.header.add_child(Element(
+        figure.header.add_child(StaticElement(
             '<style>html, body {'
             'width: 100%;'
             'height: 100%;'
@@ -368,7 +468,7 @@ $(document).ready(objects_in_front);
             '}'
             '</style>'), name='css_style')
 
-        figure.header.add_child(Element(
+        figure.header.add_child(StaticElement(
             '<style>#map {'
             'position:absolute;'
             'top:0;'
@@ -380,6 +480,49 @@ $(document).ready(objects_in_front);
 
         super(Map, self).render(**kwargs)
 
+    def get_vector_stats(self):
+        """
+        Counts the vector paths and vertices drawn by the children of the map.
+
+        Elements report their own counts through a `_vector_stats` method
+        returning a (paths, vertices) tuple.
+
+        Returns
+        -------
+        dict with the keys 'paths' and 'vertices', 'by_type' (the same counts
+        per element class) and 'canvas' (whether prefer_canvas='auto' picks
+        the Canvas back-end for these counts).
+
+        Examples
+        --------
+        >>> m = folium.Map(prefer_canvas='auto')
+        >>> folium.PolyLine([[0, 0], [1, 1]]).add_to(m)
+        >>> m.get_vector_stats()
+        {'paths': 1, 'vertices': 2, 'by_type': {'PolyLine': [1, 2]}, 'canvas': False}
+
+        """
+        paths = vertices = 0
+        by_type = {}
+        stack = list(self._children.values())
+        while stack:
+            child = stack.pop()
+            stack.extend(child._children.values())
+            if not hasattr(child, '_vector_stats'):
+                continue
+            child_paths, child_vertices = child._vector_stats()
+            paths += child_paths
+            vertices += child_vertices
+            counts = by_type.setdefault(type(child).__name__, [0, 0])
+            counts[0] += child_paths
+            counts[1] += child_vertices
+        return {
+            'paths': paths,
+            'vertices': vertices,
+            'by_type': by_type,
+            'canvas': (paths > self.max_svg_paths or
+                       vertices > self.max_svg_vertices),
+        }
+
     def fit_bounds(self, bounds, padding_top_left=None,
                    padding_bottom_right=None, padding=None, max_zoom=None):
         """Fit the map to contain a bounding box with the
@@ -10,12 +10,12 @@ from __future__ import (absolute_import, division, print_function)
 import json
 from collections import OrderedDict
 
-from branca.element import CssLink, Element, Figure, Html, JavascriptLink, MacroElement  # noqa
+from branca.element import CssLink, Element, Figure, Html, JavascriptLink  # noqa
 
+from folium import elements
+from folium.elements import MacroElement, StaticElement, Template
 from folium.utilities import _validate_coordinates, camelize, get_bounds
 
-from jinja2 import Template
-
 from six import binary_type, text_type
 
 
@@ -37,11 +37,23 @@ class Layer(MacroElement):
     """
     def __init__(self, name=None, overlay=False, control=True, show=True):
         super(Layer, self).__init__()
-        self.layer_name = name if name is not None else self.get_name()
+        self._layer_name = name
         self.overlay = overlay
         self.control = control
         self.show = show
 
+    @property
+    def layer_name(self):
+        """The name of the layer in LayerControls, its own name if it was
+        not given one."""
+        if self._layer_name is None:
+            return self.get_name()
+        return self._layer_name
+
+    @layer_name.setter
+    def layer_name(self, value):
+        self._layer_name = value
+
 
 class FeatureGroup(Layer):
     """
@@ -270,7 +282,7 @@ class Marker(MacroElement):
         return get_bounds(self.location)
 
 
-class Popup(Element):
+class Popup(elements.Element):
     """Create a Popup instance that can be linked to a Layer.
 
     Parameters
@@ -308,9 +320,9 @@ class Popup(Element):
                  sticky=False):
         super(Popup, self).__init__()
         self._name = 'Popup'
-        self.header = Element()
-        self.html = Element()
-        self.script = Element()
+        self.header = elements.Element()
+        self.html = elements.Element()
+        self.script = elements.Element()
 
         self.header._parent = self
         self.html._parent = self
@@ -336,7 +348,7 @@ class Popup(Element):
         assert isinstance(figure, Figure), ('You cannot render this Element '
                                             'if it is not in a Figure.')
 
-        figure.script.add_child(Element(
+        figure.script.add_child(StaticElement(
             self._template.render(this=self, kwargs=kwargs)),
             name=self.get_name())
 
@@ -13,6 +13,8 @@ from __future__ import (absolute_import, division, print_function)
 from folium.plugins.antpath import AntPath
 from folium.plugins.beautify_icon import BeautifyIcon
 from folium.plugins.boat_marker import BoatMarker
+from folium.plugins.bulk_circles import BulkCircles
+from folium.plugins.bulk_markers import BulkMarkers
 from folium.plugins.draw import Draw
 from folium.plugins.dual_map import DualMap
 from folium.plugins.fast_marker_cluster import FastMarkerCluster
@@ -26,6 +28,7 @@ from folium.plugins.measure_control import MeasureControl
 from folium.plugins.minimap import MiniMap
 from folium.plugins.mouse_position import MousePosition
 from folium.plugins.polyline_text_path import PolyLineTextPath
+from folium.plugins.pre_clustered_markers import PreClusteredMarkers
 from folium.plugins.scroll_zoom_toggler import ScrollZoomToggler
 from folium.plugins.search import Search
 from folium.plugins.terminator import Terminator
@@ -37,6 +40,8 @@ __all__ = [
     'AntPath',
     'BeautifyIcon',
     'BoatMarker',
+    'BulkCircles',
+    'BulkMarkers',
     'Draw',
     'DualMap',
     'FastMarkerCluster',
@@ -50,6 +55,7 @@ __all__ = [
     'MiniMap',
     'MousePosition',
     'PolyLineTextPath',
+    'PreClusteredMarkers',
     'ScrollZoomToggler',
     'Search',
     'Terminator',
@@ -6,11 +6,10 @@ import json
 
 from branca.element import Figure, JavascriptLink
 
+from folium.elements import Template
 from folium import Marker
 from folium.vector_layers import path_options
 
-from jinja2 import Template
-
 
 class AntPath(Marker):
     """
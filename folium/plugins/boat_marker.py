@@ -6,11 +6,10 @@ import json
 
 from branca.element import Figure, JavascriptLink
 
+from folium.elements import Template
 from folium.map import Marker
 from folium.utilities import _validate_location
 
-from jinja2 import Template
-
 
 class BoatMarker(Marker):
     """
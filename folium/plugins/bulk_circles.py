@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+
+from folium.elements import Template
+from folium.map import Layer
+from folium.plugins.bulk_markers import _codes_to_json, _encode_column
+from folium.utilities import (
+    _as_float_array,
+    _encode_numbers,
+    _factorize,
+    _to_json,
+    _validate_coordinate_array,
+)
+from folium.vector_layers import path_options
+
+import numpy as np
+
+from six import text_type
+
+
+def _is_scalar(value):
+    return value is None or np.isscalar(value)
+
+
+class BulkCircles(Layer):
+    """
+    Add many circles to a map at once, from columnar data.
+
+    The Path options shared by all circles are computed once, the
+    distinct colors are gathered in a palette, and the per-point values
+    are packed in a single flat array that is turned into circles by one
+    JavaScript loop in the browser. Circles are drawn on a shared canvas
+    renderer by default, which scales to hundreds of thousands of points.
+
+    See :func:`folium.vector_layers.path_options` for the `Path` options.
+
+    Parameters
+    ----------
+    locations: list of list, array of shape (n, 2) or DataFrame
+        Data points of the form [[lat, lng]].
+    radius: float or list of length n, default 10
+        Radius of each circle, in pixels or meters depending on `units`.
+    color: str or list of length n, default None
+        Stroke color of each circle. Also used as fill color unless
+        `fill_color` is given.
+    opacity: float or list of length n, default None
+        Stroke opacity of each circle.
+    fill_opacity: float or list of length n, default None
+        Fill opacity of each circle.
+    units: {'pixels', 'meters'}, default 'pixels'
+        Draw `L.circleMarker` objects with a radius in pixels, or
+        `L.circle` objects with a radius in meters.
+    popups: list of length n or str, default None
+        HTML content of the popup of each circle, None for no popup.
+    tooltips: list of length n or str, default None
+        Text of the tooltip of each circle, None for no tooltip.
+    canvas: bool, default True
+        Draw the circles on a canvas renderer instead of SVG.
+    precision: int, default 6
+        Number of decimals the coordinates are rounded to.
+    name : string, default None
+        The name of the Layer, as it will appear in LayerControls.
+    overlay : bool, default True
+        Adds the layer as an optional overlay (True) or the base layer (False).
+    control : bool, default True
+        Whether the Layer will be included in LayerControls.
+    show: bool, default True
+        Whether the layer will be shown on opening (only for overlays).
+    **kwargs
+        Path options shared by all circles.
+
+    Examples
+    --------
+    >>> BulkCircles(df[['lat', 'lon']], radius=df['size'],
+    ...             color=df['category'].map(palette), fill=True)
+
+    """
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var columns = {{ this.columns }};
+                var data = {{ this.data }};
+                var palette = {{ this.palette }};
+                var popups = {{ this.popups }};
+                var popupCodes = {{ this.popup_codes }};
+                var tooltips = {{ this.tooltips }};
+                var tooltipCodes = {{ this.tooltip_codes }};
+                var base = {{ this.options }};
+                {%- if this.canvas %}
+                base.renderer = L.canvas();
+                {%- endif %}
+                var fillColor = {{ this.fill_color|tojson }};
+                var stride = columns.length;
+                var layer = L.featureGroup();
+
+                for (var i = 0; i < data.length / stride; i++) {
+                    var options = L.Util.extend({}, base);
+                    var row = data.slice(stride * i, stride * (i + 1));
+                    for (var j = 2; j < stride; j++) {
+                        if (columns[j] === 'color') {
+                            options.color = palette[row[j]];
+                            if (!fillColor) {
+                                options.fillColor = options.color;
+                            }
+                        } else {
+                            options[columns[j]] = row[j];
+                        }
+                    }
+                    var circle = L.{{ this.factory }}([row[0], row[1]], options);
+                    var popupCode = popupCodes ? popupCodes[i] : 0;
+                    if (popupCode >= 0 && popups.length) {
+                        circle.bindPopup(popups[popupCode]);
+                    }
+                    var tooltipCode = tooltipCodes ? tooltipCodes[i] : 0;
+                    if (tooltipCode >= 0 && tooltips.length) {
+                        circle.bindTooltip(tooltips[tooltipCode]);
+                    }
+                    layer.addLayer(circle);
+                }
+                return layer.addTo({{ this._parent.get_name() }});
+            })();
+        {% endmacro %}
+        """)
+
+    def __init__(self, locations, radius=10, color=None, opacity=None,
+                 fill_opacity=None, units='pixels', popups=None,
+                 tooltips=None, canvas=True, precision=6, name=None,
+                 overlay=True, control=True, show=True, **kwargs):
+        super(BulkCircles, self).__init__(name=name, overlay=overlay,
+                                          control=control, show=show)
+        self._name = 'BulkCircles'
+        if units not in ('pixels', 'meters'):
+            raise ValueError("units must be 'pixels' or 'meters', "
+                             "got {!r}.".format(units))
+        self.factory = 'circleMarker' if units == 'pixels' else 'circle'
+        self.locations = _validate_coordinate_array(locations)[:, :2]
+        self.canvas = canvas
+        self.precision = precision
+        n = len(self.locations)
+
+        shared, columns, arrays = {}, ['lat', 'lng'], [self.locations]
+        self.palette = '[]'
+        for key, values in [('radius', radius), ('color', color),
+                            ('opacity', opacity),
+                            ('fill_opacity', fill_opacity)]:
+            if _is_scalar(values):
+                if values is not None:
+                    shared[key] = values
+                continue
+            if len(values) != n:
+                raise ValueError('{} must have the same length as '
+                                 'locations.'.format(key))
+            if key == 'color':
+                uniques, codes = _factorize(values)
+                if (codes < 0).any():
+                    raise ValueError('color cannot contain missing values.')
+                self.palette = _to_json([text_type(c) for c in uniques])
+                values = codes
+            else:
+                values = _as_float_array(values, name=key)
+            columns.append('fillOpacity' if key == 'fill_opacity' else key)
+            arrays.append(np.asarray(values, dtype=float).reshape(-1, 1))
+        kwargs.update(shared)
+        options = path_options(line=False, radius=kwargs.pop('radius', False),
+                               **kwargs)
+        self.fill_color = kwargs.get('fill_color')
+
+        self.options = _to_json(options)
+        self.columns = _to_json(columns)
+        self._data = np.hstack(arrays)
+        self._popups, self._popup_codes = _encode_column(popups, n, 'popups')
+        self._tooltips, self._tooltip_codes = _encode_column(
+            tooltips, n, 'tooltips')
+
+    @property
+    def data(self):
+        data = self._data.copy()
+        data[:, :2] = np.round(data[:, :2], self.precision)
+        return _encode_numbers(data)
+
+    @property
+    def popups(self):
+        return _to_json(self._popups)
+
+    @property
+    def tooltips(self):
+        return _to_json(self._tooltips)
+
+    @property
+    def popup_codes(self):
+        return _codes_to_json(self._popup_codes)
+
+    @property
+    def tooltip_codes(self):
+        return _codes_to_json(self._tooltip_codes)
+
+    def _vector_stats(self):
+        """Returns the number of paths and vertices drawn by this object."""
+        return len(self.locations), len(self.locations)
+
+    def _get_self_bounds(self):
+        """
+        Computes the bounds of the object itself (not including it's children)
+        in the form [[lat_min, lon_min], [lat_max, lon_max]].
+
+        """
+        if not len(self.locations):
+            return [[None, None], [None, None]]
+        return [self.locations.min(axis=0).tolist(),
+                self.locations.max(axis=0).tolist()]
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+
+from folium.elements import Template
+from folium.features import CustomIcon, DivIcon
+from folium.map import Icon, Layer
+from folium.utilities import (
+    _encode_numbers,
+    _factorize,
+    _to_json,
+    _validate_coordinate_array,
+)
+
+from six import binary_type, text_type
+
+
+def _icon_to_js(icon):
+    """Returns the JavaScript expression creating a Leaflet icon from a
+    folium Icon, CustomIcon or DivIcon object."""
+    if isinstance(icon, CustomIcon):
+        options = {
+            'iconUrl': icon.icon_url,
+            'iconSize': icon.icon_size,
+            'iconAnchor': icon.icon_anchor,
+            'shadowUrl': icon.shadow_url,
+            'shadowSize': icon.shadow_size,
+            'shadowAnchor': icon.shadow_anchor,
+            'popupAnchor': icon.popup_anchor,
+        }
+        factory = 'L.icon'
+    elif isinstance(icon, Icon):
+        options = {
+            'icon': icon.icon,
+            'iconColor': icon.icon_color,
+            'markerColor': icon.color,
+            'prefix': icon.prefix,
+            'extraClasses': 'fa-rotate-{}'.format(icon.angle),
+        }
+        factory = 'L.AwesomeMarkers.icon'
+    elif isinstance(icon, DivIcon):
+        options = {
+            'iconSize': icon.icon_size,
+            'iconAnchor': icon.icon_anchor,
+            'popupAnchor': icon.popup_anchor,
+            'className': icon.className,
+            'html': icon.html,
+        }
+        factory = 'L.divIcon'
+    else:
+        raise TypeError('Expected a folium Icon, CustomIcon or DivIcon, '
+                        'got {!r}.'.format(icon))
+    options = {key: value for key, value in options.items() if value}
+    return '{}({})'.format(factory, _to_json(options))
+
+
+def _encode_icons(icons, n):
+    """
+    Deduplicates a column of icons. Returns the list of the JavaScript
+    expressions of the unique icons and the array of codes pointing into
+    it, or None if every marker uses the first icon.
+
+    """
+    if icons is None:
+        return [], None
+    if isinstance(icons, (Icon, DivIcon)):
+        return [_icon_to_js(icons)], None
+    if len(icons) != n:
+        raise ValueError('icons must have the same length as locations.')
+    icons_js = [None if icon is None else _icon_to_js(icon) for icon in icons]
+    uniques, codes = _factorize(icons_js)
+    return uniques, _compact_codes(codes)
+
+
+def _encode_column(values, n, name):
+    """Deduplicates a column of strings, see `_encode_icons`."""
+    if values is None:
+        return [], None
+    if isinstance(values, (text_type, binary_type)):
+        return [values], None
+    if len(values) != n:
+        raise ValueError('{} must have the same length as '
+                         'locations.'.format(name))
+    uniques, codes = _factorize(values)
+    return [text_type(value) for value in uniques], _compact_codes(codes)
+
+
+def _compact_codes(codes):
+    """Drops an array of codes that only points at the first value."""
+    return None if (codes == 0).all() else codes
+
+
+def _codes_to_json(codes):
+    return 'null' if codes is None else _to_json(codes)
+
+
+class BulkMarkers(Layer):
+    """
+    Add many markers to a map at once, from columnar data.
+
+    Unlike adding `folium.Marker` objects one at a time, the data is kept
+    in NumPy arrays and serialized as a single compact array that is
+    turned into markers by one JavaScript loop in the browser. Popups,
+    tooltips and icons are deduplicated, so that each distinct value is
+    written only once.
+
+    Parameters
+    ----------
+    locations: list of list, array of shape (n, 2) or DataFrame
+        Data points of the form [[lat, lng]].
+    popups: list of length n or str, default None
+        HTML content of the popup of each marker, None for no popup.
+        A single string is used for all markers.
+    tooltips: list of length n or str, default None
+        Text of the tooltip of each marker, None for no tooltip.
+        A single string is used for all markers.
+    icons: list of length n or Icon, default None
+        Icon, CustomIcon or DivIcon of each marker, None for the
+        default Leaflet icon. A single icon is used for all markers.
+    precision: int, default 6
+        Number of decimals the coordinates are rounded to.
+    name : string, default None
+        The name of the Layer, as it will appear in LayerControls.
+    overlay : bool, default True
+        Adds the layer as an optional overlay (True) or the base layer (False).
+    control : bool, default True
+        Whether the Layer will be included in LayerControls.
+    show: bool, default True
+        Whether the layer will be shown on opening (only for overlays).
+
+    Examples
+    --------
+    >>> BulkMarkers(df[['lat', 'lon']], popups=df['name'],
+    ...             icons=folium.Icon(color='red'))
+
+    """
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var coords = {{ this.coordinates }};
+                var popups = {{ this.popups }};
+                var popupCodes = {{ this.popup_codes }};
+                var tooltips = {{ this.tooltips }};
+                var tooltipCodes = {{ this.tooltip_codes }};
+                var icons = [{{ this._icons|join(', ') }}];
+                var iconCodes = {{ this.icon_codes }};
+                var layer = L.featureGroup();
+
+                for (var i = 0; i < coords.length / 2; i++) {
+                    var iconCode = iconCodes ? iconCodes[i] : 0;
+                    var marker = L.marker(
+                        [coords[2 * i], coords[2 * i + 1]],
+                        {icon: iconCode >= 0 && icons.length ?
+                            icons[iconCode] : new L.Icon.Default()}
+                    );
+                    var popupCode = popupCodes ? popupCodes[i] : 0;
+                    if (popupCode >= 0 && popups.length) {
+                        marker.bindPopup(popups[popupCode]);
+                    }
+                    var tooltipCode = tooltipCodes ? tooltipCodes[i] : 0;
+                    if (tooltipCode >= 0 && tooltips.length) {
+                        marker.bindTooltip(tooltips[tooltipCode]);
+                    }
+                    layer.addLayer(marker);
+                }
+                return layer.addTo({{ this._parent.get_name() }});
+            })();
+        {% endmacro %}
+        """)
+
+    def __init__(self, locations, popups=None, tooltips=None, icons=None,
+                 precision=6, name=None, overlay=True, control=True,
+                 show=True):
+        super(BulkMarkers, self).__init__(name=name, overlay=overlay,
+                                          control=control, show=show)
+        self._name = 'BulkMarkers'
+        self.locations = _validate_coordinate_array(locations)[:, :2]
+        self.precision = precision
+        n = len(self.locations)
+        self._popups, self._popup_codes = _encode_column(popups, n, 'popups')
+        self._tooltips, self._tooltip_codes = _encode_column(
+            tooltips, n, 'tooltips')
+        self._icons, self._icon_codes = _encode_icons(icons, n)
+
+    @property
+    def coordinates(self):
+        return _encode_numbers(self.locations, self.precision)
+
+    @property
+    def popups(self):
+        return _to_json(self._popups)
+
+    @property
+    def tooltips(self):
+        return _to_json(self._tooltips)
+
+    @property
+    def popup_codes(self):
+        return _codes_to_json(self._popup_codes)
+
+    @property
+    def tooltip_codes(self):
+        return _codes_to_json(self._tooltip_codes)
+
+    @property
+    def icon_codes(self):
+        return _codes_to_json(self._icon_codes)
+
+    def _get_self_bounds(self):
+        """
+        Computes the bounds of the object itself (not including it's children)
+        in the form [[lat_min, lon_min], [lat_max, lon_max]].
+
+        """
+        if not len(self.locations):
+            return [[None, None], [None, None]]
+        return [self.locations.min(axis=0).tolist(),
+                self.locations.max(axis=0).tolist()]
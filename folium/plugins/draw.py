@@ -2,9 +2,9 @@
 
 from __future__ import (absolute_import, division, print_function)
 
-from branca.element import CssLink, Element, Figure, JavascriptLink, MacroElement
+from branca.element import CssLink, Figure, JavascriptLink
 
-from jinja2 import Template
+from folium.elements import MacroElement, StaticElement, Template
 
 
 class Draw(MacroElement):
@@ -94,5 +94,5 @@ class Draw(MacroElement):
         </style>"""
         export_button = """<a href='#' id='export'>Export</a>"""
         if self.export:
-            figure.header.add_child(Element(export_style), name='export')
-            figure.html.add_child(Element(export_button), name='export_button')
+            figure.header.add_child(StaticElement(export_style), name='export')
+            figure.html.add_child(StaticElement(export_button), name='export_button')
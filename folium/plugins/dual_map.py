@@ -1,7 +1,6 @@
-from jinja2 import Template
-
-from branca.element import MacroElement, Figure, JavascriptLink
+from branca.element import Figure, JavascriptLink
 
+from folium.elements import MacroElement, Template, share_data
 from folium.folium import Map
 from folium.utilities import deep_copy
 
@@ -10,7 +9,9 @@ class DualMap(MacroElement):
     """Create two maps in the same window.
 
     Adding children to this objects adds them to both maps. You can access
-    the individual maps with `DualMap.m1` and `DualMap.m2`.
+    the individual maps with `DualMap.m1` and `DualMap.m2`. The data of the
+    layers added to both maps, like GeoJson and HeatMap, is written once in
+    the page and read by the layers of both maps.
 
     Uses the Leaflet plugin Sync: https://github.com/jieter/Leaflet.Sync
 
@@ -66,7 +67,7 @@ class DualMap(MacroElement):
         # Important: add self to Figure last.
         figure.add_child(self)
         self.children_for_m2 = []
-        self.children_for_m2_copied = []  # list with ids
+        self.children_for_m2_copied = set()  # ids of the copied objects
 
     def _repr_html_(self, **kwargs):
         """Displays the HTML Map in a Jupyter notebook."""
@@ -80,6 +81,7 @@ class DualMap(MacroElement):
 
     def add_child(self, child, name=None, index=None):
         """Add object `child` to the first map and store it for the second."""
+        share_data(child)
         self.m1.add_child(child, name, index)
         if index is None:
             index = len(self.m2._children)
@@ -96,14 +98,14 @@ class DualMap(MacroElement):
         super(DualMap, self).render(**kwargs)
 
         for child, name, index in self.children_for_m2:
-            if child._id in self.children_for_m2_copied:
+            if id(child) in self.children_for_m2_copied:
                 # This map has been rendered before, child was copied already.
                 continue
             child_copy = deep_copy(child)
             self.m2.add_child(child_copy, name, index)
             # m2 has already been rendered, so render the child here:
             child_copy.render()
-            self.children_for_m2_copied.append(child._id)
+            self.children_for_m2_copied.add(id(child))
 
     def fit_bounds(self, *args, **kwargs):
         for m in (self.m1, self.m2):
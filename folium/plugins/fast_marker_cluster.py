@@ -2,10 +2,9 @@
 
 from __future__ import (absolute_import, division, print_function)
 
+from folium.elements import Template
 from folium.plugins.marker_cluster import MarkerCluster
-from folium.utilities import _validate_coordinates
-
-from jinja2 import Template
+from folium.utilities import _delta_encode, _split_coordinate_columns, _to_json
 
 
 class FastMarkerCluster(MarkerCluster):
@@ -17,17 +16,21 @@ class FastMarkerCluster(MarkerCluster):
     Be aware that the FastMarkerCluster class passes an empty
     list to the parent class' __init__ method during initialisation.
     This means that the add_child method is never called, and
-    no reference to any marker data are retained. Methods such
-    as get_bounds() are therefore not available when using it.
+    no Marker objects are created for the data.
+
+    The coordinates are kept in a NumPy array and sent to the browser as
+    quantized, delta-encoded Int32 values, which keeps both the Python
+    side and the size of the output small for millions of points.
 
     Parameters
     ----------
-    data: list
-        List of list of shape [[], []]. Data points should be of
-        the form [[lat, lng]].
+    data: list, array or DataFrame
+        Data points of the form [[lat, lng]], optionally followed by
+        extra columns, e.g. [[lat, lng, name]], that are passed on to
+        the callback.
     callback: string, default None
         A string representation of a valid Javascript function
-        that will be passed a lat, lon coordinate pair. See the
+        that will be passed a row [lat, lng, extra...]. See the
         FasterMarkerCluster for an example of a custom callback.
     name : string, default None
         The name of the Layer, as it will appear in LayerControls.
@@ -40,6 +43,8 @@ class FastMarkerCluster(MarkerCluster):
     options : dict, default None
         A dictionary with options for Leaflet.markercluster. See
         https://github.com/Leaflet/Leaflet.markercluster for options.
+    precision: int, default 6
+        Number of decimals the coordinates are rounded to.
 
     """
     _template = Template(u"""
@@ -48,11 +53,25 @@ class FastMarkerCluster(MarkerCluster):
             var {{ this.get_name() }} = (function(){
                 {{this._callback}}
 
-                var data = {{ this._data }};
+                var bytes = atob({{ this.encoded_coordinates|tojson }});
+                var buffer = new ArrayBuffer(bytes.length);
+                var view = new Uint8Array(buffer);
+                for (var i = 0; i < bytes.length; i++) {
+                    view[i] = bytes.charCodeAt(i);
+                }
+                var deltas = new Int32Array(buffer);
+                var scale = {{ 10 ** this.precision }};
+                var extras = {{ this.extras }};
                 var cluster = L.markerClusterGroup({{ this.options }});
 
-                for (var i = 0; i < data.length; i++) {
-                    var row = data[i];
+                var lat = 0, lng = 0;
+                for (var i = 0; i < deltas.length / 2; i++) {
+                    lat += deltas[2 * i];
+                    lng += deltas[2 * i + 1];
+                    var row = [lat / scale, lng / scale];
+                    if (extras) {
+                        row = row.concat(extras[i]);
+                    }
                     var marker = callback(row);
                     marker.addTo(cluster);
                 }
@@ -63,12 +82,14 @@ class FastMarkerCluster(MarkerCluster):
             {% endmacro %}""")
 
     def __init__(self, data, callback=None, options=None,
-                 name=None, overlay=True, control=True, show=True):
+                 name=None, overlay=True, control=True, show=True,
+                 precision=6):
         super(FastMarkerCluster, self).__init__(name=name, overlay=overlay,
                                                 control=control, show=show,
                                                 options=options)
         self._name = 'FastMarkerCluster'
-        self._data = _validate_coordinates(data)
+        self._coordinates, self._extras = _split_coordinate_columns(data)
+        self.precision = precision
 
         if callback is None:
             self._callback = """
@@ -80,3 +101,22 @@ class FastMarkerCluster(MarkerCluster):
                 };"""
         else:
             self._callback = 'var callback = {};'.format(callback)
+
+    @property
+    def encoded_coordinates(self):
+        return _delta_encode(self._coordinates, self.precision)
+
+    @property
+    def extras(self):
+        return 'null' if self._extras is None else _to_json(self._extras)
+
+    def _get_self_bounds(self):
+        """
+        Computes the bounds of the object itself (not including it's children)
+        in the form [[lat_min, lon_min], [lat_max, lon_max]].
+
+        """
+        if not len(self._coordinates):
+            return [[None, None], [None, None]]
+        return [self._coordinates.min(axis=0).tolist(),
+                self._coordinates.max(axis=0).tolist()]
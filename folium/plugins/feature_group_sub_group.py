@@ -4,10 +4,9 @@ from __future__ import (absolute_import, division, print_function)
 
 from branca.element import Figure, JavascriptLink
 
+from folium.elements import Template
 from folium.map import Layer
 
-from jinja2 import Template
-
 
 class FeatureGroupSubGroup(Layer):
     """
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+Lazy loading of the frames of time-dimension layers, in chunks of frames
+that are either embedded as inline JSON script tags, or written to sidecar
+JSON files fetched on demand.
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import io
+import os
+
+from branca.element import Figure
+
+from folium.elements import Element, StaticElement, Template
+from folium.utilities import _to_json
+
+from six import text_type
+
+
+_loader_script = u"""
+<script>
+    var FoliumFrameChunks = function(source, nChunks) {
+        this.source = source;
+        this.nChunks = nChunks;
+        this.cache = {};
+        this.pending = {};
+    };
+    FoliumFrameChunks.prototype.load = function(k, callback) {
+        if (k < 0 || k >= this.nChunks) {
+            return;
+        }
+        if (k in this.cache) {
+            if (callback) { callback(this.cache[k]); }
+            return;
+        }
+        if (k in this.pending) {
+            if (callback) { this.pending[k].push(callback); }
+            return;
+        }
+        var self = this;
+        var waiting = this.pending[k] = callback ? [callback] : [];
+        var done = function(chunk) {
+            self.cache[k] = chunk;
+            delete self.pending[k];
+            for (var i = 0; i < waiting.length; i++) {
+                waiting[i](chunk);
+            }
+        };
+        if (this.source.inline) {
+            // The script tags are only parsed when the chunk is needed.
+            setTimeout(function() {
+                var tag = document.getElementById(self.source.prefix + k);
+                done(JSON.parse(tag.textContent));
+            }, 0);
+        } else {
+            fetch(this.source.prefix + k + '.json')
+                .then(function(response) { return response.json(); })
+                .then(done);
+        }
+    };
+    // Loads chunk k, and prefetches the next one.
+    FoliumFrameChunks.prototype.get = function(k, callback) {
+        this.load(k, callback);
+        this.load(k + 1);
+    };
+</script>
+"""
+
+
+class FrameChunks(object):
+    """
+    Splits the frames of a layer into chunks that are loaded on demand.
+
+    The ids of the script tags and the names of the sidecar files are built
+    from the name of the layer, given when the chunks are rendered, so that
+    they follow the renames of the layer.
+
+    Parameters
+    ----------
+    chunks: list
+        The JSON serializable payload of each chunk.
+    path: str, default None
+        If None, the chunks are embedded in the page as
+        `<script type="application/json">` tags, which are only parsed when
+        needed and also work when the page is opened from `file://`.
+        Otherwise, the chunks are written as JSON files in this directory
+        when the map is saved with `Map.save`, and fetched by the browser
+        from the same path, relative to the page. It must be a relative
+        path. The other renders, which do not know where the page goes,
+        embed the chunks.
+
+    """
+    def __init__(self, chunks, path=None):
+        if path is not None and os.path.isabs(path):
+            raise ValueError('The path of the chunks must be relative to the '
+                             'page, got {!r}.'.format(path))
+        self.chunks = chunks
+        self.path = path
+
+    def _inline(self, output_dir):
+        """Whether the chunks are embedded in a page saved in
+        `output_dir`, None if the page is not saved to a file."""
+        return self.path is None or output_dir is None
+
+    def prefix(self, name, output_dir=None):
+        """Prefix of the ids or the URLs of the chunks of layer `name`."""
+        if self._inline(output_dir):
+            return name + '_chunk_'
+        return '/'.join([self.path.rstrip('/\\').replace(os.sep, '/'),
+                         name + '_chunk_'])
+
+    def js_loader(self, name, output_dir=None):
+        """JavaScript expression creating the loader of the chunks of
+        layer `name`, in a page saved in `output_dir`."""
+        source = {'inline': self._inline(output_dir),
+                  'prefix': self.prefix(name, output_dir)}
+        return 'new FoliumFrameChunks({}, {})'.format(_to_json(source),
+                                                      len(self.chunks))
+
+    def render(self, figure, name, output_dir=None):
+        """Adds the loader script and the inline chunks of layer `name` to
+        the figure, or writes the sidecar files next to the page, saved in
+        `output_dir`."""
+        assert isinstance(figure, Figure), ('You cannot render this Element '
+                                            'if it is not in a Figure.')
+        figure.header.add_child(StaticElement(_loader_script),
+                                name='folium_frame_chunks')
+        inline = self._inline(output_dir)
+        if not inline:
+            directory = os.path.join(output_dir, self.path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+        for k, chunk in enumerate(self.chunks):
+            # Keyed by the chunks rather than by the name of the layer, so
+            # that rendering with other names replaces the tags.
+            key = 'chunk_{}_{}'.format(id(self), k)
+            if inline:
+                figure.html.add_child(
+                    _InlineChunk(self.prefix(name) + str(k), chunk),
+                    name=key)
+            else:
+                figure.html._children.pop(key, None)
+                filename = os.path.join(directory,
+                                        '{}_chunk_{}.json'.format(name, k))
+                with io.open(filename, 'w', encoding='utf-8') as f:
+                    f.write(text_type(_to_json(chunk)))
+
+
+class _InlineChunk(Element):
+    """A chunk embedded in a JSON script tag."""
+    _template = Template(u'<script type="application/json" id="{{ this.chunk_id }}">'
+                         u'{{ this.payload }}</script>')
+
+    def __init__(self, chunk_id, chunk):
+        super(_InlineChunk, self).__init__()
+        self.chunk_id = chunk_id
+        self.payload = _to_json(chunk)
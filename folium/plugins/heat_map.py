@@ -6,13 +6,84 @@ import json
 
 from branca.element import Figure, JavascriptLink
 
+from folium.elements import SharedDataMixin, Template
 from folium.map import Layer
-from folium.utilities import _isnan, _iter_tolist, none_max, none_min
+from folium.utilities import (
+    _encode_numbers,
+    _validate_coordinate_array,
+    _web_mercator,
+    _web_mercator_inverse,
+)
 
-from jinja2 import Template
+import numpy as np
 
 
-class HeatMap(Layer):
+def _hex_cells(x, y, size):
+    """Returns the axial coordinates (q, r) of the pointy-top hexagons of
+    circumradius `size` containing the points (x, y)."""
+    q = (np.sqrt(3) / 3 * x - y / 3) / size
+    r = 2 / 3 * y / size
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+
+def aggregate_points(data, zoom, bin_size=5, shape='square'):
+    """
+    Bins heat map points on a square or hexagonal grid and returns one
+    point per non-empty bin, at the weighted centroid of its points, with
+    the sum of their weights.
+
+    Parameters
+    ----------
+    data: array of shape (n, 2) or (n, 3)
+        Points of the form [lat, lng] or [lat, lng, weight].
+    zoom: int
+        Zoom level at which the bins are `bin_size` pixels wide.
+    bin_size: float, default 5
+        Size of the bins, in pixels at `zoom`.
+    shape: {'square', 'hex'}, default 'square'
+        Shape of the bins.
+
+    Returns
+    -------
+    Array of shape (m, 3) of points [lat, lng, weight].
+
+    """
+    if shape not in ('square', 'hex'):
+        raise ValueError("shape should be 'square' or 'hex', "
+                         "got {!r}.".format(shape))
+    data = np.asarray(data, dtype=float)
+    if not len(data):
+        return np.empty((0, 3))
+    weights = data[:, 2] if data.shape[1] > 2 else np.ones(len(data))
+    x, y = _web_mercator(data)
+    cell = bin_size / (256. * 2 ** zoom)
+    if shape == 'square':
+        i = np.floor(x / cell).astype(np.int64)
+        j = np.floor(y / cell).astype(np.int64)
+    else:
+        i, j = _hex_cells(x, y, cell / np.sqrt(3))
+    keys = (i - i.min()) * (j.max() - j.min() + 1) + (j - j.min())
+    _, inverse = np.unique(keys, return_inverse=True)
+    inverse = inverse.ravel()
+    total = np.bincount(inverse, weights)
+    # Bins are placed at the centroid of their points, weighted by the
+    # absolute weights, or unweighted if these are all zero.
+    w = np.abs(weights)
+    w = np.where((np.bincount(inverse, w) == 0)[inverse], 1., w)
+    norm = np.bincount(inverse, w)
+    locations = _web_mercator_inverse(np.bincount(inverse, w * x) / norm,
+                                      np.bincount(inverse, w * y) / norm)
+    return np.column_stack([locations, total])
+
+
+class HeatMap(SharedDataMixin, Layer):
     """
     Create a Heatmap layer
 
@@ -20,7 +91,8 @@ class HeatMap(Layer):
     ----------
     data : list of points of the form [lat, lng] or [lat, lng, weight]
         The points you want to plot.
-        You can also provide a numpy.array of shape (n,2) or (n,3).
+        You can also provide a numpy.array or a DataFrame of shape
+        (n,2) or (n,3).
     name : string, default None
         The name of the Layer, as it will appear in LayerControls.
     min_opacity  : default 1.
@@ -42,11 +114,29 @@ class HeatMap(Layer):
         Whether the Layer will be included in LayerControls.
     show: bool, default True
         Whether the layer will be shown on opening (only for overlays).
+    precision: int, default 6
+        Number of decimals the coordinates are rounded to.
+    aggregate: {None, 'square', 'hex'}, default None
+        If given, the points are summed into bins of this shape before
+        being embedded, see `aggregate_points`. The bins are a quarter
+        of `radius + blur` wide at `aggregate_zoom`, below the size of
+        the grid Leaflet.heat sums the points on, so that the heat map
+        looks the same up to that zoom level.
+    aggregate_zoom: int, default None
+        Zoom level up to which aggregation must not be visible,
+        `max_zoom` by default.
     """
     _template = Template(u"""
         {% macro script(this, kwargs) %}
             var {{this.get_name()}} = L.heatLayer(
-                {{this.data}},
+                (function(flat, stride) {
+                    var points = new Array(flat.length / stride);
+                    for (var i = 0; i < points.length; i++) {
+                        points[i] = flat.slice(stride * i, stride * (i + 1));
+                    }
+                    return points;
+                })({% if this.data_var %}{{ this.data_var }}{% else %}{{ this.encoded_data }}{% endif %},
+                   {{ this.data.shape[1] }}),
                 {
                     minOpacity: {{this.min_opacity}},
                     maxZoom: {{this.max_zoom}},
@@ -61,15 +151,24 @@ class HeatMap(Layer):
 
     def __init__(self, data, name=None, min_opacity=0.5, max_zoom=18,
                  max_val=1.0, radius=25, blur=15, gradient=None,
-                 overlay=True, control=True, show=True):
+                 overlay=True, control=True, show=True, precision=6,
+                 aggregate=None, aggregate_zoom=None):
         super(HeatMap, self).__init__(name=name, overlay=overlay,
                                       control=control, show=show)
-        data = _iter_tolist(data)
-        if _isnan(data):
-            raise ValueError('data cannot contain NaNs, '
-                             'got:\n{!r}'.format(data))
         self._name = 'HeatMap'
-        self.data = [[x for x in line] for line in data]
+        self.data = _validate_coordinate_array(
+            data if len(data) else np.empty((0, 2)), name='data')
+        if self.data.shape[1] > 3:
+            raise ValueError('data must have shape (n, 2) or (n, 3), '
+                             'got {}.'.format(self.data.shape))
+        self.precision = precision
+        if aggregate is not None:
+            self.data = aggregate_points(
+                self.data,
+                zoom=max_zoom if aggregate_zoom is None else aggregate_zoom,
+                bin_size=(radius + blur) / 4.,
+                shape=aggregate,
+            )
         self.min_opacity = min_opacity
         self.max_zoom = max_zoom
         self.max_val = max_val
@@ -78,7 +177,17 @@ class HeatMap(Layer):
         self.gradient = (json.dumps(gradient, sort_keys=True) if
                          gradient is not None else 'null')
 
+    @property
+    def encoded_data(self):
+        data = self.data.copy()
+        data[:, :2] = np.round(data[:, :2], self.precision)
+        return _encode_numbers(data)
+
+    def _data_json(self):
+        return self.encoded_data
+
     def render(self, **kwargs):
+        self._declare_data()
         super(HeatMap, self).render(**kwargs)
 
         figure = self.get_root()
@@ -95,16 +204,7 @@ class HeatMap(Layer):
         in the form [[lat_min, lon_min], [lat_max, lon_max]].
 
         """
-        bounds = [[None, None], [None, None]]
-        for point in self.data:
-            bounds = [
-                [
-                    none_min(bounds[0][0], point[0]),
-                    none_min(bounds[0][1], point[1]),
-                ],
-                [
-                    none_max(bounds[1][0], point[0]),
-                    none_max(bounds[1][1], point[1]),
-                ],
-            ]
-        return bounds
+        if not len(self.data):
+            return [[None, None], [None, None]]
+        return [self.data[:, :2].min(axis=0).tolist(),
+                self.data[:, :2].max(axis=0).tolist()]
@@ -1,11 +1,75 @@
 # -*- coding: utf-8 -*-
 
-from branca.element import CssLink, Element, Figure, JavascriptLink
+from branca.element import CssLink, Figure, JavascriptLink
 
+from folium.elements import StaticElement, Template
 from folium.map import Layer
-from folium.utilities import none_max, none_min
+from folium.plugins.frame_chunks import FrameChunks
+from folium.plugins.heat_map import aggregate_points
+from folium.utilities import _as_float_array, _encode_numbers, _to_json
 
-from jinja2 import Template
+import numpy as np
+
+
+def _encode_frames(frames, precision=6):
+    """
+    Splits the points of all the time steps into a table of the distinct
+    coordinates, rounded to `precision` decimals, and for every point the
+    index of its coordinates in that table and its weight.
+
+    Returns the table as an array of shape (m, 2), the offsets delimiting
+    the points of each frame, the indices and the weights, or None if no
+    point has a weight.
+
+    """
+    arrays = [_as_float_array(frame) for frame in frames]
+    arrays = [arr.reshape(-1, 2) if not arr.size else arr for arr in arrays]
+    for arr in arrays:
+        if arr.ndim != 2 or arr.shape[1] not in (2, 3):
+            raise ValueError('Each time step should be a list of points of '
+                             'the form [lat, lng] or [lat, lng, weight].')
+    counts = [len(arr) for arr in arrays]
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(int)
+    if any(arr.shape[1] > 2 for arr in arrays):
+        weights = np.concatenate(
+            [arr[:, 2] if arr.shape[1] > 2 else np.ones(len(arr))
+             for arr in arrays])
+    else:
+        weights = None
+    points = np.concatenate([arr[:, :2] for arr in arrays]
+                            ) if arrays else np.empty((0, 2))
+    quantized = np.round(points * 10 ** precision).astype(np.int64)
+    low = quantized.min(axis=0) if len(quantized) else np.zeros(2, np.int64)
+    span = quantized.max(axis=0) - low + 1 if len(quantized) else low + 1
+    if float(span[0]) * float(span[1]) < 2 ** 62:
+        # One integer key per point is much faster than np.unique(axis=0).
+        keys = (quantized[:, 0] - low[0]) * span[1] + (quantized[:, 1] - low[1])
+        keys, indices = np.unique(keys, return_inverse=True)
+        table = np.column_stack([keys // span[1] + low[0],
+                                 keys % span[1] + low[1]])
+    else:
+        table, indices = np.unique(quantized, axis=0, return_inverse=True)
+    return table / 10. ** precision, offsets, indices.ravel(), weights
+
+
+def _chunk_frames(offsets, indices, weights, frames_per_chunk):
+    """
+    Splits encoded frames into chunks of `frames_per_chunk` time steps, each
+    with its own offsets, starting at 0, and its slice of the indices and
+    weights.
+
+    """
+    chunks = []
+    n_frames = len(offsets) - 1
+    for first in range(0, n_frames, frames_per_chunk):
+        last = min(first + frames_per_chunk, n_frames)
+        start, end = offsets[first], offsets[last]
+        chunks.append({
+            'offsets': (offsets[first:last + 1] - start).tolist(),
+            'indices': indices[start:end].tolist(),
+            'weights': None if weights is None else weights[start:end].tolist(),
+        })
+    return chunks
 
 
 class HeatMapWithTime(Layer):
@@ -17,7 +81,9 @@ class HeatMapWithTime(Layer):
     data: list of list of points of the form [lat, lng] or [lat, lng, weight]
         The points you want to plot. The outer list corresponds to the various time
         steps in sequential order. (weight is in (0, 1] range and defaults to 1 if
-        not specified for a point)
+        not specified for a point). Each time step can also be an array of
+        shape (n, 2) or (n, 3). The distinct coordinates are embedded only once,
+        and each time step as indices into them.
     index: Index giving the label (or timestamp) of the elements of data. Should have
         the same length as data, or is replaced by a simple count if not specified.
     name : string, default None
@@ -56,6 +122,25 @@ class HeatMapWithTime(Layer):
         Whether the Layer will be included in LayerControls.
     show: bool, default True
         Whether the layer will be shown on opening (only for overlays).
+    aggregate: {None, 'square', 'hex'}, default None
+        If given, the points of each time step are summed into bins of
+        this shape, half of `radius` wide at `aggregate_zoom`, before
+        being embedded. See `folium.plugins.heat_map.aggregate_points`.
+    aggregate_zoom: int, default 18
+        Zoom level up to which aggregation must not be visible.
+    precision: int, default 6
+        Number of decimals the coordinates are rounded to.
+    frames_per_chunk: int, default None
+        If given, the time steps are not embedded in the map script but
+        split into chunks of this many time steps, which are only loaded
+        when the time control reaches them, the next chunk being
+        prefetched. The table of distinct coordinates is still embedded.
+    chunk_path: str, default None
+        Directory, relative to the saved page, where the chunks are written
+        as JSON files by `Map.save`. By default, and when the map is
+        rendered otherwise, they are embedded in the page as JSON script
+        tags that are only parsed when needed, which also works for pages
+        opened from the file system.
 
     """
     _template = Template(u"""
@@ -89,7 +174,17 @@ class HeatMapWithTime(Layer):
                 })
                 .addTo({{this._parent.get_name()}});
 
-                var {{this.get_name()}} = new TDHeatmap({{this.data}},
+                var {{this.get_name()}} = new TDHeatmap({
+                    coordinates: {{ this.encoded_coordinates }},
+                    {% if this.frame_chunks %}
+                    chunks: {{ this.frame_chunks.js_loader(this.get_name(), kwargs.get('output_dir')) }},
+                    framesPerChunk: {{ this.frames_per_chunk }}
+                    {% else %}
+                    offsets: {{ this.encoded_offsets }},
+                    indices: {{ this.encoded_indices }},
+                    weights: {{ this.encoded_weights }}
+                    {% endif %}
+                },
                 {heatmapOptions: {
                         radius: {{this.radius}},
                         minOpacity: {{this.min_opacity}},
@@ -110,19 +205,39 @@ class HeatMapWithTime(Layer):
                  use_local_extrema=False, auto_play=False,
                  display_index=True, index_steps=1, min_speed=0.1,
                  max_speed=10, speed_step=0.1, position='bottomleft',
-                 overlay=True, control=True, show=True):
+                 overlay=True, control=True, show=True, aggregate=None,
+                 aggregate_zoom=18, precision=6, frames_per_chunk=None,
+                 chunk_path=None):
         super(HeatMapWithTime, self).__init__(name=name, overlay=overlay,
                                               control=control, show=show)
         self._name = 'HeatMap'
-        self._control_name = self.get_name() + 'Control'
 
         # Input data.
-        self.data = data
+        if aggregate is not None:
+            data = [aggregate_points(np.asarray(frame, dtype=float),
+                                     zoom=aggregate_zoom,
+                                     bin_size=radius / 2.,
+                                     shape=aggregate).tolist()
+                    for frame in data]
+        self.precision = precision
+        self.coordinates, self.offsets, self.indices, self.weights = (
+            _encode_frames(data, precision))
         self.index = index if index is not None else [str(i) for i in
                                                       range(1, len(data)+1)]
-        if len(self.data) != len(self.index):
+        if len(data) != len(self.index):
             raise ValueError('Input data and index are not of compatible lengths.')  # noqa
         self.times = list(range(1, len(data)+1))
+        self.frames_per_chunk = frames_per_chunk
+        if frames_per_chunk is not None:
+            if int(frames_per_chunk) < 1:
+                raise ValueError('frames_per_chunk should be a positive '
+                                 'integer, got {!r}.'.format(frames_per_chunk))
+            self.frame_chunks = FrameChunks(
+                _chunk_frames(self.offsets, self.indices, self.weights,
+                              int(frames_per_chunk)),
+                path=chunk_path)
+        else:
+            self.frame_chunks = None
 
         # Heatmap settings.
         self.radius = radius
@@ -154,6 +269,35 @@ class HeatMapWithTime(Layer):
         self.time_slider_drap_update = 'false'
         self.style_NS = 'leaflet-control-timecontrol'
 
+    @property
+    def data(self):
+        """The points of each time step, rebuilt from the encoded form."""
+        points = self.coordinates[self.indices]
+        if self.weights is not None:
+            points = np.column_stack([points, self.weights])
+        return [points[start:end].tolist() for start, end in
+                zip(self.offsets[:-1], self.offsets[1:])]
+
+    @property
+    def encoded_coordinates(self):
+        return _encode_numbers(self.coordinates)
+
+    @property
+    def encoded_offsets(self):
+        return _to_json(self.offsets)
+
+    @property
+    def encoded_indices(self):
+        return _to_json(self.indices)
+
+    @property
+    def encoded_weights(self):
+        return 'null' if self.weights is None else _to_json(self.weights)
+
+    @property
+    def _control_name(self):
+        return self.get_name() + 'Control'
+
     def render(self, **kwargs):
         super(HeatMapWithTime, self).render(**kwargs)
 
@@ -179,7 +323,7 @@ class HeatMapWithTime(Layer):
             name='leaflet.timedimension.control.min.css')
 
         figure.header.add_child(
-            Element(
+            StaticElement(
                 """
             <script>
                 var TDHeatmap = L.TimeDimension.Layer.extend({
@@ -224,14 +368,27 @@ class HeatMapWithTime(Layer):
                 return true;
             },
             _getDataForTime: function(time) {
+                    var data = this.data;
+                    if (!data.chunks) {
+                        this._setDataForTime(time, data, time-1);
+                        return;
+                    }
+                    var self = this;
+                    var k = Math.floor((time-1) / data.framesPerChunk);
+                    data.chunks.get(k, function(chunk) {
+                        self._setDataForTime(time, chunk, time-1 - k*data.framesPerChunk);
+                    });
+                },
+            _setDataForTime: function(time, frames, frame) {
                     delete this._currentTimeData.data;
                     this._currentTimeData.data = [];
-                    var data = this.data[time-1];
-                    for (var i = 0; i < data.length; i++) {
+                    var coordinates = this.data.coordinates;
+                    for (var i = frames.offsets[frame]; i < frames.offsets[frame+1]; i++) {
+                        var j = frames.indices[i];
                         this._currentTimeData.data.push({
-                                lat: data[i][0],
-                                lng: data[i][1],
-                                count: data[i].length>2 ? data[i][2] : this.defaultWeight
+                                lat: coordinates[2*j],
+                                lng: coordinates[2*j+1],
+                                count: frames.weights ? frames.weights[i] : this.defaultWeight
                             });
                         }
                     this._currentLoadedTime = time;
@@ -259,27 +416,22 @@ class HeatMapWithTime(Layer):
                 }
             });
             </script>
-                """,  # noqa
-                template_name='timeControlScript'
-            )
+                """  # noqa
+            ),
+            name='timeControlScript'
         )
 
+        if self.frame_chunks is not None:
+            self.frame_chunks.render(figure, self.get_name(),
+                                     kwargs.get('output_dir'))
+
     def _get_self_bounds(self):
         """
         Computes the bounds of the object itself (not including it's children)
         in the form [[lat_min, lon_min], [lat_max, lon_max]].
 
         """
-        bounds = [[None, None], [None, None]]
-        for point in self.data:
-            bounds = [
-                [
-                    none_min(bounds[0][0], point[0]),
-                    none_min(bounds[0][1], point[1]),
-                ],
-                [
-                    none_max(bounds[1][0], point[0]),
-                    none_max(bounds[1][1], point[1]),
-                ],
-            ]
-        return bounds
+        if not len(self.coordinates):
+            return [[None, None], [None, None]]
+        return [self.coordinates.min(axis=0).tolist(),
+                self.coordinates.max(axis=0).tolist()]
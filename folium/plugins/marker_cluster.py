@@ -3,12 +3,17 @@
 from __future__ import absolute_import, division, print_function
 
 import json
+import re
 
 from branca.element import CssLink, Figure, JavascriptLink
 
+from folium.elements import Template
+from folium.features import DivIcon
 from folium.map import Icon, Layer, Marker, Popup
+from folium.plugins.bulk_markers import _codes_to_json, _encode_column, _encode_icons
+from folium.utilities import _delta_encode, _split_coordinate_columns, _to_json
 
-from jinja2 import Template
+from six import text_type
 
 
 class MarkerCluster(Layer):
@@ -21,8 +26,12 @@ class MarkerCluster(Layer):
         Data points of the form [[lat, lng]].
     popups: list of length n, default None
         Popup for each marker, either a Popup object or a string or None.
-    icons: list of length n, default None
+        With a shared icon, only strings, the HTML of the popups.
+    icons: list of length n or Icon, default None
         Icon for each marker, either an Icon object or a string or None.
+        A single Icon, CustomIcon or DivIcon is declared once and shared
+        by all markers. With a popup template, only icon objects or None,
+        each distinct icon being declared once.
     name : string, default None
         The name of the Layer, as it will appear in LayerControls
     overlay : bool, default True
@@ -37,6 +46,16 @@ class MarkerCluster(Layer):
     options : dict, default None
         A dictionary with options for Leaflet.markercluster. See
         https://github.com/Leaflet/Leaflet.markercluster for options.
+    popup_template: str, default None
+        HTML of the popups with {column} placeholders, filled in by the
+        browser from `popup_data` when a popup is opened.
+    popup_data: DataFrame, dict of lists or list of dicts, default None
+        The values of the placeholders of `popup_template` for each marker.
+        It must have a column for every placeholder.
+
+    With a shared icon or a popup template, the markers are not created
+    as Marker, Popup and Icon objects: the locations and popup data are
+    kept as columns and turned into markers by a single JavaScript loop.
 
     Example
     -------
@@ -48,6 +67,10 @@ class MarkerCluster(Layer):
     ...     }
     ... '''
 
+    >>> MarkerCluster(df[['lat', 'lng']], icons=folium.Icon(color='red'),
+    ...               popup_template='<b>{name}</b><br>{population}',
+    ...               popup_data=df[['name', 'population']])
+
     """
     _template = Template(u"""
             {% macro script(this, kwargs) %}
@@ -56,18 +79,75 @@ class MarkerCluster(Layer):
             {{ this.get_name() }}.options.iconCreateFunction =
                 {{ this.icon_create_function.strip() }};
             {%- endif %}
+            {%- if this._bulk %}
+            (function(){
+                var bytes = atob({{ this.encoded_locations|tojson }});
+                var view = new Uint8Array(bytes.length);
+                for (var i = 0; i < bytes.length; i++) {
+                    view[i] = bytes.charCodeAt(i);
+                }
+                var deltas = new Int32Array(view.buffer);
+                var scale = {{ 10 ** this.precision }};
+                var popups = {{ this.popups }};
+                var popupCodes = {{ this.popup_codes }};
+                var popupTemplate = {{ this.popup_template|tojson }};
+                var popupData = {{ this.popup_data }};
+                var icons = [{{ this._icons|join(', ') }}];
+                var iconCodes = {{ this.icon_codes }};
+                var markers = [];
+
+                function row(i) {
+                    var values = {};
+                    for (var key in popupData) {
+                        values[key] = popupData[key][i];
+                    }
+                    return values;
+                }
+
+                var lat = 0, lng = 0;
+                for (var i = 0; i < deltas.length / 2; i++) {
+                    lat += deltas[2 * i];
+                    lng += deltas[2 * i + 1];
+                    var iconCode = iconCodes ? iconCodes[i] : 0;
+                    var marker = L.marker(
+                        [lat / scale, lng / scale],
+                        {icon: iconCode >= 0 && icons.length ?
+                            icons[iconCode] : new L.Icon.Default()});
+                    if (popupTemplate) {
+                        marker.bindPopup((function(i) {
+                            return function() {
+                                return L.Util.template(popupTemplate, row(i));
+                            };
+                        })(i));
+                    } else {
+                        var code = popupCodes ? popupCodes[i] : 0;
+                        if (code >= 0 && popups.length) {
+                            marker.bindPopup(popups[code]);
+                        }
+                    }
+                    markers.push(marker);
+                }
+                {{ this.get_name() }}.addLayers(markers);
+            })();
+            {%- endif %}
             {{this._parent.get_name()}}.addLayer({{this.get_name()}});
             {% endmacro %}
             """)
 
     def __init__(self, locations=None, popups=None, icons=None, name=None,
                  overlay=True, control=True, show=True,
-                 icon_create_function=None, options=None):
+                 icon_create_function=None, options=None,
+                 popup_template=None, popup_data=None, precision=6):
         super(MarkerCluster, self).__init__(name=name, overlay=overlay,
                                             control=control, show=show)
         self._name = 'MarkerCluster'
 
-        if locations is not None:
+        self._bulk = locations is not None and (
+            isinstance(icons, (Icon, DivIcon)) or popup_template is not None)
+        if self._bulk:
+            self._set_columns(locations, popups, icons, popup_template,
+                              popup_data, precision)
+        elif locations is not None:
             if popups is None:
                 popups = [None] * len(locations)
             if icons is None:
@@ -83,11 +163,79 @@ class MarkerCluster(Layer):
             assert isinstance(icon_create_function, str)
         self.icon_create_function = icon_create_function
 
+    def _set_columns(self, locations, popups, icons, popup_template,
+                     popup_data, precision):
+        """Stores the markers as columns instead of Marker objects."""
+        self.locations, _ = _split_coordinate_columns(locations,
+                                                      name='locations')
+        n = len(self.locations)
+        self.precision = precision
+        self._icons, self._icon_codes = _encode_icons(icons, n)
+        self.popup_template = popup_template
+        if popup_template is not None and popups is not None:
+            raise ValueError('Use either popups or popup_template, not both.')
+        if popups is not None and any(isinstance(popup, Popup)
+                                      for popup in popups):
+            raise ValueError('With a shared icon, popups must be the HTML '
+                             'strings of the popups, not Popup objects.')
+        self._popups, self._popup_codes = _encode_column(popups, n, 'popups')
+        if hasattr(popup_data, 'iloc'):
+            popup_data = {key: popup_data[key].tolist() for key in popup_data}
+        elif isinstance(popup_data, (list, tuple)):
+            keys = sorted(set(key for item in popup_data for key in item))
+            popup_data = {key: [item.get(key) for item in popup_data]
+                          for key in keys}
+        popup_data = {text_type(key): list(values)
+                      for key, values in (popup_data or {}).items()}
+        if any(len(values) != n for values in popup_data.values()):
+            raise ValueError('popup_data must have the same length as '
+                             'locations.')
+        if popup_template is not None:
+            # Same placeholders as L.Util.template, which throws on a
+            # missing value.
+            keys = set(re.findall(r'\{ *([\w_ -]+) *\}', popup_template))
+            missing = sorted(keys.difference(popup_data))
+            if missing:
+                raise ValueError('popup_data is missing the columns {} of '
+                                 'popup_template.'.format(missing))
+        self._popup_data = popup_data
+
+    @property
+    def encoded_locations(self):
+        return _delta_encode(self.locations, self.precision)
+
+    @property
+    def popups(self):
+        return _to_json(self._popups)
+
+    @property
+    def popup_codes(self):
+        return _codes_to_json(self._popup_codes)
+
+    @property
+    def icon_codes(self):
+        return _codes_to_json(self._icon_codes)
+
+    @property
+    def popup_data(self):
+        return _to_json(self._popup_data)
+
     @staticmethod
     def _validate(obj, cls):
         """Check whether the given object is from the given class or is None."""
         return True if obj is None or isinstance(obj, cls) else False
 
+    def _get_self_bounds(self):
+        """
+        Computes the bounds of the markers stored as columns, in the form
+        [[lat_min, lon_min], [lat_max, lon_max]].
+
+        """
+        if not self._bulk or not len(self.locations):
+            return [[None, None], [None, None]]
+        return [self.locations.min(axis=0).tolist(),
+                self.locations.max(axis=0).tolist()]
+
     def render(self, **kwargs):
         super(MarkerCluster, self).render(**kwargs)
 
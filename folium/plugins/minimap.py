@@ -4,12 +4,11 @@ from __future__ import (absolute_import, division, print_function)
 
 import json
 
-from branca.element import CssLink, Figure, JavascriptLink, MacroElement
+from branca.element import CssLink, Figure, JavascriptLink
 
+from folium.elements import MacroElement, Template
 from folium.raster_layers import TileLayer
 
-from jinja2 import Template
-
 
 class MiniMap(MacroElement):
     """Add a minimap (locator) to an existing map.
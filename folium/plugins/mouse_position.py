@@ -4,9 +4,9 @@ from __future__ import (absolute_import, division, print_function)
 
 import json
 
-from branca.element import CssLink, Figure, JavascriptLink, MacroElement
+from branca.element import CssLink, Figure, JavascriptLink
 
-from jinja2 import Template
+from folium.elements import MacroElement, Template
 
 
 class MousePosition(MacroElement):
@@ -0,0 +1,448 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import (absolute_import, division, print_function)
+
+import base64
+
+from branca.element import CssLink, Figure
+
+from folium.elements import Template
+from folium.map import Layer
+from folium.plugins.bulk_markers import _codes_to_json, _encode_column
+from folium.plugins.frame_chunks import FrameChunks
+from folium.utilities import (
+    _split_coordinate_columns,
+    _to_json,
+    _web_mercator,
+    _web_mercator_inverse,
+)
+
+import numpy as np
+
+
+def _int32_encode(values):
+    """Base64 string of the values as little-endian Int32."""
+    values = np.asarray(values)
+    return base64.b64encode(values.astype('<i4').tobytes()).decode('ascii')
+
+
+class ClusterIndex(object):
+    """
+    Hierarchical clustering of points for every zoom level, computed in
+    NumPy in the spirit of the supercluster library.
+
+    Starting from the points at `max_zoom`, and for each zoom level down
+    to `min_zoom`, the clusters of the level above are merged on a grid
+    of `radius` pixels and replaced by their weighted centroid. Each
+    level is built from the previous one with a handful of vectorized
+    operations, which scales to tens of millions of points.
+
+    Parameters
+    ----------
+    locations: list of list, array of shape (n, 2) or DataFrame
+        Data points of the form [[lat, lng]].
+    radius: int, default 60
+        Cluster radius, in pixels.
+    min_zoom: int, default 0
+        Lowest zoom level at which clusters are computed.
+    max_zoom: int, default 16
+        Highest zoom level at which clusters are computed. Beyond it,
+        the points are shown individually.
+    extent: int, default 256
+        Tile size, in pixels.
+
+    Attributes
+    ----------
+    levels: dict
+        For each zoom level, a dict with the 'locations' of the clusters
+        as an array of shape (m, 2), their 'counts', their 'expansion_zoom'
+        (the zoom at which they split up), the index of one of their
+        points as 'leaf' and their 'parents' (the index of the cluster
+        they belong to one zoom level below, if any).
+    order: array
+        Permutation of the points grouping them by cluster at `max_zoom`.
+    offsets: array
+        The points of cluster i at `max_zoom` are at positions
+        offsets[i]:offsets[i + 1] of `order`.
+
+    Examples
+    --------
+    >>> index = ClusterIndex(df[['lat', 'lng']], radius=40, max_zoom=14)
+    >>> locations, counts = index.get_clusters(5)
+
+    """
+    def __init__(self, locations, radius=60, min_zoom=0, max_zoom=16,
+                 extent=256):
+        if not 0 <= min_zoom <= max_zoom:
+            raise ValueError('Expected 0 <= min_zoom <= max_zoom, got {} '
+                             'and {}.'.format(min_zoom, max_zoom))
+        self.locations, _ = _split_coordinate_columns(locations,
+                                                      name='locations')
+        self.radius = radius
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.extent = extent
+
+        x, y = _web_mercator(self.locations)
+        weights = np.ones(len(x))
+        expansion = np.full(len(x), max_zoom + 1)
+        self.levels = {}
+        for zoom in range(max_zoom, min_zoom - 1, -1):
+            x, y, weights, inverse = self._merge(x, y, weights, zoom)
+            if zoom == max_zoom:
+                self.order = np.argsort(inverse, kind='mergesort')
+                self.offsets = np.concatenate(
+                    [[0], np.cumsum(weights).astype(int)])
+                leaf = self.order[self.offsets[:-1]]
+            else:
+                self.levels[zoom + 1]['parents'] = inverse
+                leaf = self._any_child(inverse, leaf, len(x))
+            expansion = self._expansion_zoom(inverse, expansion, zoom,
+                                             len(x))
+            self.levels[zoom] = {
+                'locations': _web_mercator_inverse(x, y),
+                'counts': weights.astype(int),
+                'expansion_zoom': expansion,
+                'leaf': leaf,
+                'parents': None,
+            }
+
+    def _merge(self, x, y, weights, zoom):
+        """Merges the points falling in the same grid cell at `zoom`."""
+        cell = self.radius / (self.extent * 2. ** zoom)
+        n_cells = int(np.ceil(1. / cell)) + 1
+        keys = (np.floor(x / cell).astype(np.int64) * n_cells +
+                np.floor(y / cell).astype(np.int64))
+        _, inverse = np.unique(keys, return_inverse=True)
+        inverse = inverse.ravel()
+        merged = np.bincount(inverse, weights)
+        return (np.bincount(inverse, weights * x) / merged,
+                np.bincount(inverse, weights * y) / merged,
+                merged, inverse)
+
+    @staticmethod
+    def _any_child(inverse, values, n):
+        """Picks the value of one of the children of each of the n
+        clusters."""
+        picked = np.zeros(n, dtype=values.dtype)
+        picked[inverse] = values
+        return picked
+
+    def _expansion_zoom(self, inverse, child_expansion, zoom, n):
+        """Computes the zoom at which the clusters at `zoom` split up,
+        given the expansion zoom of their children."""
+        n_children = np.bincount(inverse, minlength=n)
+        return np.where(n_children > 1, zoom + 1,
+                        self._any_child(inverse, child_expansion, n))
+
+    def get_clusters(self, zoom):
+        """Returns the locations and the counts of the clusters at `zoom`."""
+        level = self.levels[min(max(zoom, self.min_zoom), self.max_zoom)]
+        return level['locations'], level['counts']
+
+    def get_leaves(self, zoom, cluster):
+        """Returns the indices of the points in cluster number `cluster`
+        at `zoom`."""
+        clusters = np.array([cluster])
+        for z in range(zoom, self.max_zoom):
+            parents = self.levels[z + 1]['parents']
+            clusters = np.flatnonzero(np.isin(parents, clusters))
+        return np.concatenate([
+            self.order[self.offsets[c]:self.offsets[c + 1]]
+            for c in clusters])
+
+
+class PreClusteredMarkers(Layer):
+    """
+    Display a very large number of markers as clusters computed in Python.
+
+    The clusters of every zoom level are computed ahead of time by a
+    `ClusterIndex`, so that the browser only draws the clusters in view
+    instead of clustering all the points itself. The points themselves
+    are split into chunks of neighbouring clusters, which are only loaded
+    once the map is zoomed in beyond `max_zoom` on one of their clusters.
+
+    Parameters
+    ----------
+    locations: list of list, array of shape (n, 2) or DataFrame
+        Data points of the form [[lat, lng]].
+    popups: list of length n or str, default None
+        HTML content of the popup of each marker, None for no popup.
+    radius: int, default 60
+        Cluster radius, in pixels.
+    min_zoom: int, default 0
+        Lowest zoom level at which clusters are computed.
+    max_zoom: int, default 16
+        Highest zoom level at which clusters are computed. Beyond it,
+        the points are shown individually.
+    precision: int, default 6
+        Number of decimals the coordinates are rounded to.
+    leaves_per_chunk: int, default 10000
+        Approximate number of points in each chunk.
+    chunk_path: str, default None
+        Directory, relative to the saved page, where the chunks are written
+        as JSON files by `Map.save`, so that the page does not hold the
+        points. By default, and when the map is rendered otherwise, they
+        are embedded in the page as JSON script tags that are only parsed
+        when needed.
+    name : string, default None
+        The name of the Layer, as it will appear in LayerControls.
+    overlay : bool, default True
+        Adds the layer as an optional overlay (True) or the base layer (False).
+    control : bool, default True
+        Whether the Layer will be included in LayerControls.
+    show: bool, default True
+        Whether the layer will be shown on opening (only for overlays).
+
+    Examples
+    --------
+    >>> PreClusteredMarkers(df[['lat', 'lng']], popups=df['name'],
+    ...                     max_zoom=14)
+
+    """
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                function decode(b64) {
+                    var bytes = atob(b64);
+                    var view = new Uint8Array(bytes.length);
+                    for (var i = 0; i < bytes.length; i++) {
+                        view[i] = bytes.charCodeAt(i);
+                    }
+                    return new Int32Array(view.buffer);
+                }
+                function clusterIcon(count) {
+                    var size = count < 10 ? 'small' :
+                        count < 100 ? 'medium' : 'large';
+                    var text = count < 1000 ? count :
+                        count < 1000000 ? Math.round(count / 1000) + 'k' :
+                        Math.round(count / 1000000) + 'M';
+                    return L.divIcon({
+                        html: '<div><span>' + text + '</span></div>',
+                        className: 'marker-cluster marker-cluster-' + size,
+                        iconSize: new L.Point(40, 40)
+                    });
+                }
+
+                var minZoom = {{ this.index.min_zoom }};
+                var maxZoom = {{ this.index.max_zoom }};
+                var scale = {{ 10 ** this.precision }};
+                var encodedLevels = {{ this.levels }};
+                var offsets = decode({{ this.offsets|tojson }});
+                var chunkStarts = decode({{ this.chunk_starts|tojson }});
+                var chunks = {{ this.frame_chunks.js_loader(this.get_name(), kwargs.get('output_dir')) }};
+                var popups = {{ this.popups }};
+                var popupCodes = {{ this.popup_codes }};
+                var levels = {}, leaves = {}, map = null;
+                var layer = L.layerGroup();
+
+                function getLevel(zoom) {
+                    if (!levels[zoom]) {
+                        var encoded = encodedLevels[zoom - minZoom];
+                        levels[zoom] = {
+                            coords: decode(encoded[0]),
+                            counts: decode(encoded[1]),
+                            expansion: decode(encoded[2]),
+                            leaf: decode(encoded[3])
+                        };
+                    }
+                    return levels[zoom];
+                }
+
+                // Returns the points of the chunk of a cluster at maxZoom,
+                // or null while the chunk is loading, redrawing once loaded.
+                function getLeaves(cluster) {
+                    var lo = 0, hi = chunkStarts.length - 1;
+                    while (lo < hi) {
+                        var mid = (lo + hi + 1) >> 1;
+                        if (chunkStarts[mid] <= cluster) {
+                            lo = mid;
+                        } else {
+                            hi = mid - 1;
+                        }
+                    }
+                    if (!leaves[lo]) {
+                        if (!(lo in chunks.cache)) {
+                            if (!(lo in chunks.pending)) {
+                                chunks.load(lo, function() {
+                                    if (map) { redraw(); }
+                                });
+                            }
+                            return null;
+                        }
+                        leaves[lo] = {
+                            start: offsets[chunkStarts[lo]],
+                            points: decode(chunks.cache[lo])
+                        };
+                    }
+                    return leaves[lo];
+                }
+
+                function addMarker(lat, lng, index) {
+                    var marker = L.marker([lat, lng]);
+                    var code = popupCodes ? popupCodes[index] : 0;
+                    if (code >= 0 && popups.length) {
+                        marker.bindPopup(popups[code]);
+                    }
+                    layer.addLayer(marker);
+                }
+
+                function redraw() {
+                    layer.clearLayers();
+                    var zoom = Math.round(map.getZoom());
+                    var bounds = map.getBounds().pad(0.2);
+                    var level = getLevel(
+                        Math.min(Math.max(zoom, minZoom), maxZoom));
+                    for (var i = 0; i < level.counts.length; i++) {
+                        var lat = level.coords[2 * i] / scale;
+                        var lng = level.coords[2 * i + 1] / scale;
+                        if (!bounds.contains([lat, lng])) {
+                            continue;
+                        }
+                        if (zoom > maxZoom) {
+                            var chunk = getLeaves(i);
+                            if (!chunk) {
+                                continue;
+                            }
+                            for (var j = offsets[i] - chunk.start;
+                                 j < offsets[i + 1] - chunk.start; j++) {
+                                addMarker(chunk.points[3 * j] / scale,
+                                          chunk.points[3 * j + 1] / scale,
+                                          chunk.points[3 * j + 2]);
+                            }
+                        } else if (level.counts[i] === 1) {
+                            addMarker(lat, lng, level.leaf[i]);
+                        } else {
+                            var cluster = L.marker([lat, lng], {
+                                icon: clusterIcon(level.counts[i])
+                            });
+                            cluster.on('click', (function(latlng, zoom) {
+                                return function() {
+                                    map.setView(latlng, zoom);
+                                };
+                            })([lat, lng], level.expansion[i]));
+                            layer.addLayer(cluster);
+                        }
+                    }
+                }
+
+                layer.on('add', function() {
+                    map = layer._map;
+                    map.on('moveend', redraw);
+                    redraw();
+                });
+                layer.on('remove', function() {
+                    map.off('moveend', redraw);
+                    map = null;
+                });
+                return layer.addTo({{ this._parent.get_name() }});
+            })();
+        {% endmacro %}
+        """)
+
+    def __init__(self, locations, popups=None, radius=60, min_zoom=0,
+                 max_zoom=16, precision=6, leaves_per_chunk=10000,
+                 chunk_path=None, name=None, overlay=True, control=True,
+                 show=True):
+        super(PreClusteredMarkers, self).__init__(name=name, overlay=overlay,
+                                                  control=control, show=show)
+        self._name = 'PreClusteredMarkers'
+        self.index = ClusterIndex(locations, radius=radius,
+                                  min_zoom=min_zoom, max_zoom=max_zoom)
+        self.precision = precision
+        n = len(self.index.locations)
+        self._popups, self._popup_codes = _encode_column(popups, n, 'popups')
+        if int(leaves_per_chunk) < 1:
+            raise ValueError('leaves_per_chunk should be a positive integer, '
+                             'got {!r}.'.format(leaves_per_chunk))
+        self._chunk_starts = self._split_chunks(int(leaves_per_chunk))
+        self.frame_chunks = FrameChunks(self.leaf_chunks(), path=chunk_path)
+
+    def _quantize(self, locations):
+        quantized = np.round(locations * 10 ** self.precision)
+        # Same limit as `_delta_encode`, the values are written as Int32.
+        if len(quantized) and np.abs(quantized).max() >= 2 ** 30:
+            raise ValueError('Values are too large to be encoded with a '
+                             'precision of {}.'.format(self.precision))
+        return quantized
+
+    @property
+    def levels(self):
+        index = self.index
+        return _to_json([
+            [_int32_encode(self._quantize(level['locations'])),
+             _int32_encode(level['counts']),
+             _int32_encode(level['expansion_zoom']),
+             _int32_encode(level['leaf'])]
+            for level in (index.levels[zoom] for zoom in
+                          range(index.min_zoom, index.max_zoom + 1))
+        ])
+
+    def _split_chunks(self, leaves_per_chunk):
+        """Returns the first cluster at `max_zoom` of each chunk: the
+        clusters are grouped in order, a chunk starting at the cluster
+        holding every `leaves_per_chunk`-th point."""
+        offsets = self.index.offsets
+        starts = np.searchsorted(
+            offsets, np.arange(0, offsets[-1], leaves_per_chunk),
+            side='right') - 1
+        return np.unique(np.concatenate([[0], starts]))
+
+    def leaf_chunks(self):
+        """Returns the points of each chunk, as base64 strings of
+        (latitude, longitude, index) triples."""
+        index = self.index
+        bounds = index.offsets[np.append(self._chunk_starts,
+                                         len(index.offsets) - 1)]
+        chunks = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            order = index.order[start:stop]
+            chunks.append(_int32_encode(np.column_stack([
+                self._quantize(index.locations[order]), order])))
+        return chunks
+
+    @property
+    def chunk_starts(self):
+        return _int32_encode(self._chunk_starts)
+
+    @property
+    def offsets(self):
+        return _int32_encode(self.index.offsets)
+
+    @property
+    def popups(self):
+        return _to_json(self._popups)
+
+    @property
+    def popup_codes(self):
+        return _codes_to_json(self._popup_codes)
+
+    def render(self, **kwargs):
+        super(PreClusteredMarkers, self).render(**kwargs)
+
+        figure = self.get_root()
+        assert isinstance(figure, Figure), ('You cannot render this Element '
+                                            'if it is not in a Figure.')
+
+        figure.header.add_child(
+            CssLink('https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.css'),  # noqa
+            name='markerclustercss')
+
+        figure.header.add_child(
+            CssLink('https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.Default.css'),  # noqa
+            name='markerclusterdefaultcss')
+
+        self.frame_chunks.render(figure, self.get_name(),
+                                 kwargs.get('output_dir'))
+
+    def _get_self_bounds(self):
+        """
+        Computes the bounds of the object itself (not including it's children)
+        in the form [[lat_min, lon_min], [lat_max, lon_max]].
+
+        """
+        locations = self.index.locations
+        if not len(locations):
+            return [[None, None], [None, None]]
+        return [locations.min(axis=0).tolist(),
+                locations.max(axis=0).tolist()]
@@ -2,9 +2,7 @@
 
 from __future__ import (absolute_import, division, print_function)
 
-from branca.element import MacroElement
-
-from jinja2 import Template
+from folium.elements import MacroElement, Template
 
 
 class ScrollZoomToggler(MacroElement):
@@ -6,10 +6,9 @@ import json
 
 from ..utilities import camelize
 
-from branca.element import CssLink, Figure, JavascriptLink, MacroElement
-
-from jinja2 import Template
+from branca.element import CssLink, Figure, JavascriptLink
 
+from folium.elements import MacroElement, Template
 from folium import Map
 
 from folium.features import FeatureGroup, GeoJson, TopoJson
@@ -2,9 +2,9 @@
 
 from __future__ import (absolute_import, division, print_function)
 
-from branca.element import Figure, JavascriptLink, MacroElement
+from branca.element import Figure, JavascriptLink
 
-from jinja2 import Template
+from folium.elements import MacroElement, Template
 
 
 class Terminator(MacroElement):
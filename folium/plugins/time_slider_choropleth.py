@@ -4,11 +4,52 @@ from __future__ import (absolute_import, division, print_function)
 
 import json
 
+from branca.colormap import StepColormap, linear
 from branca.element import Figure, JavascriptLink
 
+from folium.elements import Template
 from folium.features import GeoJson
+from folium.utilities import _to_json
 
-from jinja2 import Template
+import numpy as np
+
+
+def _palette_codes(values, colormap, n_colors=256):
+    """
+    Maps an array of values to indices into a palette of colors sampled
+    from `colormap`, in a vectorized way. NaNs get the index -1.
+
+    A StepColormap gives one color per step, any other colormap is sampled
+    at `n_colors` evenly spaced values between its vmin and vmax.
+
+    Returns the palette and the array of indices.
+
+    """
+    missing = np.isnan(values)
+    if isinstance(colormap, StepColormap):
+        index = np.asarray(colormap.index, dtype=float)
+        n = len(colormap.colors)
+        codes = np.clip(np.searchsorted(index, values, side='left') - 1,
+                        0, n - 1)
+        palette = [colormap(x) for x in (index[:n] + index[1:n + 1]) / 2.]
+    else:
+        vmin, vmax = float(colormap.vmin), float(colormap.vmax)
+        levels = np.linspace(vmin, vmax, n_colors)
+        scale = (n_colors - 1) / (vmax - vmin) if vmax > vmin else 0.
+        clipped = np.clip(np.where(missing, vmin, values), vmin, vmax)
+        codes = np.round((clipped - vmin) * scale)
+        palette = [colormap(x) for x in levels]
+    codes = np.where(missing, -1, codes).astype(int)
+    return palette, codes
+
+
+def _timestamp_labels(timestamps):
+    """Converts datetimes to strings of seconds since epoch, which is what
+    the slider displays, and other timestamps to strings."""
+    arr = np.asarray(timestamps)
+    if arr.dtype.kind == 'M':
+        arr = arr.astype('datetime64[s]').astype(np.int64)
+    return [str(t) for t in arr.tolist()]
 
 
 class TimeSliderChoropleth(GeoJson):
@@ -19,9 +60,26 @@ class TimeSliderChoropleth(GeoJson):
     ----------
     data: str
         geojson string
-    styledict: dict
+    styledict: dict, default None
         A dictionary where the keys are the geojson feature ids and the values are
         dicts of `{time: style_options_dict}`
+    values: pd.DataFrame or 2-D array, default None
+        Instead of `styledict`, the value of each feature (rows) at each
+        timestamp (columns), NaN where the feature is not drawn. The colors
+        are computed from `colormap` and embedded as a palette and a matrix
+        of indices into it, which is much smaller than a styledict.
+        The feature ids and timestamps are taken from the index and columns
+        of a DataFrame; for an array they must be given.
+    colormap: branca colormap, default None
+        Colormap used for `values`. By default, YlOrRd scaled to the range
+        of the values.
+    opacity: float, default 1
+        Fill opacity of the features, when using `values`.
+    feature_ids: list, default None
+        The geojson feature ids of the rows of `values`.
+    timestamps: list, default None
+        The timestamps of the columns of `values`, in seconds since epoch
+        or as datetimes.
     name : string, default None
         The name of the Layer, as it will appear in LayerControls.
     overlay : bool, default False
@@ -36,7 +94,29 @@ class TimeSliderChoropleth(GeoJson):
             {% macro script(this, kwargs) %}
 
                 var timestamps = {{ this.timestamps }};
+                {% if this.palette %}
+                var palette = {{ this.palette }};
+                var feature_ids = {{ this.feature_ids }};
+                var codes = {{ this.codes }};
+                var feature_rows = {};
+                for (var i = 0; i < feature_ids.length; i++) {
+                    feature_rows[feature_ids[i]] = i;
+                }
+                var style_at = function(feature_id, timestamp_index) {
+                    var row = feature_rows[feature_id];
+                    var code = row === undefined ? -1 : codes[row * timestamps.length + timestamp_index];
+                    return code < 0 ? null : {color: palette[code], opacity: {{ this.opacity }}};
+                };
+                {% else %}
                 var styledict = {{ this.styledict }};
+                var feature_ids = Object.keys(styledict);
+                var style_at = function(feature_id, timestamp_index) {
+                    var style = styledict[feature_id];
+                    var timestamp = timestamps[timestamp_index];
+                    return (style && timestamp in style) ? style[timestamp] : null;
+                };
+                {% endif %}
+                var current_index = 0;
                 var current_timestamp = timestamps[0];
 
                 // insert time slider
@@ -62,21 +142,19 @@ class TimeSliderChoropleth(GeoJson):
                 d3.select("output#slider-value").text(datestring);
 
                 fill_map = function(){
-                    for (var feature_id in styledict){
-                        let style = styledict[feature_id]//[current_timestamp];
-                        var fillColor = 'white';
-                        var opacity = 0;
-                        if (current_timestamp in style){
-                            fillColor = style[current_timestamp]['color'];
-                            opacity = style[current_timestamp]['opacity'];
+                    for (var i = 0; i < feature_ids.length; i++){
+                        var feature_id = feature_ids[i];
+                        var style = style_at(feature_id, current_index);
+                        if (style){
                             d3.selectAll('#feature-'+feature_id
-                            ).attr('fill', fillColor)
-                            .style('fill-opacity', opacity);
+                            ).attr('fill', style['color'])
+                            .style('fill-opacity', style['opacity']);
                         }
                     }
                 }
 
                 d3.select("#slider").on("input", function() {
+                    current_index = parseInt(this.value);
                     current_timestamp = timestamps[this.value];
                 var datestring = new Date(parseInt(current_timestamp)*1000).toDateString();
                 d3.select("output#slider-value").text(datestring);
@@ -87,13 +165,13 @@ class TimeSliderChoropleth(GeoJson):
                     {{this.get_name()}}_onEachFeature = function onEachFeature(feature, layer) {
                         layer.on({
                             mouseout: function(e) {
-                            if (current_timestamp in styledict[e.target.feature.id]){
-                                var opacity = styledict[e.target.feature.id][current_timestamp]['opacity'];
-                                d3.selectAll('#feature-'+e.target.feature.id).style('fill-opacity', opacity);
+                            var style = style_at(e.target.feature.id, current_index);
+                            if (style){
+                                d3.selectAll('#feature-'+e.target.feature.id).style('fill-opacity', style['opacity']);
                             }
                         },
                             mouseover: function(e) {
-                            if (current_timestamp in styledict[e.target.feature.id]){
+                            if (style_at(e.target.feature.id, current_index)){
                                 d3.selectAll('#feature-'+e.target.feature.id).style('fill-opacity', 1);
                             }
                         },
@@ -106,7 +184,8 @@ class TimeSliderChoropleth(GeoJson):
                 {% endif %}
 
                 var {{this.get_name()}} = L.geoJson(
-                    {% if this.embed %}{{this.style_data()}}{% else %}"{{this.data}}"{% endif %}
+                    {% if this.data_var %}{{this.data_var}}
+                    {% elif this.embed %}{{this.style_data()}}{% else %}"{{this.data}}"{% endif %}
                     {% if this.smooth_factor is not none or this.highlight %}
                         , {
                         {% if this.smooth_factor is not none  %}
@@ -140,11 +219,19 @@ class TimeSliderChoropleth(GeoJson):
             {% endmacro %}
             """)
 
-    def __init__(self, data, styledict, name=None, overlay=True, control=True,
-                 show=True):
+    def __init__(self, data, styledict=None, name=None, overlay=True,
+                 control=True, show=True, values=None, colormap=None,
+                 opacity=1, feature_ids=None, timestamps=None):
         super(TimeSliderChoropleth, self).__init__(data, name=name,
                                                    overlay=overlay,
                                                    control=control, show=show)
+        self.palette = None
+        if values is not None:
+            if styledict is not None:
+                raise ValueError('Give either styledict or values, not both.')
+            self._set_values(values, colormap, opacity, feature_ids,
+                             timestamps)
+            return
         if not isinstance(styledict, dict):
             raise ValueError('styledict must be a dictionary, got {!r}'.format(styledict))  # noqa
         for val in styledict.values():
@@ -160,6 +247,40 @@ class TimeSliderChoropleth(GeoJson):
         self.timestamps = json.dumps(timestamps)
         self.styledict = json.dumps(styledict, sort_keys=True, indent=2)
 
+    def _set_values(self, values, colormap, opacity, feature_ids, timestamps):
+        """Encodes a matrix of values as a palette and palette indices."""
+        if hasattr(values, 'iloc'):
+            if feature_ids is None:
+                feature_ids = values.index
+            if timestamps is None:
+                timestamps = values.columns
+            values = values.values
+        values = np.asarray(values, dtype=float)
+        if values.ndim != 2:
+            raise ValueError('values must be a 2-D array of features by '
+                             'timestamps, got shape {}.'.format(values.shape))
+        if feature_ids is None or timestamps is None:
+            raise ValueError('feature_ids and timestamps are required when '
+                             'values is not a DataFrame.')
+        feature_ids = [str(f) for f in np.asarray(feature_ids).tolist()]
+        timestamps = _timestamp_labels(timestamps)
+        if values.shape != (len(feature_ids), len(timestamps)):
+            raise ValueError('values has shape {}, expected ({}, {}) from the '
+                             'feature ids and timestamps.'.format(
+                                 values.shape, len(feature_ids),
+                                 len(timestamps)))
+        if colormap is None:
+            finite = values[np.isfinite(values)]
+            vmin, vmax = ((finite.min(), finite.max()) if finite.size
+                          else (0., 1.))
+            colormap = linear.YlOrRd_09.scale(vmin, vmax)
+        palette, codes = _palette_codes(values, colormap)
+        self.timestamps = _to_json(timestamps)
+        self.feature_ids = _to_json(feature_ids)
+        self.palette = _to_json(palette)
+        self.codes = _to_json(codes.ravel())
+        self.opacity = opacity
+
     def render(self, **kwargs):
         super(TimeSliderChoropleth, self).render(**kwargs)
         figure = self.get_root()
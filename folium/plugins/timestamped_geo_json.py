@@ -3,13 +3,211 @@
 from __future__ import (absolute_import, division, print_function)
 
 import json
+import re
 
-from branca.element import CssLink, Figure, JavascriptLink, MacroElement
+from branca.element import CssLink, Figure, JavascriptLink
 
+from folium.elements import MacroElement, StaticElement, Template
 from folium.folium import Map
-from folium.utilities import iter_points, none_max, none_min
+from folium.plugins.frame_chunks import FrameChunks
+from folium.utilities import (_as_float_array, _to_json, iter_points,
+                              none_max, none_min)
 
-from jinja2 import Template
+import numpy as np
+
+from six import string_types
+
+
+# The UTC offset at the end of the time of an ISO string: Z, +hh:mm,
+# +hhmm or +hh.
+_utc_offset = re.compile(r'[T ][0-9:.]+(Z|([+-])([0-9]{2}):?([0-9]{2})?)$')
+
+
+def _time_to_ms(value):
+    """Converts a timestamp in ms since epoch or in ISO string, with an
+    optional UTC offset, to ms."""
+    if not isinstance(value, string_types):
+        return value
+    offset = 0
+    match = _utc_offset.search(value)
+    if match is not None:
+        # numpy's parsing of offsets is deprecated, they are removed first.
+        value = value[:match.start(1)]
+        if match.group(2) is not None:
+            minutes = int(match.group(3)) * 60 + int(match.group(4) or 0)
+            offset = (1 if match.group(2) == '+' else -1) * minutes * 60000
+    return int(np.datetime64(value, 'ms').astype(np.int64)) - offset
+
+
+def _chunk_features(features, frames_per_chunk):
+    """
+    Splits the features into chunks of `frames_per_chunk` distinct times,
+    each feature going to the chunk of its first time.
+
+    Returns the distinct times, sorted, in their original form, and the
+    list of the features of each chunk.
+
+    """
+    distinct = {}
+    first_times = []
+    for feature in features:
+        times = feature.get('properties', {}).get('times') or []
+        keys = [_time_to_ms(t) for t in times]
+        for key, t in zip(keys, times):
+            distinct.setdefault(key, t)
+        first_times.append(min(keys) if keys else None)
+    keys = sorted(distinct)
+    rank = {key: i for i, key in enumerate(keys)}
+    n_chunks = max(1, -(-len(keys) // frames_per_chunk))
+    chunks = [[] for _ in range(n_chunks)]
+    for feature, first in zip(features, first_times):
+        k = 0 if first is None else rank[first] // frames_per_chunk
+        chunks[k].append(feature)
+    return [distinct[key] for key in keys], chunks
+
+
+def _times_to_ms(times):
+    """Converts a column of timestamps, as numbers in ms since epoch,
+    datetimes or ISO strings, to an array of ms since epoch."""
+    if hasattr(times, 'iloc'):
+        times = times.values
+    arr = np.asarray(times)
+    if arr.dtype.kind in 'iuf':
+        return arr.astype(np.int64)
+    if arr.dtype.kind in 'OSU':
+        arr = np.array([np.datetime64(_time_to_ms(t), 'ms')
+                        if isinstance(t, string_types) else t
+                        for t in arr.tolist()], dtype='datetime64[ms]')
+    if arr.dtype.kind != 'M':
+        raise ValueError('Cannot interpret the times of dtype {} as '
+                         'timestamps.'.format(arr.dtype))
+    return arr.astype('datetime64[ms]').astype(np.int64)
+
+
+def _column_values(values, n, name):
+    """Converts a column to a list of n plain Python values."""
+    if hasattr(values, 'iloc'):
+        values = values.values
+    values = np.asarray(values).tolist()
+    if len(values) != n:
+        raise ValueError('{} should have length {}, got {}.'
+                         .format(name, n, len(values)))
+    return values
+
+
+def _features_from_columns(lat, lon, times, tracks=None, styles=None,
+                           popups=None):
+    """
+    Builds timestamped features from columns of points: one LineString per
+    track, or one Point per point when `tracks` is None or a track has a
+    single point. The points are sorted by track and time with a single
+    lexsort, and the features are built one slice per track.
+
+    Returns the features and the bounds of the points.
+
+    """
+    lat = _as_float_array(lat, name='lat').ravel()
+    lon = _as_float_array(lon, name='lon').ravel()
+    times = _times_to_ms(times).ravel()
+    n = len(lat)
+    if len(lon) != n or len(times) != n:
+        raise ValueError('lat, lon and times should have the same length, '
+                         'got {}, {} and {}.'.format(n, len(lon), len(times)))
+    if tracks is None:
+        codes = np.arange(n)
+    else:
+        _, codes = np.unique(_column_values(tracks, n, 'tracks'),
+                             return_inverse=True)
+        codes = codes.ravel()
+    order = np.lexsort((times, codes))
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(codes[order])) + 1])
+    ends = np.concatenate([starts[1:], [n]])
+
+    coordinates = np.column_stack([lon, lat])[order].tolist()
+    times_ms = times[order].tolist()
+    # Per track properties are taken from its first point.
+    firsts = order[starts].tolist()
+    styles = {key: _column_values(values, n, key)
+              for key, values in (styles or {}).items()}
+    popups = None if popups is None else _column_values(popups, n, 'popups')
+
+    features = []
+    for start, end, first in zip(starts.tolist(), ends.tolist(), firsts):
+        style = {key: values[first] for key, values in styles.items()}
+        properties = {'times': times_ms[start:end]}
+        if end - start > 1:
+            geometry = {'type': 'LineString',
+                        'coordinates': coordinates[start:end]}
+            if style:
+                properties['style'] = style
+        else:
+            geometry = {'type': 'Point', 'coordinates': coordinates[start]}
+            properties['icon'] = 'circle'
+            if style:
+                properties['iconstyle'] = style
+        if popups is not None:
+            properties['popup'] = popups[first]
+        features.append({'type': 'Feature', 'geometry': geometry,
+                         'properties': properties})
+
+    if n:
+        bounds = [[lat.min(), lon.min()], [lat.max(), lon.max()]]
+        bounds = [[float(x) for x in corner] for corner in bounds]
+    else:
+        bounds = [[None, None], [None, None]]
+    return features, bounds
+
+
+_chunked_layer_script = u"""
+<script>
+    // A TimeDimension GeoJSON layer whose features are added chunk by
+    // chunk, a time being ready once all the chunks starting before it
+    // are loaded.
+    var FoliumChunkedGeoJson = L.TimeDimension.Layer.GeoJson.extend({
+        initialize: function(layer, chunks, chunkStarts, options) {
+            L.TimeDimension.Layer.GeoJson.prototype.initialize.call(this, layer, options);
+            this._chunks = chunks;
+            this._chunkStarts = chunkStarts;
+            this._nChunksLoaded = 0;
+        },
+        onAdd: function(map) {
+            L.TimeDimension.Layer.GeoJson.prototype.onAdd.call(this, map);
+            this._onNewTimeLoading({time: this._timeDimension.getCurrentTime()});
+        },
+        _nChunksFor: function(time) {
+            var n = 0;
+            while (n < this._chunkStarts.length && this._chunkStarts[n] <= time) {
+                n++;
+            }
+            return Math.max(n, 1);
+        },
+        isReady: function(time) {
+            return this._nChunksLoaded >= this._nChunksFor(time);
+        },
+        _onNewTimeLoading: function(ev) {
+            var self = this;
+            var needed = this._nChunksFor(ev.time);
+            var next = function() {
+                if (self._nChunksLoaded >= needed) {
+                    self._loaded = true;
+                    self._update();
+                    self.fire('timeload', {time: ev.time});
+                    return;
+                }
+                var k = self._nChunksLoaded;
+                self._chunks.get(k, function(chunk) {
+                    if (self._nChunksLoaded == k) {
+                        self._baseLayer.addData(chunk);
+                        self._nChunksLoaded++;
+                    }
+                    next();
+                });
+            };
+            next();
+        }
+    });
+</script>
+"""
 
 
 class TimestampedGeoJson(MacroElement):
@@ -54,6 +252,19 @@ class TimestampedGeoJson(MacroElement):
         time has passed. If None, all previous times will be shown.
         Format: ISO8601 Duration
         ex: 'P1M' 1/month, 'P1D' 1/day, 'PT1H' 1/hour, and 'PT1M' 1/minute
+    frames_per_chunk: int, default None
+        If given, the features are not embedded in the map script but split
+        into chunks of this many distinct times, according to their first
+        time, which are only loaded when the time control reaches them, the
+        next chunk being prefetched. The time control then steps through
+        the distinct times of the features instead of `period`.
+        Requires the data to be given as a file or a dict.
+    chunk_path: str, default None
+        Directory, relative to the saved page, where the chunks are written
+        as JSON files by `Map.save`. By default, and when the map is
+        rendered otherwise, they are embedded in the page as JSON script
+        tags that are only parsed when needed, which also works for pages
+        opened from the file system.
 
     Examples
     --------
@@ -85,13 +296,20 @@ class TimestampedGeoJson(MacroElement):
                     return newdate.format("{{this.date_options}}");
                 }
             });
+            {% if this.frame_chunks %}
+            var times = {{ this.times }}.map(function(t) { return new Date(t).getTime(); });
+            {{this._parent.get_name()}}.timeDimension = L.timeDimension(
+                {times: times, currentTime: times[0]}
+            );
+            {% else %}
             {{this._parent.get_name()}}.timeDimension = L.timeDimension({period:"{{this.period}}"});
+            {% endif %}
             var timeDimensionControl = new L.Control.TimeDimensionCustom({{ this.options }});
             {{this._parent.get_name()}}.addControl(this.timeDimensionControl);
 
             console.log("{{this.marker}}");
 
-            var geoJsonLayer = L.geoJson({{this.data}}, {
+            var geoJsonLayer = L.geoJson({{'null' if this.frame_chunks else this.data}}, {
                     pointToLayer: function (feature, latLng) {
                         if (feature.properties.icon == 'marker') {
                             if(feature.properties.iconstyle){
@@ -122,18 +340,29 @@ class TimestampedGeoJson(MacroElement):
                     }
                 })
 
+            {% if this.frame_chunks %}
+            var {{this.get_name()}} = new FoliumChunkedGeoJson(geoJsonLayer,
+                {{ this.frame_chunks.js_loader(this.get_name(), kwargs.get('output_dir')) }},
+                {{ this.chunk_starts }}.map(function(t) { return new Date(t).getTime(); }),
+                {updateTimeDimension: false,
+                 addlastPoint: {{'true' if this.add_last_point else 'false'}},
+                 duration: {{ this.duration }},
+                }).addTo({{this._parent.get_name()}});
+            {% else %}
             var {{this.get_name()}} = L.timeDimension.layer.geoJson(geoJsonLayer,
                 {updateTimeDimension: true,
                  addlastPoint: {{'true' if this.add_last_point else 'false'}},
                  duration: {{ this.duration }},
                 }).addTo({{this._parent.get_name()}});
+            {% endif %}
         {% endmacro %}
         """)  # noqa
 
     def __init__(self, data, transition_time=200, loop=True, auto_play=True,
                  add_last_point=True, period='P1D', min_speed=0.1, max_speed=10,
                  loop_button=False, date_options='YYYY-MM-DD HH:mm:ss',
-                 time_slider_drag_update=False, duration=None):
+                 time_slider_drag_update=False, duration=None,
+                 frames_per_chunk=None, chunk_path=None):
         super(TimestampedGeoJson, self).__init__()
         self._name = 'TimestampedGeoJson'
 
@@ -150,6 +379,28 @@ class TimestampedGeoJson(MacroElement):
         self.period = period
         self.date_options = date_options
         self.duration = 'undefined' if duration is None else '"' + duration + '"'
+        self._bounds = None
+
+        self.frame_chunks = None
+        if frames_per_chunk is not None:
+            if not self.embed:
+                raise ValueError('Chunked loading requires the data to be '
+                                 'given as a file or a dict.')
+            if int(frames_per_chunk) < 1:
+                raise ValueError('frames_per_chunk should be a positive '
+                                 'integer, got {!r}.'.format(frames_per_chunk))
+            features = json.loads(self.data)
+            if features.get('type') == 'FeatureCollection':
+                features = features['features']
+            elif features.get('type') == 'Feature':
+                features = [features]
+            else:
+                features = [{'type': 'Feature', 'geometry': features,
+                             'properties': {}}]
+            times, chunks = _chunk_features(features, int(frames_per_chunk))
+            self.times = _to_json(times)
+            self.chunk_starts = _to_json(times[::int(frames_per_chunk)])
+            self.frame_chunks = FrameChunks(chunks, path=chunk_path)
 
         options = {
             'position': 'bottomleft',
@@ -166,6 +417,49 @@ class TimestampedGeoJson(MacroElement):
         }
         self.options = json.dumps(options, sort_keys=True, indent=2)
 
+    @classmethod
+    def from_columns(cls, lat, lon, times, tracks=None, styles=None,
+                     popups=None, **kwargs):
+        """
+        Creates a TimestampedGeoJson from columns of points, such as the
+        columns of a DataFrame, instead of a hand-built GeoJSON.
+
+        Parameters
+        ----------
+        lat, lon: list, array or pd.Series of floats
+            The coordinates of the points.
+        times: list, array or pd.Series
+            The timestamp of each point, in ms since epoch, as datetimes or
+            as ISO strings.
+        tracks: list, array or pd.Series, default None
+            The id of the track of each point. The points of a track are
+            sorted by time and joined in a LineString. If None, or for
+            tracks of a single point, each point is a Point feature.
+        styles: dict of str to list, array or pd.Series, default None
+            Style options, such as 'color' or 'weight', and the value of each
+            point. A track takes the values of its first point. Points are
+            drawn as circle markers with these options.
+        popups: list, array or pd.Series of str, default None
+            A popup for each point. A track takes the popup of its first
+            point.
+        **kwargs
+            Passed to TimestampedGeoJson.
+
+        Examples
+        --------
+        >>> TimestampedGeoJson.from_columns(df['lat'], df['lon'], df['time'],
+        ...                                 tracks=df['vessel'],
+        ...                                 styles={'color': df['color']})
+
+        """
+        features, bounds = _features_from_columns(lat, lon, times,
+                                                  tracks=tracks, styles=styles,
+                                                  popups=popups)
+        obj = cls({'type': 'FeatureCollection', 'features': features},
+                  **kwargs)
+        obj._bounds = bounds
+        return obj
+
     def render(self, **kwargs):
         assert isinstance(self._parent, Map), (
             'TimestampedGeoJson can only be added to a Map object.'
@@ -204,12 +498,20 @@ class TimestampedGeoJson(MacroElement):
             JavascriptLink('https://cdnjs.cloudflare.com/ajax/libs/moment.js/2.18.1/moment.min.js'),
             name='moment')
 
+        if self.frame_chunks is not None:
+            figure.header.add_child(StaticElement(_chunked_layer_script),
+                                    name='folium_chunked_geojson')
+            self.frame_chunks.render(figure, self.get_name(),
+                                     kwargs.get('output_dir'))
+
     def _get_self_bounds(self):
         """
         Computes the bounds of the object itself (not including it's children)
         in the form [[lat_min, lon_min], [lat_max, lon_max]].
 
         """
+        if self._bounds is not None:
+            return self._bounds
         if not self.embed:
             raise ValueError('Cannot compute bounds of non-embedded GeoJSON.')
 
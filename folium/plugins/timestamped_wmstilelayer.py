@@ -4,11 +4,10 @@ from __future__ import (absolute_import, division, print_function)
 
 from branca.element import CssLink, Figure, JavascriptLink
 
+from folium.elements import Template
 from folium.map import Layer
 from folium.raster_layers import WmsTileLayer
 
-from jinja2 import Template
-
 
 class TimestampedWmsTileLayers(Layer):
     """
@@ -8,18 +8,101 @@ Wraps leaflet TileLayer, WmsTileLayer (TileLayer.WMS), ImageOverlay, and VideoOv
 from __future__ import (absolute_import, division, print_function)
 
 import json
+import os
+from collections import namedtuple
 
-from branca.element import Element, Figure
+from branca.element import Figure
 
+from folium.elements import ENV, StaticElement, Template, _register_source
 from folium.map import Layer
 from folium.utilities import image_to_url, mercator_transform
 
-from jinja2 import Environment, PackageLoader, Template
-
 from six import binary_type, text_type
 
 
-ENV = Environment(loader=PackageLoader('folium', 'templates'))
+_TileProvider = namedtuple('_TileProvider',
+                           ['tiles', 'attr', 'api_key_required'])
+
+# The tilesets known by name, by flattened name, with the names of their
+# tiles and attribution templates in the shared environment. The templates
+# are compiled on first use.
+_tile_providers = {}
+_builtin_providers_loaded = False
+_rendered_providers = {}
+
+
+def _flatten_name(name):
+    return ''.join(name.lower().strip().split())
+
+
+def _get_tile_providers():
+    """The registry of tile providers, with the built-in ones of the
+    templates/tiles directory listed on the first call."""
+    global _builtin_providers_loaded
+    if not _builtin_providers_loaded:
+        templates = set(ENV.list_templates(
+            filter_func=lambda x: x.startswith('tiles/')))
+        for name in templates:
+            parts = name.split('/')
+            attr = 'tiles/{}/attr.txt'.format(parts[1])
+            if parts[2:] == ['tiles.txt'] and attr in templates:
+                _tile_providers.setdefault(parts[1], _TileProvider(
+                    name, attr, parts[1] in ('cloudmade', 'mapbox')))
+        _builtin_providers_loaded = True
+    return _tile_providers
+
+
+def register_tile_provider(name, tiles, attr, api_key_required=False):
+    """
+    Registers a tileset, so that TileLayer and Map accept its name as
+    `tiles`.
+
+    Parameters
+    ----------
+    name: str
+        Name of the tileset. Case and whitespace are ignored, like for the
+        built-in tilesets.
+    tiles: str
+        Leaflet-style URL template of the tiles. It can contain
+        ``{{ API_key }}``, replaced by the `API_key` of the layer.
+    attr: str
+        Attribution of the tiles.
+    api_key_required: bool, default False
+        Whether the layers must pass an `API_key`.
+
+    Examples
+    --------
+    >>> register_tile_provider(
+    ...     'Our tiles', 'https://tiles.example.com/{z}/{x}/{y}.png',
+    ...     '&copy; Example')
+    >>> m = folium.Map(tiles='Our tiles')
+
+    """
+    if isinstance(attr, binary_type):
+        attr = text_type(attr, 'utf8')
+    _get_tile_providers()[_flatten_name(name)] = _TileProvider(
+        _register_source(tiles), _register_source(attr), api_key_required)
+
+
+def _builtin_tiles(tiles, API_key=None):
+    """
+    Returns the URL template and the attribution of a registered tileset,
+    or None if `tiles` is not the name of one.
+
+    """
+    tiles_flat = _flatten_name(tiles)
+    provider = _get_tile_providers().get(tiles_flat)
+    if provider is None:
+        return None
+    if provider.api_key_required and not API_key:
+        raise ValueError('You must pass an API key to use the {} tiles.'
+                         .format(tiles))
+    key = (provider, API_key)
+    if key not in _rendered_providers:
+        _rendered_providers[key] = (
+            ENV.get_template(provider.tiles).render(API_key=API_key),
+            ENV.get_template(provider.attr).render())
+    return _rendered_providers[key]
 
 
 class TileLayer(Layer):
@@ -40,6 +123,8 @@ class TileLayer(Layer):
         You can pass a custom tileset to Folium by passing a Leaflet-style
         URL to the tiles parameter: ``http://{s}.yourtiles.com/{z}/{x}/{y}.png``
         You must then also provide attribution, use the `attr` keyword.
+        Tilesets used often can be given a name with
+        `register_tile_provider`.
     min_zoom: int, default 0
         Minimum allowed zoom level for this tile layer.
     max_zoom: int, default 18
@@ -70,6 +155,9 @@ class TileLayer(Layer):
         services).
     opacity: float, default 1
         Sets the opacity for the layer.
+    proxy: folium.tile_server.TileProxy, default None
+        A local tile server the tiles are requested from, which fetches
+        them once and caches them on disk.
     **kwargs : additional keyword arguments
         Other keyword arguments are passed as options to the Leaflet tileLayer
         object.
@@ -86,10 +174,10 @@ class TileLayer(Layer):
                  max_native_zoom=None, attr=None, API_key=None,
                  detect_retina=False, name=None, overlay=False,
                  control=True, show=True, no_wrap=False, subdomains='abc',
-                 tms=False, opacity=1, **kwargs):
+                 tms=False, opacity=1, proxy=None, **kwargs):
 
         self.tile_name = (name if name is not None else
-                          ''.join(tiles.lower().strip().split()))
+                          _flatten_name(tiles))
         super(TileLayer, self).__init__(name=self.tile_name, overlay=overlay,
                                         control=control, show=show)
         self._name = 'TileLayer'
@@ -107,18 +195,9 @@ class TileLayer(Layer):
         options.update(kwargs)
         self.options = json.dumps(options, sort_keys=True, indent=8)
 
-        tiles_flat = ''.join(tiles.lower().strip().split())
-        if tiles_flat in ('cloudmade', 'mapbox') and not API_key:
-            raise ValueError('You must pass an API key if using Cloudmade'
-                             ' or non-default Mapbox tiles.')
-        templates = list(self._env.list_templates(
-            filter_func=lambda x: x.startswith('tiles/')))
-        tile_template = 'tiles/' + tiles_flat + '/tiles.txt'
-        attr_template = 'tiles/' + tiles_flat + '/attr.txt'
-
-        if tile_template in templates and attr_template in templates:
-            self.tiles = self._env.get_template(tile_template).render(API_key=API_key)  # noqa
-            self.attr = self._env.get_template(attr_template).render()
+        builtin = _builtin_tiles(tiles, API_key=API_key)
+        if builtin is not None:
+            self.tiles, self.attr = builtin
         else:
             self.tiles = tiles
             if not attr:
@@ -126,6 +205,54 @@ class TileLayer(Layer):
             if isinstance(attr, binary_type):
                 attr = text_type(attr, 'utf8')
             self.attr = attr
+        if proxy is not None:
+            self.tiles = proxy.register(self.tiles, subdomains)
+
+
+class LocalTileLayer(TileLayer):
+    """
+    Create a tile layer from a local MBTiles or PMTiles file.
+
+    The tiles are served while the map is viewed by a tile server running in
+    background threads of the current process. To view the map without it,
+    save the map with `folium.tile_server.save_offline`, which writes the
+    tiles to a directory next to the HTML file.
+
+    Parameters
+    ----------
+    path: str
+        Path of the MBTiles or PMTiles file.
+    attr: string, default None
+        Map tile attribution, by default the one of the file metadata.
+    name : string, default None
+        The name of the Layer, as it will appear in LayerControls. By
+        default, the file name.
+    server: folium.tile_server.TileServer, default None
+        The server of the tiles, by default one shared by the layers.
+    **kwargs : additional keyword arguments
+        Passed to TileLayer. The zoom levels default to the ones of the
+        file.
+
+    Examples
+    --------
+    >>> LocalTileLayer('basemap.mbtiles').add_to(m)
+
+    """
+    def __init__(self, path, attr=None, name=None, server=None, **kwargs):
+        from folium.tile_archive import open_archive
+        from folium.tile_server import get_default_server
+
+        self.archive = open_archive(path)
+        if server is None:
+            server = get_default_server()
+        kwargs.setdefault('min_zoom', self.archive.min_zoom)
+        kwargs.setdefault('max_native_zoom', self.archive.max_zoom)
+        kwargs.setdefault('max_zoom', max(18, self.archive.max_zoom))
+        if name is None:
+            name = os.path.splitext(os.path.basename(path))[0]
+        super(LocalTileLayer, self).__init__(
+            tiles=server.add_archive(self.archive),
+            attr=attr or self.archive.attribution, name=name, **kwargs)
 
 
 class WmsTileLayer(Layer):
@@ -296,7 +423,7 @@ class ImageOverlay(Layer):
         </style>"""
 
         if self.pixelated:
-            figure.header.add_child(Element(pixelated), name='leaflet-image-layer')  # noqa
+            figure.header.add_child(StaticElement(pixelated), name='leaflet-image-layer')  # noqa
 
     def _get_self_bounds(self):
         """
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+
+"""
+Taking screenshots of maps with a pool of headless browsers.
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import atexit
+import os
+import posixpath
+import threading
+import time
+import uuid
+import warnings
+from multiprocessing.pool import ThreadPool
+
+from folium.utilities import _tmp_html
+
+from six.moves import BaseHTTPServer, SimpleHTTPServer, queue, socketserver
+from six.moves.urllib.parse import unquote, urlparse
+
+
+# Counts the tile layers that are loading their tiles and sets
+# `window.foliumReady` once the page is loaded, all the tile layers on the
+# maps have loaded or failed to load their tiles, and a frame was painted.
+# It runs in the header, after Leaflet is loaded and before the maps are
+# created.
+_ready_script = u"""
+<script>
+    (function() {
+        var loading = 0;
+        var pageLoaded = false;
+        var check = function() {
+            if (pageLoaded && loading === 0) {
+                requestAnimationFrame(function() {
+                    requestAnimationFrame(function() {
+                        window.foliumReady = loading === 0;
+                    });
+                });
+            }
+        };
+        L.GridLayer.addInitHook(function() {
+            this.on('loading', function() { loading++; window.foliumReady = false; });
+            this.on('load', function() { loading = Math.max(loading - 1, 0); check(); });
+            this.on('remove', function() {
+                if (this._loading) { loading = Math.max(loading - 1, 0); }
+                check();
+            });
+        });
+        window.addEventListener('load', function() { pageLoaded = true; check(); });
+    })();
+</script>
+"""
+
+
+def _inject_ready_script(html):
+    """Inserts the readiness script at the end of the header of a page."""
+    index = html.find('</head>')
+    if index < 0:
+        raise ValueError('The page has no </head> tag.')
+    return html[:index] + _ready_script + html[index:]
+
+
+def _firefox(width, height, pixel_ratio):
+    """Starts a headless Firefox with a viewport of the given size."""
+    from selenium import webdriver
+
+    options = webdriver.firefox.options.Options()
+    options.add_argument('--headless')
+    options.add_argument('--width={}'.format(width))
+    options.add_argument('--height={}'.format(height))
+    options.set_preference('layout.css.devPixelsPerPx', str(pixel_ratio))
+    driver = webdriver.Firefox(options=options)
+    driver.set_window_size(width, height)
+    return driver
+
+
+class _PageServer(object):
+    """
+    Serves the files of a directory, such as local tiles, and the pages to
+    screenshot, over HTTP on localhost, so that the maps can use tiles with
+    URLs relative to the directory.
+
+    """
+    def __init__(self, directory):
+        pages = self.pages = {}
+        root = os.path.abspath(directory)
+
+        class Handler(SimpleHTTPServer.SimpleHTTPRequestHandler):
+            def do_GET(self):
+                page = pages.get(urlparse(self.path).path)
+                if page is None:
+                    return SimpleHTTPServer.SimpleHTTPRequestHandler.do_GET(
+                        self)
+                data = page.encode('utf8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def translate_path(self, path):
+                path = posixpath.normpath(unquote(urlparse(path).path))
+                parts = [part for part in path.split('/')
+                         if part not in ('', '.', '..')]
+                return os.path.join(root, *parts)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+            daemon_threads = True
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_address[1])
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def add_page(self, html):
+        """Serves a page, and returns its path."""
+        path = '/folium_{}.html'.format(uuid.uuid4().hex)
+        self.pages[path] = html
+        return path
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ScreenshotEngine(object):
+    """
+    Takes PNG screenshots of maps with a pool of warm headless browsers.
+
+    Instead of waiting for a fixed delay, a script injected in the pages
+    signals when the page is loaded and all the tile layers have loaded
+    their tiles, or failed to.
+
+    Parameters
+    ----------
+    size: tuple of int, default (1024, 768)
+        Width and height of the browser viewport, in CSS pixels.
+    pixel_ratio: float, default 1
+        Device pixel ratio of the browsers; the screenshots are
+        `pixel_ratio` times as large as `size`.
+    sessions: int, default 1
+        Number of browsers, which take screenshots in parallel.
+    timeout: float, default 30
+        Maximum time to wait for a page to be ready, in seconds. The
+        screenshot is taken anyway after it, with a warning.
+    directory: str, default None
+        A local directory, for instance of tiles, served over HTTP with the
+        pages. Tile layers can then use URLs relative to this directory,
+        like 'tiles/{z}/{x}/{y}.png', which works offline. If None, the
+        pages are opened from temporary files.
+    driver_factory: callable, default None
+        Function called with the width, height and pixel ratio and returning
+        a selenium WebDriver. By default, a headless Firefox.
+
+    Examples
+    --------
+    >>> with ScreenshotEngine(size=(400, 300), sessions=4) as engine:
+    ...     engine.export([('a.png', map_a), ('b.png', map_b)])
+
+    """
+    def __init__(self, size=(1024, 768), pixel_ratio=1, sessions=1,
+                 timeout=30, directory=None, driver_factory=None):
+        if int(sessions) < 1:
+            raise ValueError('sessions should be at least 1, got {!r}.'
+                             .format(sessions))
+        self.size = tuple(size)
+        self.pixel_ratio = pixel_ratio
+        self.sessions = int(sessions)
+        self.timeout = timeout
+        self._driver_factory = driver_factory or _firefox
+        self._server = _PageServer(directory) if directory is not None else None
+        self._drivers = []
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _acquire(self):
+        """Returns an idle browser, starting one if the pool is not full."""
+        with self._lock:
+            if self._idle.empty() and len(self._drivers) < self.sessions:
+                driver = self._driver_factory(self.size[0], self.size[1],
+                                              self.pixel_ratio)
+                self._drivers.append(driver)
+                return driver
+        return self._idle.get()
+
+    def _wait_ready(self, driver, timeout):
+        deadline = time.time() + timeout
+        while not driver.execute_script('return window.foliumReady === true;'):
+            if time.time() > deadline:
+                warnings.warn('The map was not ready after {} seconds, its '
+                              'tiles may be missing.'.format(timeout))
+                return
+            time.sleep(0.05)
+
+    def _shoot(self, driver, html, timeout):
+        html = _inject_ready_script(html)
+        if self._server is not None:
+            path = self._server.add_page(html)
+            try:
+                driver.get(self._server.url + path)
+                self._wait_ready(driver, timeout)
+                return driver.get_screenshot_as_png()
+            finally:
+                del self._server.pages[path]
+        with _tmp_html(html) as fname:
+            # We need the tempfile to avoid JS security issues.
+            driver.get('file:///{path}'.format(path=fname))
+            self._wait_ready(driver, timeout)
+            return driver.get_screenshot_as_png()
+
+    def screenshot(self, element, timeout=None):
+        """Returns a PNG screenshot of a map, or any element, as bytes,
+        waiting at most `timeout` seconds, or the engine's timeout, for it
+        to be ready."""
+        html = element.get_root().render()
+        driver = self._acquire()
+        try:
+            return self._shoot(driver, html,
+                               self.timeout if timeout is None else timeout)
+        finally:
+            self._idle.put(driver)
+
+    def screenshots(self, elements):
+        """Returns the PNG screenshots of several maps, taken in parallel
+        by the browsers of the pool."""
+        elements = list(elements)
+        if self.sessions == 1 or len(elements) <= 1:
+            return [self.screenshot(element) for element in elements]
+        pool = ThreadPool(self.sessions)
+        try:
+            return pool.map(self.screenshot, elements)
+        finally:
+            pool.close()
+            pool.join()
+
+    def export(self, items):
+        """Saves the screenshots of (outfile, map) pairs as PNG files."""
+        items = list(items)
+        pngs = self.screenshots(element for _, element in items)
+        for (outfile, _), png in zip(items, pngs):
+            with open(outfile, 'wb') as f:
+                f.write(png)
+
+    def close(self):
+        """Quits the browsers and stops the server."""
+        while self._drivers:
+            self._drivers.pop().quit()
+        self._idle = queue.Queue()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+
+_default_engine = None
+
+
+def get_default_engine():
+    """The engine used by Map._to_png, kept open until the interpreter
+    exits so that its browser is started only once."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = ScreenshotEngine()
+        atexit.register(_default_engine.close)
+    return _default_engine
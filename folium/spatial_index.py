@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+
+"""
+Spatial indexing of map elements, used to cull what is outside of a view.
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import math
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from folium.utilities import iter_coords
+
+import numpy as np
+
+
+def _to_boxes(bounds):
+    """Convert a list of [[lat_min, lon_min], [lat_max, lon_max]] bounds
+    to an array of shape (n, 4) with columns lat_min, lon_min, lat_max,
+    lon_max."""
+    boxes = np.array([[b[0][0], b[0][1], b[1][0], b[1][1]] for b in bounds],
+                     dtype=float)
+    return boxes.reshape(-1, 4)
+
+
+def _has_bounds(bounds):
+    """Check whether bounds returned by `_get_self_bounds` are defined."""
+    return bounds is not None and all(
+        value is not None for corner in bounds for value in corner)
+
+
+def bounds_intersect(boxes, bounds):
+    """
+    Vectorized test of which boxes intersect the given bounds.
+
+    Parameters
+    ----------
+    boxes: array of shape (n, 4)
+        Boxes in the form [lat_min, lon_min, lat_max, lon_max].
+    bounds: list
+        Bounds in the form [[lat_min, lon_min], [lat_max, lon_max]].
+
+    Returns
+    -------
+    Boolean array of length n.
+
+    """
+    (lat_min, lon_min), (lat_max, lon_max) = bounds
+    return ((boxes[:, 0] <= lat_max) & (boxes[:, 2] >= lat_min) &
+            (boxes[:, 1] <= lon_max) & (boxes[:, 3] >= lon_min))
+
+
+def _geometry_coordinates(geometry):
+    """Return the flat list of positions of a GeoJSON geometry."""
+    if not geometry:
+        return []
+    if geometry.get('type') == 'GeometryCollection':
+        return [point for sub in geometry.get('geometries', [])
+                for point in _geometry_coordinates(sub)]
+    coordinates = geometry.get('coordinates')
+    return list(iter_coords(coordinates)) if coordinates else []
+
+
+def _coordinate_arrays(coordinates):
+    """Yield the positions of nested GeoJSON coordinates as (n, 2) arrays
+    of lon, lat, one per position list (ring, line or part)."""
+    if not coordinates:
+        return
+    if isinstance(coordinates[0], (int, float)):
+        yield np.array([coordinates[:2]], dtype=float)
+    elif coordinates[0] and isinstance(coordinates[0][0], (int, float)):
+        try:
+            yield np.asarray(coordinates, dtype=float)[:, :2]
+        except ValueError:
+            # Positions with and without altitude mixed in one list.
+            yield np.array([point[:2] for point in coordinates], dtype=float)
+    else:
+        for sub in coordinates:
+            for array in _coordinate_arrays(sub):
+                yield array
+
+
+def _geometry_arrays(geometry):
+    """Yield the positions of a GeoJSON geometry as (n, 2) arrays."""
+    if not geometry:
+        return
+    if geometry.get('type') == 'GeometryCollection':
+        for sub in geometry.get('geometries', []):
+            for array in _geometry_arrays(sub):
+                yield array
+    else:
+        for array in _coordinate_arrays(geometry.get('coordinates')):
+            yield array
+
+
+def feature_boxes(features):
+    """
+    Compute the bounding box of each GeoJSON feature.
+
+    The positions of each ring or line are converted to an array at once,
+    and all of them are reduced per feature in a few NumPy operations, so
+    that Python only loops over the parts of the geometries.
+
+    Returns
+    -------
+    Array of shape (n, 4) with columns lat_min, lon_min, lat_max, lon_max.
+    Features without coordinates get NaN boxes.
+
+    """
+    counts, arrays = [], []
+    for feature in features:
+        parts = list(_geometry_arrays(feature.get('geometry')))
+        counts.append(sum(len(part) for part in parts))
+        arrays.extend(parts)
+    counts = np.array(counts, dtype=int)
+    boxes = np.full((len(counts), 4), np.nan)
+    if not counts.any():
+        return boxes
+    lonlat = np.concatenate(arrays)
+    nonempty = counts > 0
+    starts = (np.cumsum(counts) - counts)[nonempty]
+    mins = np.minimum.reduceat(lonlat, starts, axis=0)
+    maxs = np.maximum.reduceat(lonlat, starts, axis=0)
+    boxes[nonempty] = np.column_stack([mins[:, 1], mins[:, 0],
+                                       maxs[:, 1], maxs[:, 0]])
+    return boxes
+
+
+def expand_bounds(bounds, margin=0.):
+    """Return bounds grown by `margin` degrees on every side."""
+    (lat_min, lon_min), (lat_max, lon_max) = bounds
+    return [[lat_min - margin, lon_min - margin],
+            [lat_max + margin, lon_max + margin]]
+
+
+class SpatialIndex(object):
+    """
+    A static R-tree over bounding boxes, bulk-loaded with the
+    Sort-Tile-Recursive (STR) algorithm.
+
+    The leaves are sorted into vertical slices by longitude and then by
+    latitude within each slice, so that consecutive nodes are spatially
+    compact. Queries walk the tree level by level with vectorized
+    intersection tests.
+
+    Parameters
+    ----------
+    items: list
+        The objects to index.
+    bounds: list
+        The bounds of each item in the form
+        [[lat_min, lon_min], [lat_max, lon_max]].
+    node_capacity: int, default 16
+        Maximum number of entries per node.
+
+    Examples
+    --------
+    >>> index = SpatialIndex(['a', 'b'], [[[0, 0], [1, 1]], [[5, 5], [6, 6]]])
+    >>> index.query([[0.5, 0.5], [2, 2]])
+    ['a']
+
+    """
+    def __init__(self, items, bounds, node_capacity=16):
+        if len(items) != len(bounds):
+            raise ValueError('items and bounds must have the same length.')
+        if node_capacity < 2:
+            raise ValueError('node_capacity must be at least 2.')
+        self.items = list(items)
+        self.node_capacity = node_capacity
+
+        boxes = _to_boxes(bounds)
+        self._order = self._str_order(boxes, node_capacity)
+        self._levels = [boxes[self._order]]
+        while len(self._levels[-1]) > node_capacity:
+            self._levels.append(self._pack(self._levels[-1], node_capacity))
+        self._levels.reverse()
+
+    def __len__(self):
+        return len(self.items)
+
+    @staticmethod
+    def _str_order(boxes, node_capacity):
+        """Return the Sort-Tile-Recursive ordering of the boxes."""
+        n = len(boxes)
+        if n == 0:
+            return np.arange(0)
+        lat = (boxes[:, 0] + boxes[:, 2]) / 2.
+        lon = (boxes[:, 1] + boxes[:, 3]) / 2.
+        n_slices = int(math.ceil(math.sqrt(math.ceil(n / node_capacity))))
+        slice_size = n_slices * node_capacity
+        by_lon = np.argsort(lon, kind='mergesort')
+        slice_id = np.empty(n, dtype=int)
+        slice_id[by_lon] = np.arange(n) // slice_size
+        return np.lexsort((lat, slice_id))
+
+    @staticmethod
+    def _pack(boxes, node_capacity):
+        """Compute the parent boxes of consecutive groups of boxes."""
+        starts = np.arange(0, len(boxes), node_capacity)
+        return np.column_stack([
+            np.minimum.reduceat(boxes[:, 0], starts),
+            np.minimum.reduceat(boxes[:, 1], starts),
+            np.maximum.reduceat(boxes[:, 2], starts),
+            np.maximum.reduceat(boxes[:, 3], starts),
+        ])
+
+    def query_indices(self, bounds):
+        """Return the (sorted) positions in `items` of the entries whose
+        bounds intersect `bounds`."""
+        if not self.items:
+            return np.arange(0)
+        candidates = np.arange(len(self._levels[0]))
+        for i, level in enumerate(self._levels):
+            if i > 0:
+                candidates = (candidates[:, None] * self.node_capacity +
+                              np.arange(self.node_capacity)).ravel()
+                candidates = candidates[candidates < len(level)]
+            candidates = candidates[bounds_intersect(level[candidates],
+                                                     bounds)]
+        return np.sort(self._order[candidates])
+
+    def query(self, bounds):
+        """Return the items whose bounds intersect `bounds`, in the order
+        they were given."""
+        return [self.items[i] for i in self.query_indices(bounds)]
+
+    @classmethod
+    def from_children(cls, element, node_capacity=16):
+        """Build an index over the children of `element` that have bounds.
+
+        Returns the index and the list of the names of the children without
+        bounds of their own.
+        """
+        names, bounds, unbounded = [], [], []
+        for name, child in element._children.items():
+            try:
+                child_bounds = child._get_self_bounds()
+            except ValueError:
+                child_bounds = None
+            if _has_bounds(child_bounds):
+                names.append(name)
+                bounds.append(child_bounds)
+            else:
+                unbounded.append(name)
+        return cls(names, bounds, node_capacity=node_capacity), unbounded
+
+
+def _prune(element, bounds, originals):
+    """Replace the children of `element` and its descendants by the ones
+    intersecting `bounds`, storing the original children in `originals`."""
+    index, unbounded = SpatialIndex.from_children(element)
+    keep = set(index.query(bounds))
+    keep.update(unbounded)
+    for name in unbounded:
+        child = element._children[name]
+        if child._children:
+            _prune(child, bounds, originals)
+    if len(keep) < len(element._children):
+        originals.append((element, element._children))
+        element._children = OrderedDict(
+            (name, child) for name, child in element._children.items()
+            if name in keep)
+
+
+@contextmanager
+def pruned_to_bounds(element, bounds, margin=0.):
+    """
+    Temporarily remove the descendants of `element` that fall outside of
+    `bounds` (grown by `margin` degrees).
+
+    Elements without bounds of their own (layer groups, controls, tile
+    layers...) are kept, and their children are pruned recursively.
+    The original tree is restored when leaving the context.
+
+    Examples
+    --------
+    >>> with pruned_to_bounds(m, [[45, 5], [46, 6]], margin=0.1):
+    ...     html = m.get_root().render()
+
+    """
+    originals = []
+    try:
+        _prune(element, expand_bounds(bounds, margin), originals)
+        yield element
+    finally:
+        for parent, children in reversed(originals):
+            parent._children = children
@@ -0,0 +1,583 @@
+# -*- coding: utf-8 -*-
+
+"""
+Rendering maps to PNG images in Python, without a browser.
+
+The tiles of the view are read from a local directory or fetched, stitched
+with NumPy, and the markers, paths, GeoJSON features and image overlays of
+the map are rasterized on top of them in Web Mercator.
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import base64
+import io
+import json
+import math
+import os
+import re
+import struct
+import zlib
+
+from branca.colormap import _parse_color
+
+from folium.utilities import _web_mercator, write_png
+
+import numpy as np
+
+from six.moves.urllib.parse import unquote
+
+TILE_SIZE = 256
+
+# Meters per pixel at the equator at zoom 0.
+_EQUATOR_RESOLUTION = 156543.03392804097
+
+_BACKGROUND = (0xdd, 0xdd, 0xdd)
+
+# The {key} placeholders of a tiles template.
+_PLACEHOLDER = re.compile(r'\{([^{}]*)\}')
+
+# Leaflet's defaults for paths.
+_PATH_DEFAULTS = {
+    'stroke': True,
+    'color': '#3388ff',
+    'weight': 3,
+    'opacity': 1.0,
+    'fill': False,
+    'fillOpacity': 0.2,
+}
+
+_MARKER_COLOR = '#2a81cb'
+_MARKER_OUTLINE = '#3274a3'
+
+
+def _decode_png(data):
+    """
+    Decodes a PNG to an RGBA uint8 array, with PIL when it is installed.
+
+    """
+    try:
+        import PIL.Image
+    except ImportError:
+        pass
+    else:
+        return np.asarray(PIL.Image.open(io.BytesIO(data)).convert('RGBA'))
+    return _read_png(data)
+
+
+def _read_png(data):
+    """Decodes a non-interlaced 8-bit PNG to an RGBA uint8 array."""
+    if data[:8] != b'\x89PNG\r\n\x1a\n':
+        raise ValueError('Not a PNG image.')
+    pos, idat, palette, transparency = 8, [], None, None
+    while pos < len(data):
+        length, tag = struct.unpack('!I4s', data[pos:pos + 8])
+        chunk = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if tag == b'IHDR':
+            (width, height, depth, color_type, _, _,
+             interlace) = struct.unpack('!2I5B', chunk)
+        elif tag == b'PLTE':
+            palette = np.frombuffer(chunk, np.uint8).reshape(-1, 3)
+        elif tag == b'tRNS':
+            transparency = np.frombuffer(chunk, np.uint8)
+        elif tag == b'IDAT':
+            idat.append(chunk)
+        elif tag == b'IEND':
+            break
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[color_type]
+    if depth != 8 or interlace:
+        raise ValueError('Only non-interlaced 8-bit PNGs can be decoded '
+                         'without PIL.')
+    stride = width * channels
+    raw = np.frombuffer(zlib.decompress(b''.join(idat)), np.uint8)
+    raw = raw.reshape(height, stride + 1)
+    out = np.zeros((height, stride), np.uint8)
+    prior = np.zeros(stride, np.int32)
+    for i in range(height):
+        kind, line = raw[i, 0], raw[i, 1:].astype(np.int32)
+        if kind == 1:
+            line = np.cumsum(line.reshape(width, channels), axis=0).ravel()
+        elif kind == 2:
+            line = line + prior
+        elif kind in (3, 4):
+            # These filters depend on the previous decoded pixel of the row.
+            line = line.copy()
+            for j in range(stride):
+                left = line[j - channels] if j >= channels else 0
+                if kind == 3:
+                    line[j] = (line[j] + (left + prior[j]) // 2) & 0xff
+                else:
+                    up_left = prior[j - channels] if j >= channels else 0
+                    p = left + prior[j] - up_left
+                    pa, pb, pc = abs(p - left), abs(p - prior[j]), abs(p - up_left)
+                    predictor = (left if pa <= pb and pa <= pc
+                                 else prior[j] if pb <= pc else up_left)
+                    line[j] = (line[j] + predictor) & 0xff
+        line = line & 0xff
+        out[i] = line
+        prior = line
+    pixels = out.reshape(height, width, channels)
+    if color_type == 3:
+        alpha = np.full(len(palette), 255, np.uint8)
+        if transparency is not None:
+            alpha[:len(transparency)] = transparency
+        rgba = np.column_stack([palette, alpha])
+        return rgba[pixels[:, :, 0]]
+    if channels <= 2:
+        gray = pixels[:, :, :1]
+        pixels = np.concatenate(
+            [gray, gray, gray] + ([pixels[:, :, 1:]] if channels == 2 else []),
+            axis=2)
+    if pixels.shape[2] == 3:
+        pixels = np.concatenate(
+            [pixels, np.full((height, width, 1), 255, np.uint8)], axis=2)
+    return pixels
+
+
+def _rgb(color):
+    """Parses a CSS color to a float array of RGB values in [0, 1]."""
+    try:
+        return np.array(_parse_color(color)[:3], dtype=float)
+    except (ValueError, KeyError, TypeError):
+        return np.array(_parse_color(_PATH_DEFAULTS['color'])[:3])
+
+
+class _Canvas(object):
+    """
+    An RGB float image of a view of the map at an integer zoom, with the
+    projection of [lat, lng] points to its pixels.
+
+    """
+    def __init__(self, center, zoom, width, height):
+        self.zoom = zoom
+        self.width, self.height = width, height
+        self.scale = TILE_SIZE * 2 ** zoom
+        x, y = _web_mercator(np.array([center], dtype=float))
+        self.origin = (x[0] * self.scale - width / 2.,
+                       y[0] * self.scale - height / 2.)
+        self.pixels = np.empty((height, width, 3))
+        self.pixels[:] = np.array(_BACKGROUND) / 255.
+
+    def project(self, locations):
+        """Projects [lat, lng] points to pixel coordinates."""
+        locations = np.asarray(locations, dtype=float).reshape(-1, 2)
+        x, y = _web_mercator(locations)
+        return np.column_stack([x * self.scale - self.origin[0],
+                                y * self.scale - self.origin[1]])
+
+    def meters_to_pixels(self, meters, lat):
+        resolution = (_EQUATOR_RESOLUTION * math.cos(math.radians(lat)) /
+                      2 ** self.zoom)
+        return meters / resolution
+
+    def blend(self, mask, color, opacity):
+        """Paints the pixels of a boolean mask with a color and an
+        opacity."""
+        rows, cols = np.any(mask, axis=1), np.any(mask, axis=0)
+        if not rows.any() or opacity <= 0:
+            return
+        top, bottom = rows.argmax(), len(rows) - rows[::-1].argmax()
+        left, right = cols.argmax(), len(cols) - cols[::-1].argmax()
+        region = self.pixels[top:bottom, left:right]
+        alpha = (mask[top:bottom, left:right] *
+                 min(float(opacity), 1.))[:, :, None]
+        region *= 1 - alpha
+        region += alpha * _rgb(color)
+
+    def paste(self, rgba, top, left):
+        """Composes an RGBA uint8 image onto the canvas, clipped to it."""
+        h, w = rgba.shape[:2]
+        t, lt = max(top, 0), max(left, 0)
+        b, r = min(top + h, self.height), min(left + w, self.width)
+        if t >= b or lt >= r:
+            return
+        image = rgba[t - top:b - top, lt - left:r - left].astype(float) / 255.
+        alpha = image[:, :, 3:]
+        region = self.pixels[t:b, lt:r]
+        region *= 1 - alpha
+        region += alpha * image[:, :, :3]
+
+    def polygon_mask(self, rings):
+        """
+        The mask of the pixels whose center is inside polygons, with the
+        even-odd rule over all the rings, computed by counting the crossings
+        of every row with every edge at once.
+
+        """
+        edges = [np.column_stack([ring, np.roll(ring, -1, axis=0)])
+                 for ring in rings if len(ring) > 2]
+        mask = np.zeros((self.height, self.width), bool)
+        if not edges:
+            return mask
+        x0, y0, x1, y1 = np.concatenate(edges).T
+        rows = np.arange(self.height) + 0.5
+        crosses = ((y0[:, None] <= rows) != (y1[:, None] <= rows))
+        edge, row = np.nonzero(crosses)
+        if not len(edge):
+            return mask
+        t = (rows[row] - y0[edge]) / (y1[edge] - y0[edge])
+        x = x0[edge] + t * (x1[edge] - x0[edge])
+        column = np.clip(np.ceil(x - 0.5), 0, self.width).astype(int)
+        counts = np.zeros((self.height, self.width + 1), int)
+        np.add.at(counts, (row, column), 1)
+        return (np.cumsum(counts, axis=1)[:, :self.width] % 2).astype(bool)
+
+    def stroke_mask(self, lines, weight):
+        """The mask of the pixels closer than weight / 2 to polylines."""
+        mask = np.zeros((self.height, self.width), bool)
+        r = max(float(weight), 1.) / 2.
+        for line in lines:
+            for (x0, y0), (x1, y1) in zip(line[:-1], line[1:]):
+                left = int(max(math.floor(min(x0, x1) - r), 0))
+                right = int(min(math.ceil(max(x0, x1) + r), self.width))
+                top = int(max(math.floor(min(y0, y1) - r), 0))
+                bottom = int(min(math.ceil(max(y0, y1) + r), self.height))
+                if left >= right or top >= bottom:
+                    continue
+                yy, xx = np.mgrid[top:bottom, left:right] + 0.5
+                dx, dy = x1 - x0, y1 - y0
+                length2 = dx * dx + dy * dy
+                t = (np.clip(((xx - x0) * dx + (yy - y0) * dy) / length2, 0, 1)
+                     if length2 else 0.)
+                d2 = (xx - x0 - t * dx) ** 2 + (yy - y0 - t * dy) ** 2
+                mask[top:bottom, left:right] |= d2 <= r * r
+        return mask
+
+    def disc_mask(self, center, radius):
+        mask = np.zeros((self.height, self.width), bool)
+        left = int(max(math.floor(center[0] - radius), 0))
+        right = int(min(math.ceil(center[0] + radius), self.width))
+        top = int(max(math.floor(center[1] - radius), 0))
+        bottom = int(min(math.ceil(center[1] + radius), self.height))
+        if left < right and top < bottom:
+            yy, xx = np.mgrid[top:bottom, left:right] + 0.5
+            mask[top:bottom, left:right] = (
+                (xx - center[0]) ** 2 + (yy - center[1]) ** 2 <= radius ** 2)
+        return mask
+
+    def draw_path(self, lines, options, closed):
+        """Draws polylines, or polygons if closed, with Leaflet path
+        options."""
+        style = dict(_PATH_DEFAULTS, **options)
+        lines = [self.project(line) for line in lines if len(line)]
+        if closed and style.get('fill'):
+            self.blend(self.polygon_mask(lines),
+                       style.get('fillColor') or style['color'],
+                       style.get('fillOpacity', 0.2))
+        if style.get('stroke', True):
+            if closed:
+                lines = [np.vstack([line, line[:1]]) for line in lines]
+            self.blend(self.stroke_mask(lines, style.get('weight', 3)),
+                       style['color'], style.get('opacity', 1.))
+
+    def draw_circle(self, location, radius, options):
+        """Draws a circle of a radius in pixels."""
+        style = dict(_PATH_DEFAULTS, **options)
+        center = self.project([location])[0]
+        if style.get('fill'):
+            self.blend(self.disc_mask(center, radius),
+                       style.get('fillColor') or style['color'],
+                       style.get('fillOpacity', 0.2))
+        if style.get('stroke', True):
+            weight = max(float(style.get('weight', 3)), 1.)
+            ring = (self.disc_mask(center, radius + weight / 2.) &
+                    ~self.disc_mask(center, radius - weight / 2.))
+            self.blend(ring, style['color'], style.get('opacity', 1.))
+
+    def draw_marker(self, location):
+        """Draws a pin like Leaflet's default marker icon, anchored at its
+        tip."""
+        x, y = self.project([location])[0]
+        angles = np.linspace(0, np.pi, 16)
+        head = np.column_stack([x + 12 * np.cos(angles),
+                                y - 28 - 12 * np.sin(angles)])
+        pin = np.vstack([[[x, y]], head])
+        self.blend(self.polygon_mask([pin]), _MARKER_COLOR, 1.)
+        self.blend(self.stroke_mask([np.vstack([pin, pin[:1]])], 1),
+                   _MARKER_OUTLINE, 1.)
+        self.blend(self.disc_mask((x, y - 28), 4.5), 'white', 1.)
+
+    def draw_geojson(self, data, style_function):
+        """Draws the features of a GeoJSON, styled like Leaflet's."""
+        if data.get('type') == 'FeatureCollection':
+            features = data.get('features', [])
+        elif data.get('type') == 'Feature':
+            features = [data]
+        else:
+            features = [{'type': 'Feature', 'geometry': data}]
+        for feature in features:
+            style = dict(feature.get('properties', {}).get('style') or {})
+            style.update(style_function(feature) if style_function else {})
+            self._draw_geometry(feature.get('geometry') or {}, style)
+
+    def _draw_geometry(self, geometry, style):
+        kind = geometry.get('type')
+        coordinates = geometry.get('coordinates', [])
+
+        def latlng(points):
+            return np.asarray(points, dtype=float).reshape(-1, 2)[:, ::-1]
+
+        if kind == 'GeometryCollection':
+            for child in geometry.get('geometries', []):
+                self._draw_geometry(child, style)
+        elif kind == 'Point':
+            self.draw_marker(latlng(coordinates)[0])
+        elif kind == 'MultiPoint':
+            for point in latlng(coordinates):
+                self.draw_marker(point)
+        elif kind in ('LineString', 'MultiLineString'):
+            lines = [coordinates] if kind == 'LineString' else coordinates
+            self.draw_path([latlng(line) for line in lines], style,
+                           closed=False)
+        elif kind in ('Polygon', 'MultiPolygon'):
+            polygons = [coordinates] if kind == 'Polygon' else coordinates
+            style = dict({'fill': True}, **style)
+            for rings in polygons:
+                self.draw_path([latlng(ring) for ring in rings], style,
+                               closed=True)
+
+    def draw_image(self, rgba, bounds):
+        """Draws an RGBA image stretched over [[south, west], [north, east]],
+        sampling the nearest pixel of the image."""
+        (left, top), (right, bottom) = self.project(
+            [[bounds[1][0], bounds[0][1]], [bounds[0][0], bounds[1][1]]])
+        x0, x1 = int(max(math.floor(left), 0)), int(min(math.ceil(right), self.width))
+        y0, y1 = int(max(math.floor(top), 0)), int(min(math.ceil(bottom), self.height))
+        if x0 >= x1 or y0 >= y1:
+            return
+        h, w = rgba.shape[:2]
+        cols = ((np.arange(x0, x1) + 0.5 - left) / (right - left) * w).astype(int)
+        rows = ((np.arange(y0, y1) + 0.5 - top) / (bottom - top) * h).astype(int)
+        self.paste(rgba[np.clip(rows, 0, h - 1)][:, np.clip(cols, 0, w - 1)],
+                   y0, x0)
+
+
+def _tile_source(tiles, tile_cache, subdomains='abc', options=None):
+    """
+    Returns a function reading the PNG bytes of the tile (z, x, y), or None
+    if it is missing, from a local directory, a local path template, or a
+    URL template fetched with requests and optionally cached in a
+    directory.
+
+    The {s}, {z}, {x}, {y}, {-y} and {r} placeholders of the template are
+    substituted like Leaflet does, the others from `options`, the options
+    of the tile layer.
+
+    """
+    if os.path.isdir(tiles):
+        tiles = os.path.join(tiles, '{z}', '{x}', '{y}.png')
+    remote = tiles.startswith('http://') or tiles.startswith('https://')
+    values = {key: str(value) for key, value in (options or {}).items()
+              if value is not None and not isinstance(value, (dict, list))}
+    unknown = sorted(set(_PLACEHOLDER.findall(tiles)) - set(values) -
+                     set(['s', 'z', 'x', 'y', '-y', 'r']))
+    if unknown:
+        raise ValueError('Unsupported placeholders in the tiles template: '
+                         '{}.'.format(', '.join('{%s}' % key for key in unknown)))
+    subdomains = list(subdomains)
+
+    def read(z, x, y):
+        if tile_cache is not None:
+            cached = os.path.join(tile_cache, str(z), str(x), '{}.png'.format(y))
+            if os.path.isfile(cached):
+                with open(cached, 'rb') as f:
+                    return f.read()
+        keys = dict(values, z=str(z), x=str(x), y=str(y), r='')
+        keys['-y'] = str(2 ** z - 1 - y)
+        keys['s'] = subdomains[(x + y) % len(subdomains)] if subdomains else ''
+        path = _PLACEHOLDER.sub(lambda match: keys[match.group(1)], tiles)
+        if remote:
+            import requests
+            try:
+                response = requests.get(path, timeout=10,
+                                        headers={'User-Agent': 'folium'})
+            except requests.RequestException:
+                return None
+            if response.status_code != 200:
+                return None
+            data = response.content
+            if tile_cache is not None:
+                if not os.path.isdir(os.path.dirname(cached)):
+                    os.makedirs(os.path.dirname(cached))
+                with open(cached, 'wb') as f:
+                    f.write(data)
+            return data
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+    return read
+
+
+def _draw_tiles(canvas, read_tile):
+    n = 2 ** canvas.zoom
+    left, top = canvas.origin
+    for ty in range(int(math.floor(top / TILE_SIZE)),
+                    int(math.floor((top + canvas.height - 1) / TILE_SIZE)) + 1):
+        if not 0 <= ty < n:
+            continue
+        for tx in range(int(math.floor(left / TILE_SIZE)),
+                        int(math.floor((left + canvas.width - 1) / TILE_SIZE)) + 1):
+            data = read_tile(canvas.zoom, tx % n, ty)
+            if data is None:
+                continue
+            try:
+                rgba = _decode_png(data)
+            except Exception:
+                continue
+            canvas.paste(rgba, int(round(ty * TILE_SIZE - top)),
+                         int(round(tx * TILE_SIZE - left)))
+
+
+def _read_image_url(url):
+    """Decodes the image of an ImageOverlay, embedded as a data URL or a
+    local file, or returns None."""
+    if url.startswith('data:'):
+        header, _, payload = url.partition(',')
+        data = (base64.b64decode(payload) if header.endswith(';base64')
+                else unquote(payload).encode('latin-1'))
+    elif os.path.isfile(url):
+        with open(url, 'rb') as f:
+            data = f.read()
+    else:
+        return None
+    try:
+        return _decode_png(data)
+    except Exception:
+        return None
+
+
+def _walk(element):
+    for child in element._children.values():
+        yield child
+        for descendant in _walk(child):
+            yield descendant
+
+
+def render_image(m, width=512, height=384, zoom=None, location=None,
+                 tiles=None, tile_cache=None, subdomains='abc'):
+    """
+    Rasterizes a map to an RGBA array, without a browser.
+
+    The view is centered on the map location, at its starting zoom rounded
+    to an integer. Markers are drawn as pins, and Circle, CircleMarker,
+    PolyLine, Polygon, Rectangle, GeoJson and ImageOverlay children are
+    drawn with their stroke and fill options. Other children, like popups,
+    plugins and controls, are ignored.
+
+    Parameters
+    ----------
+    m: folium.Map
+        The map to render.
+    width, height: int, default 512, 384
+        Size of the image in pixels.
+    zoom: int, default None
+        Zoom of the view, the map's `zoom_start` if None.
+    location: list of float, default None
+        Center [lat, lng] of the view, the map's location if None.
+    tiles: str, default None
+        Where to read the tiles from: a local directory with a
+        {z}/{x}/{y}.png layout, a local path template, or a URL template
+        like 'https://tile.openstreetmap.org/{z}/{x}/{y}.png'. If None,
+        the URL of the first tile layer of the map is used.
+    tile_cache: str, default None
+        Directory where fetched tiles are stored and looked up first.
+    subdomains: list of strings, default 'abc'
+        Values of the {s} placeholder of `tiles`. Ignored if the tiles of
+        the map are used, which come with their own subdomains.
+
+    Returns
+    -------
+    numpy array of uint8 of shape (height, width, 4).
+
+    """
+    from folium.features import GeoJson
+    from folium.map import Marker
+    from folium.raster_layers import ImageOverlay, TileLayer
+    from folium.vector_layers import (Circle, CircleMarker, PolyLine,
+                                      Polygon, Rectangle)
+
+    zoom = int(round(m.zoom_start if zoom is None else zoom))
+    canvas = _Canvas(m.location if location is None else location, zoom,
+                     width, height)
+    children = list(_walk(m))
+
+    options = None
+    if tiles is None:
+        layers = [child for child in children if isinstance(child, TileLayer)]
+        if layers:
+            tiles, options = layers[0].tiles, json.loads(layers[0].options)
+            subdomains = options.pop('subdomains', subdomains)
+    if tiles is not None:
+        _draw_tiles(canvas, _tile_source(tiles, tile_cache, subdomains,
+                                         options))
+
+    markers = []
+    for child in children:
+        if isinstance(child, ImageOverlay):
+            rgba = _read_image_url(child.url)
+            if rgba is not None:
+                canvas.draw_image(rgba, child.bounds)
+        elif isinstance(child, GeoJson):
+            canvas.draw_geojson(child.data, child.style_function)
+        elif isinstance(child, (Circle, CircleMarker)):
+            options = json.loads(child.options)
+            radius = options.get('radius', 10)
+            if isinstance(child, Circle):
+                radius = canvas.meters_to_pixels(radius, child.location[0])
+            canvas.draw_circle(child.location, radius, options)
+        elif isinstance(child, Rectangle):
+            (south, west), (north, east) = child.location
+            canvas.draw_path([[[south, west], [north, west], [north, east],
+                               [south, east]]],
+                             dict({'fill': False}, **json.loads(child.options)),
+                             closed=True)
+        elif isinstance(child, (Polygon, PolyLine)):
+            lines = child.location
+            if np.ndim(lines) == 2 or not len(lines) or np.ndim(lines[0]) == 1:
+                lines = [lines]
+            canvas.draw_path(lines, json.loads(child.options),
+                             closed=isinstance(child, Polygon))
+        elif type(child) is Marker:
+            markers.append(child.location)
+
+    # Markers are drawn above the paths, like in Leaflet's marker pane.
+    for location in markers:
+        canvas.draw_marker(location)
+
+    alpha = np.ones((height, width, 1))
+    return (np.concatenate([canvas.pixels, alpha], axis=2) * 255
+            ).round().astype(np.uint8)
+
+
+def render_png(m, outfile=None, **kwargs):
+    """
+    Rasterizes a map to a PNG image, without a browser.
+
+    Parameters
+    ----------
+    m: folium.Map
+        The map to render.
+    outfile: str, default None
+        If given, the file the PNG is written to.
+    **kwargs
+        Passed to `render_image`: width, height, zoom, location, tiles,
+        tile_cache and subdomains.
+
+    Returns
+    -------
+    The PNG as bytes.
+
+    Examples
+    --------
+    >>> render_png(m, 'thumbnail.png', width=256, height=256,
+    ...            tiles='tiles/')
+
+    """
+    png = write_png(render_image(m, **kwargs))
+    if outfile is not None:
+        with open(outfile, 'wb') as f:
+            f.write(png)
+    return png
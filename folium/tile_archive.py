@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+
+"""
+Readers of the tiles of MBTiles and PMTiles files.
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import bisect
+import io
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import zlib
+
+
+class TileArchive(object):
+    """
+    Base class of the tile archives: a file holding the tiles of a tileset
+    and its metadata.
+
+    Attributes
+    ----------
+    path: str
+        Absolute path of the file.
+    format: str
+        Extension of the tiles: 'png', 'jpg', 'webp' or 'pbf'.
+    min_zoom, max_zoom: int
+        Zoom levels of the tiles.
+    bounds: list of list of float or None
+        Bounds [[south, west], [north, east]] of the tiles.
+    attribution: str or None
+        Attribution of the tileset.
+
+    """
+    path = None
+    format = 'png'
+    min_zoom = 0
+    max_zoom = 18
+    bounds = None
+    attribution = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_tile(self, z, x, y):
+        """Returns the bytes of the tile z/x/y, or None if it is missing."""
+        raise NotImplementedError
+
+    def tiles(self):
+        """Iterates over the tiles as (z, x, y, bytes)."""
+        raise NotImplementedError
+
+    def export(self, directory):
+        """Writes the tiles to a {z}/{x}/{y}.{format} directory tree, and
+        returns the number of tiles."""
+        count = 0
+        for z, x, y, data in self.tiles():
+            path = os.path.join(directory, str(z), str(x))
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            fname = os.path.join(path, '{}.{}'.format(y, self.format))
+            with open(fname, 'wb') as f:
+                f.write(data)
+            count += 1
+        return count
+
+    def close(self):
+        pass
+
+
+class MBTiles(TileArchive):
+    """
+    Reads the tiles of an MBTiles file, an SQLite database.
+
+    Each thread reading tiles uses its own query-only connection, which
+    maps the database in memory.
+
+    Parameters
+    ----------
+    path: str
+        Path of the MBTiles file.
+    mmap_size: int, default 256 MiB
+        Number of bytes of the database mapped in memory by each
+        connection.
+
+    """
+    def __init__(self, path, mmap_size=2 ** 28):
+        self.path = os.path.abspath(path)
+        if not os.path.isfile(self.path):
+            raise ValueError('No such file: {!r}.'.format(path))
+        self.mmap_size = int(mmap_size)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+        metadata = dict(self._connection().execute(
+            'SELECT name, value FROM metadata'))
+        self.metadata = metadata
+        self.format = {'jpeg': 'jpg'}.get(metadata.get('format'),
+                                          metadata.get('format', 'png'))
+        self.attribution = metadata.get('attribution')
+        zooms = self._connection().execute(
+            'SELECT MIN(zoom_level), MAX(zoom_level) FROM tiles').fetchone()
+        self.min_zoom = int(metadata.get('minzoom', zooms[0] or 0))
+        self.max_zoom = int(metadata.get('maxzoom', zooms[1] or 0))
+        if 'bounds' in metadata:
+            west, south, east, north = [
+                float(value) for value in metadata['bounds'].split(',')]
+            self.bounds = [[south, west], [north, east]]
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Opening URIs, with mode=ro, needs Python 3.
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute('PRAGMA query_only=ON')
+            connection.execute('PRAGMA mmap_size={}'.format(self.mmap_size))
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def get_tile(self, z, x, y):
+        # The rows of MBTiles are numbered from the south, like in TMS.
+        row = self._connection().execute(
+            'SELECT tile_data FROM tiles WHERE zoom_level=? AND '
+            'tile_column=? AND tile_row=?', (z, x, (1 << z) - 1 - y)
+        ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def tiles(self):
+        rows = self._connection().execute(
+            'SELECT zoom_level, tile_column, tile_row, tile_data FROM tiles')
+        for z, x, y, data in rows:
+            yield z, x, (1 << z) - 1 - y, bytes(data)
+
+    def close(self):
+        with self._lock:
+            while self._connections:
+                self._connections.pop().close()
+        self._local = threading.local()
+
+
+def _rotate(n, x, y, rx, ry):
+    if ry == 0:
+        if rx != 0:
+            x = n - 1 - x
+            y = n - 1 - y
+        x, y = y, x
+    return x, y
+
+
+def zxy_to_tile_id(z, x, y):
+    """The PMTiles id of the tile z/x/y: its index along the Hilbert curves
+    of the zoom levels."""
+    tile_id = ((1 << (2 * z)) - 1) // 3
+    for a in range(z - 1, -1, -1):
+        s = 1 << a
+        rx, ry = s & x, s & y
+        tile_id += ((3 * rx) ^ ry) << a
+        x, y = _rotate(s, x, y, rx, ry)
+    return tile_id
+
+
+def tile_id_to_zxy(tile_id):
+    """Inverse of `zxy_to_tile_id`."""
+    z, first = 0, 0
+    while first + (1 << (2 * z)) <= tile_id:
+        first += 1 << (2 * z)
+        z += 1
+    t, x, y, s = tile_id - first, 0, 0, 1
+    while s < (1 << z):
+        rx = 1 & (t // 2)
+        ry = 1 & (t ^ rx)
+        x, y = _rotate(s, x, y, rx, ry)
+        x, y = x + s * rx, y + s * ry
+        t //= 4
+        s *= 2
+    return z, x, y
+
+
+def _read_varint(stream):
+    value, shift = 0, 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            raise ValueError('Truncated PMTiles directory.')
+        byte = ord(byte)
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value
+        shift += 7
+
+
+def _decompress(data, compression):
+    if compression in (0, 1):
+        return data
+    if compression == 2:
+        return zlib.decompress(data, 16 + zlib.MAX_WBITS)
+    raise ValueError('Unsupported PMTiles compression: {}. Only gzip is '
+                     'supported.'.format(compression))
+
+
+# Fields of the 127 bytes header of PMTiles version 3.
+_PMTILES_HEADER = struct.Struct('<7sB11Q6B4iB2i')
+_PMTILES_FORMATS = {1: 'pbf', 2: 'png', 3: 'jpg', 4: 'webp', 5: 'avif'}
+
+
+class PMTiles(TileArchive):
+    """
+    Reads the tiles of a PMTiles (version 3) file.
+
+    The file is mapped in memory, and its directories are decoded once and
+    kept.
+
+    Parameters
+    ----------
+    path: str
+        Path of the PMTiles file.
+
+    """
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        fields = _PMTILES_HEADER.unpack(self._mmap[:_PMTILES_HEADER.size])
+        if fields[0] != b'PMTiles' or fields[1] != 3:
+            raise ValueError('{!r} is not a PMTiles version 3 file.'
+                             .format(path))
+        (root_offset, root_length, metadata_offset, metadata_length,
+         self._leaf_offset, _, self._data_offset) = fields[2:9]
+        (_, self._compression, self._tile_compression, tile_type,
+         self.min_zoom, self.max_zoom) = fields[13:19]
+        west, south, east, north = [value / 1e7 for value in fields[19:23]]
+        self.bounds = [[south, west], [north, east]]
+        self.format = _PMTILES_FORMATS.get(tile_type, 'png')
+        self.metadata = {}
+        if metadata_length:
+            self.metadata = json.loads(self._read(
+                metadata_offset, metadata_length,
+                self._compression).decode('utf-8'))
+        self.attribution = self.metadata.get('attribution')
+        self._directories = {}
+        self._lock = threading.Lock()
+        self._root = self._directory(root_offset, root_length)
+
+    def _read(self, offset, length, compression):
+        return _decompress(self._mmap[offset:offset + length], compression)
+
+    def _directory(self, offset, length):
+        """Decodes a directory into lists of tile ids, run lengths, lengths
+        and offsets."""
+        key = (offset, length)
+        with self._lock:
+            if key in self._directories:
+                return self._directories[key]
+        stream = io.BytesIO(self._read(offset, length, self._compression))
+        n = _read_varint(stream)
+        tile_ids, last = [], 0
+        for _ in range(n):
+            last += _read_varint(stream)
+            tile_ids.append(last)
+        run_lengths = [_read_varint(stream) for _ in range(n)]
+        lengths = [_read_varint(stream) for _ in range(n)]
+        offsets = []
+        for i in range(n):
+            value = _read_varint(stream)
+            if value == 0 and i > 0:
+                offsets.append(offsets[-1] + lengths[i - 1])
+            else:
+                offsets.append(value - 1)
+        directory = (tile_ids, run_lengths, lengths, offsets)
+        with self._lock:
+            self._directories[key] = directory
+        return directory
+
+    def get_tile(self, z, x, y):
+        tile_id = zxy_to_tile_id(z, x, y)
+        directory = self._root
+        # The leaf directories are at most a few levels deep.
+        for _ in range(4):
+            tile_ids, run_lengths, lengths, offsets = directory
+            i = bisect.bisect_right(tile_ids, tile_id) - 1
+            if i < 0:
+                return None
+            if run_lengths[i] == 0:
+                directory = self._directory(self._leaf_offset + offsets[i],
+                                            lengths[i])
+            elif tile_id < tile_ids[i] + run_lengths[i]:
+                return self._read(self._data_offset + offsets[i], lengths[i],
+                                  self._tile_compression)
+            else:
+                return None
+        return None
+
+    def _entries(self, directory):
+        tile_ids, run_lengths, lengths, offsets = directory
+        for entry in zip(tile_ids, run_lengths, lengths, offsets):
+            if entry[1] == 0:
+                for leaf_entry in self._entries(self._directory(
+                        self._leaf_offset + entry[3], entry[2])):
+                    yield leaf_entry
+            else:
+                yield entry
+
+    def tiles(self):
+        for tile_id, run_length, length, offset in self._entries(self._root):
+            data = self._read(self._data_offset + offset, length,
+                              self._tile_compression)
+            for i in range(run_length):
+                z, x, y = tile_id_to_zxy(tile_id + i)
+                yield z, x, y, data
+
+    def close(self):
+        self._mmap.close()
+
+
+def open_archive(path):
+    """Opens an MBTiles or a PMTiles file, recognized by its content."""
+    with open(path, 'rb') as f:
+        magic = f.read(16)
+    if magic.startswith(b'PMTiles'):
+        return PMTiles(path)
+    if magic.startswith(b'SQLite format 3'):
+        return MBTiles(path)
+    raise ValueError('{!r} is neither an MBTiles nor a PMTiles file.'
+                     .format(path))
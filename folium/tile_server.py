@@ -0,0 +1,482 @@
+# -*- coding: utf-8 -*-
+
+"""
+A local tile server caching the tiles of remote tile layers on disk.
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import atexit
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from string import Formatter
+
+from folium.utilities import _web_mercator
+
+import numpy as np
+
+from six.moves import BaseHTTPServer, socketserver
+
+
+class TileCache(object):
+    """
+    A cache of tiles on disk, with a least recently used eviction.
+
+    The tiles are stored as files under `directory`, so that the cache is
+    kept between processes. Reading a tile updates its modification time,
+    which orders the tiles for eviction when the cache is opened again.
+
+    Parameters
+    ----------
+    directory: str
+        Directory of the cache, created if it does not exist.
+    max_bytes: int, default None
+        Maximum total size of the tiles; the least recently used tiles are
+        removed above it. Unlimited if None.
+
+    """
+    def __init__(self, directory, max_bytes=None):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._index = OrderedDict()
+        self._lock = threading.Lock()
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for fname in files:
+                if fname.endswith('.tmp'):
+                    # Being written by a `put`, or left by an interrupted
+                    # one: not a tile.
+                    continue
+                path = os.path.join(root, fname)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self._index[path] = size
+            self.size += size
+        with self._lock:
+            self._evict()
+
+    def __len__(self):
+        return len(self._index)
+
+    def _path(self, key):
+        return os.path.join(self.directory, *[str(part) for part in key])
+
+    def get(self, key):
+        """Returns the bytes of the tile (layer, z, x, y), or None if it is
+        not cached."""
+        path = self._path(key)
+        with self._lock:
+            if path not in self._index:
+                return None
+            self._index[path] = self._index.pop(path)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path, None)
+        except (IOError, OSError):
+            with self._lock:
+                self.size -= self._index.pop(path, 0)
+            return None
+        return data
+
+    def put(self, key, data):
+        """Stores the bytes of the tile (layer, z, x, y)."""
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory)
+        except OSError:
+            if not os.path.isdir(directory):
+                raise
+        # Written to a temporary file first, so that readers never see a
+        # partial tile.
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        getattr(os, 'replace', os.rename)(tmp, path)
+        with self._lock:
+            self.size += len(data) - self._index.pop(path, 0)
+            self._index[path] = len(data)
+            self._evict()
+
+    def _evict(self):
+        while (self.max_bytes is not None and self.size > self.max_bytes and
+               self._index):
+            path, size = self._index.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _http_get(url, timeout):
+    """Fetches a tile, returns its bytes or None if it is unavailable."""
+    import requests
+
+    try:
+        response = requests.get(url, timeout=timeout,
+                                headers={'User-Agent': 'folium'})
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    return response.content
+
+
+def _content_type(data):
+    if data.startswith(b'\x89PNG'):
+        return 'image/png'
+    if data.startswith(b'\xff\xd8'):
+        return 'image/jpeg'
+    if data[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'application/octet-stream'
+
+
+def tile_range(bounds, zoom):
+    """
+    The tiles covering bounds [[south, west], [north, east]] at a zoom, as
+    ranges of x and y tile coordinates.
+
+    """
+    (south, west), (north, east) = bounds
+    x, y = _web_mercator(np.array([[north, west], [south, east]], dtype=float))
+    n = 2 ** zoom
+    x0, x1 = (np.clip(np.floor(x * n), 0, n - 1).astype(int)).tolist()
+    y0, y1 = (np.clip(np.floor(y * n), 0, n - 1).astype(int)).tolist()
+    return range(x0, x1 + 1), range(y0, y1 + 1)
+
+
+_tile_path = re.compile(r'^/(\w+)/(\d+)/(\d+)/(\d+)(@2x)?$')
+
+
+class TileServer(object):
+    """
+    Serves tiles over HTTP from background threads of the current process.
+
+    Tile archives, like MBTiles and PMTiles files, are served with
+    `add_archive`, for instance by `LocalTileLayer`. The maps only load
+    their tiles while the server runs.
+
+    Parameters
+    ----------
+    host: str, default '127.0.0.1'
+        Address the server listens on.
+    port: int, default 0
+        Port the server listens on, a free port if 0. Maps saved to files
+        need the same port the next time the server is started.
+
+    """
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self._archives = {}
+        self._server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def start(self):
+        """Starts the server, if it is not running."""
+        if self._server is not None:
+            return self
+        tile_server = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+            def do_GET(self):
+                match = _tile_path.match(self.path.split('?')[0])
+                data = None
+                if match is not None:
+                    layer, z, x, y, retina = match.groups()
+                    data = tile_server.get_tile(layer, int(z), int(x),
+                                                int(y), retina or '')
+                if data is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', _content_type(data))
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('Cache-Control', 'max-age=86400')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+            daemon_threads = True
+
+        self._server = Server((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        thread = threading.Thread(target=self._server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    @property
+    def url(self):
+        """Base URL of the server."""
+        return 'http://{}:{}'.format(self.host, self.port)
+
+    def _template(self, layer):
+        self.start()
+        return '{}/{}/{{z}}/{{x}}/{{y}}{{r}}'.format(self.url, layer)
+
+    def add_archive(self, archive):
+        """
+        Starts serving the tiles of a `folium.tile_archive.TileArchive`,
+        and returns their URL template.
+
+        """
+        layer = _archive_id(archive)
+        self._archives[layer] = archive
+        return self._template(layer)
+
+    def get_tile(self, layer, z, x, y, r=''):
+        """Returns the bytes of a tile, or None if it is unavailable."""
+        archive = self._archives.get(layer)
+        if archive is None:
+            return None
+        return archive.get_tile(z, x, y)
+
+    def close(self):
+        """Stops the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _archive_id(archive):
+    return hashlib.sha1(archive.path.encode('utf-8')).hexdigest()[:16]
+
+
+def _default_cache_dir():
+    """Returns the tiles directory of the user cache, created private to the
+    user. Raises a ValueError if it is writable by other users."""
+    cache_home = (os.environ.get('XDG_CACHE_HOME') or
+                  os.path.join(os.path.expanduser('~'), '.cache'))
+    directory = os.path.join(cache_home, 'folium', 'tiles')
+    if not os.path.isdir(directory):
+        os.makedirs(directory, 0o700)
+    if hasattr(os, 'getuid'):
+        stat = os.stat(directory)
+        if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+            raise ValueError(
+                'The tile cache {} is not owned by the user or is writable by '
+                'other users, pass another cache_dir.'.format(directory))
+    return directory
+
+
+class TileProxy(TileServer):
+    """
+    Serves the tiles of remote tile layers from a local disk cache.
+
+    The tile layers registered with the proxy, for instance by passing it to
+    `TileLayer` or `Map` as `tile_proxy`, request their tiles from the
+    proxy, which fetches each tile once and then serves it from the cache.
+    Concurrent requests for the same tile, from several browsers or
+    screenshots, are coalesced into one fetch. Tile archives can be served
+    too, see `TileServer`.
+
+    Parameters
+    ----------
+    cache_dir: str, default None
+        Directory of the tile cache. By default, the 'folium/tiles'
+        directory of the user cache, `$XDG_CACHE_HOME` or '~/.cache',
+        shared by the processes of the user.
+    max_bytes: int, default None
+        Maximum size of the cache, unlimited if None.
+    host: str, default '127.0.0.1'
+        Address the server listens on.
+    port: int, default 0
+        Port the server listens on, a free port if 0. Maps saved to files
+        need the same port the next time the proxy is started.
+    timeout: float, default 10
+        Timeout of the requests to the tile servers, in seconds.
+    fetch: callable, default None
+        Function called with a URL and the timeout, returning the bytes of
+        the tile or None. By default, the tiles are fetched with requests.
+
+    Examples
+    --------
+    >>> proxy = TileProxy(max_bytes=500 * 2 ** 20)
+    >>> m = folium.Map(location=[45.5, -122.7], tile_proxy=proxy)
+    >>> proxy.seed('OpenStreetMap', [[45, -123], [46, -122]], 0, 12)
+
+    """
+    def __init__(self, cache_dir=None, max_bytes=None, host='127.0.0.1',
+                 port=0, timeout=10, fetch=None):
+        super(TileProxy, self).__init__(host=host, port=port)
+        if cache_dir is None:
+            cache_dir = _default_cache_dir()
+        self.cache = TileCache(cache_dir, max_bytes=max_bytes)
+        self.timeout = timeout
+        self._fetch = fetch or _http_get
+        self._sources = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _layer_id(self, tiles, subdomains='abc'):
+        """Registers a URL template, and returns the name of its directory
+        in the cache."""
+        from folium.raster_layers import _builtin_tiles
+
+        builtin = _builtin_tiles(tiles)
+        if builtin is not None:
+            tiles = builtin[0]
+        fields = set(field for _, field, _, _ in Formatter().parse(tiles)
+                     if field is not None)
+        if not fields <= set('szxyr'):
+            raise ValueError('Only the {{s}}, {{z}}, {{x}}, {{y}} and {{r}} '
+                             'placeholders of URL templates can be proxied, '
+                             'got {!r}.'.format(tiles))
+        layer = hashlib.sha1(tiles.encode('utf-8')).hexdigest()[:16]
+        self._sources[layer] = (tiles, list(subdomains))
+        return layer
+
+    def register(self, tiles, subdomains='abc'):
+        """
+        Starts serving the tiles of a Leaflet URL template, and returns the
+        URL template of the proxied tiles. Templates with other placeholders
+        than {s}, {z}, {x}, {y} and {r} raise a ValueError.
+
+        """
+        return self._template(self._layer_id(tiles, subdomains))
+
+    def get_tile(self, layer, z, x, y, r=''):
+        """Returns the bytes of a tile from the cache, fetching it if it is
+        missing, or None if it is unavailable."""
+        if layer in self._archives:
+            return self._archives[layer].get_tile(z, x, y)
+        key = (layer, z, x, '{}{}'.format(y, r))
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+        if layer not in self._sources:
+            return None
+        with self._lock:
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = [threading.Event(), None]
+        if not owner:
+            pending[0].wait()
+            return pending[1]
+        try:
+            tiles, subdomains = self._sources[layer]
+            url = tiles.format(
+                s=subdomains[(x + y) % len(subdomains)] if subdomains else '',
+                z=z, x=x, y=y, r=r)
+            data = self._fetch(url, self.timeout)
+            if data is not None:
+                self.cache.put(key, data)
+            pending[1] = data
+            return data
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            pending[0].set()
+
+    def seed(self, tiles, bounds, min_zoom, max_zoom, subdomains='abc',
+             threads=4):
+        """
+        Fetches ahead of time the tiles of a layer within bounds
+        [[south, west], [north, east]], for zooms `min_zoom` to `max_zoom`.
+
+        Returns the number of tiles available in the cache.
+
+        """
+        layer = self._layer_id(tiles, subdomains)
+        keys = []
+        for z in range(min_zoom, max_zoom + 1):
+            xs, ys = tile_range(bounds, z)
+            keys.extend((z, x, y) for x in xs for y in ys)
+
+        def get(key):
+            return self.get_tile(layer, *key) is not None
+
+        pool = ThreadPool(max(int(threads), 1))
+        try:
+            return sum(pool.map(get, keys))
+        finally:
+            pool.close()
+            pool.join()
+
+
+_default_server = None
+
+
+def get_default_server():
+    """The server of the tile archives of the `LocalTileLayer`, kept
+    running until the interpreter exits."""
+    global _default_server
+    if _default_server is None:
+        _default_server = TileServer()
+        atexit.register(_default_server.close)
+    return _default_server
+
+
+def _walk(element):
+    for child in element._children.values():
+        yield child
+        for descendant in _walk(child):
+            yield descendant
+
+
+def save_offline(m, outfile, tiles_dir=None):
+    """
+    Saves a map with the tiles of its `LocalTileLayer` layers, so that it
+    can be viewed without any server.
+
+    The tiles of the archives are written to a directory next to the HTML
+    file, which the layers reference with relative URLs. Copy the HTML
+    file and the directory together.
+
+    Parameters
+    ----------
+    m: folium.Map
+        The map to save.
+    outfile: str
+        Path of the HTML file.
+    tiles_dir: str, default None
+        Name of the directory of the tiles, relative to the HTML file. By
+        default, the name of the HTML file with a '_tiles' suffix.
+
+    Returns
+    -------
+    The number of tiles written.
+
+    """
+    from folium.raster_layers import LocalTileLayer
+
+    root = os.path.dirname(os.path.abspath(outfile))
+    if tiles_dir is None:
+        tiles_dir = os.path.splitext(os.path.basename(outfile))[0] + '_tiles'
+    layers = [child for child in _walk(m) if isinstance(child, LocalTileLayer)]
+    count, templates = 0, []
+    for layer in layers:
+        layer_id = _archive_id(layer.archive)
+        count += layer.archive.export(os.path.join(root, tiles_dir, layer_id))
+        templates.append(layer.tiles)
+        layer.tiles = '/'.join([tiles_dir.replace(os.sep, '/'), layer_id,
+                                '{z}/{x}/{y}.' + layer.archive.format])
+    try:
+        m.save(outfile)
+    finally:
+        for layer, tiles in zip(layers, templates):
+            layer.tiles = tiles
+    return count
@@ -10,9 +10,10 @@ import tempfile
 import zlib
 from contextlib import contextmanager
 import copy
-import uuid
 import collections
 
+from folium.elements import _new_id
+
 import numpy as np
 
 from six import binary_type, text_type
@@ -70,6 +71,139 @@ def _isnan(values):
     return any(math.isnan(value) for value in _flatten(values))
 
 
+def _as_float_array(values, name='data'):
+    """Converts a list, NumPy array or pandas object to a float array,
+    checking for NaNs and infinite values with a single vectorized test."""
+    if hasattr(values, 'iloc'):
+        # This is a pd.DataFrame or pd.Series.
+        values = values.values
+    arr = np.asarray(values, dtype=float)
+    if not np.isfinite(arr).all():
+        raise ValueError('{} cannot contain NaNs or infinite '
+                         'values.'.format(name))
+    return arr
+
+
+def _validate_coordinate_array(locations, name='locations', min_columns=2):
+    """Validates an array of points of shape (n, 2) or more columns."""
+    arr = _as_float_array(locations, name=name)
+    if arr.ndim != 2 or arr.shape[1] < min_columns:
+        raise ValueError('{} must have shape (n, {}), got {}.'
+                         .format(name, min_columns, arr.shape))
+    return arr
+
+
+def _factorize(values):
+    """
+    Encodes a column of values as a list of unique values and an array of
+    integer codes pointing into that list. Missing values (None or NaN)
+    get the code -1. Unhashable values, like lists or dicts, are compared
+    by their JSON serialization.
+
+    """
+    if hasattr(values, 'iloc'):
+        values = values.values
+    uniques, codes, lookup = [], [], {}
+    for value in values:
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            codes.append(-1)
+            continue
+        key = value
+        try:
+            code = lookup.get(key)
+        except TypeError:
+            if isinstance(value, np.ndarray):
+                value = value.tolist()
+            # Tagged, to not collide with a string equal to the JSON.
+            key = (_factorize, json.dumps(value, sort_keys=True))
+            code = lookup.get(key)
+        if code is None:
+            code = lookup[key] = len(uniques)
+            uniques.append(value)
+        codes.append(code)
+    return uniques, np.array(codes, dtype=int)
+
+
+def _to_json(obj):
+    """Compact JSON that can safely be embedded in a <script> tag."""
+    if isinstance(obj, np.ndarray):
+        obj = obj.tolist()
+    return json.dumps(obj, separators=(',', ':')).replace('</', '<\\/')
+
+
+def _encode_numbers(arr, precision=None):
+    """Serializes a numeric array as a flat compact JSON list, rounding the
+    values to `precision` decimals."""
+    arr = np.asarray(arr).ravel()
+    if precision is not None:
+        arr = np.round(arr, precision)
+    return _to_json(arr)
+
+
+def _split_coordinate_columns(data, name='data'):
+    """
+    Splits rows of the form [lat, lng, extra...] into a float array of
+    shape (n, 2) and the list of the extra values of each row, or None
+    when there are no extra columns. Accepts lists, NumPy arrays and
+    pandas DataFrames, and checks for NaNs with a single vectorized test.
+
+    """
+    if hasattr(data, 'iloc'):
+        coordinates = data.iloc[:, :2].values
+        extras = data.iloc[:, 2:].values.tolist() if data.shape[1] > 2 else None
+    else:
+        try:
+            arr = np.asarray(data, dtype=float)
+        except (TypeError, ValueError):
+            # Ragged rows or non-numeric extra columns.
+            arr = None
+        if arr is not None and arr.ndim == 2:
+            coordinates = arr[:, :2]
+            extras = arr[:, 2:].tolist() if arr.shape[1] > 2 else None
+        else:
+            coordinates = [row[:2] for row in data]
+            extras = [list(row[2:]) for row in data]
+            if not any(extras):
+                extras = None
+    coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+    if np.isnan(coordinates).any():
+        raise ValueError('Location values cannot contain NaNs, '
+                         'got NaNs in {}.'.format(name))
+    return coordinates, extras
+
+
+def _delta_encode(arr, precision=6):
+    """
+    Encodes an array of shape (n, k) as the base64 string of little-endian
+    Int32 values: the values are multiplied by 10 ** precision, rounded,
+    and each column is replaced by the differences between consecutive
+    rows. Rows are written one after the other.
+
+    """
+    quantized = np.round(np.asarray(arr, dtype=float) * 10 ** precision)
+    if len(quantized) and np.abs(quantized).max() >= 2 ** 30:
+        raise ValueError('Values are too large to be encoded with a '
+                         'precision of {}.'.format(precision))
+    deltas = np.diff(quantized.astype(np.int64), axis=0,
+                     prepend=np.zeros((1,) + quantized.shape[1:], np.int64))
+    return base64.b64encode(deltas.astype('<i4').tobytes()).decode('ascii')
+
+
+def _web_mercator(locations):
+    """Projects [lat, lng] points to Web Mercator x, y in [0, 1]."""
+    x = locations[:, 1] / 360. + 0.5
+    sin = np.sin(np.radians(locations[:, 0]))
+    with np.errstate(divide='ignore'):
+        y = 0.5 - 0.25 * np.log((1 + sin) / (1 - sin)) / np.pi
+    return x, np.clip(y, 0, 1)
+
+
+def _web_mercator_inverse(x, y):
+    """Inverse of `_web_mercator`, returns an array of [lat, lng] points."""
+    lat = np.degrees(2 * np.arctan(np.exp((1 - 2 * y) * np.pi)) - np.pi / 2)
+    return np.column_stack([lat, (x - 0.5) * 360.])
+
+
 def image_to_url(image, colormap=None, origin='upper'):
     """
     Infers the type of an image argument and transforms it into a URL.
@@ -423,7 +557,7 @@ def _tmp_html(data):
 def deep_copy(item_original):
     """Return a recursive deep-copy of item where each copy has a new ID."""
     item = copy.copy(item_original)
-    item._id = uuid.uuid4().hex
+    item._id = _new_id()
     if hasattr(item, '_children') and len(item._children) > 0:
         children_new = collections.OrderedDict()
         for subitem_original in item._children.values():
@@ -9,11 +9,11 @@ from __future__ import absolute_import, division, print_function
 
 import json
 
-from branca.element import CssLink, Element, Figure, JavascriptLink, MacroElement  # noqa
+from branca.element import CssLink, Element, Figure, JavascriptLink  # noqa
 
+from folium.elements import Template
 from folium.map import Marker
-
-from jinja2 import Template
+from folium.utilities import iter_points
 
 
 def path_options(line=False, radius=False, **kwargs):
@@ -149,6 +149,10 @@ class PolyLine(Marker):
         self._name = 'PolyLine'
         self.options = _parse_options(line=True, **kwargs)
 
+    def _vector_stats(self):
+        """Returns the number of paths and vertices drawn by this object."""
+        return 1, len(iter_points(self.location))
+
 
 class Polygon(Marker):
     """
@@ -188,6 +192,10 @@ class Polygon(Marker):
         self._name = 'Polygon'
         self.options = _parse_options(line=True, **kwargs)
 
+    def _vector_stats(self):
+        """Returns the number of paths and vertices drawn by this object."""
+        return 1, len(iter_points(self.location))
+
 
 class Rectangle(Marker):
     """
@@ -228,6 +236,10 @@ class Rectangle(Marker):
         self._name = 'rectangle'
         self.options = _parse_options(line=True, **kwargs)
 
+    def _vector_stats(self):
+        """Returns the number of paths and vertices drawn by this object."""
+        return 1, len(iter_points(self.location))
+
 
 class Circle(Marker):
     """
@@ -273,6 +285,10 @@ class Circle(Marker):
         self._name = 'circle'
         self.options = _parse_options(line=False, radius=radius, **kwargs)
 
+    def _vector_stats(self):
+        """Returns the number of paths and vertices drawn by this object."""
+        return 1, 1
+
 
 class CircleMarker(Marker):
     """
@@ -311,3 +327,7 @@ class CircleMarker(Marker):
                                            tooltip=tooltip)
         self._name = 'CircleMarker'
         self.options = _parse_options(line=False, radius=radius, **kwargs)
+
+    def _vector_stats(self):
+        """Returns the number of paths and vertices drawn by this object."""
+        return 1, 1
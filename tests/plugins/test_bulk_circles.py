@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test BulkCircles
+----------------
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import json
+
+import folium
+
+from folium import plugins
+
+import numpy as np
+
+import pandas as pd
+
+import pytest
+
+
+def test_bulk_circles():
+    np.random.seed(3141592)
+    n = 500
+    df = pd.DataFrame({
+        'lat': np.random.uniform(40, 50, size=n),
+        'lon': np.random.uniform(0, 10, size=n),
+        'size': np.random.uniform(1, 5, size=n),
+        'color': np.random.choice(['red', 'green', 'blue'], size=n),
+    })
+    m = folium.Map([45., 5.], zoom_start=6)
+    circles = plugins.BulkCircles(
+        df[['lat', 'lon']],
+        radius=df['size'],
+        color=df['color'],
+        opacity=0.5,
+        fill=True,
+        precision=4,
+    ).add_to(m)
+
+    out = m._parent.render()
+    script = circles._template.module.script(circles)
+    assert ''.join(script.split()) in ''.join(out.split())
+    assert 'L.circleMarker(' in script
+    assert 'base.renderer = L.canvas();' in script
+
+    assert json.loads(circles.columns) == ['lat', 'lng', 'radius', 'color']
+    assert sorted(json.loads(circles.palette)) == ['blue', 'green', 'red']
+    options = json.loads(circles.options)
+    assert options['opacity'] == 0.5
+    assert options['fill'] is True
+    assert 'radius' not in options
+
+    data = np.array(json.loads(circles.data)).reshape(n, 4)
+    np.testing.assert_allclose(data[:, :2], df[['lat', 'lon']].values,
+                               atol=1e-4)
+    np.testing.assert_allclose(data[:, 2], df['size'].values)
+    palette = json.loads(circles.palette)
+    assert [palette[int(code)] for code in data[:, 3]] == list(df['color'])
+
+    bounds = m.get_bounds()
+    np.testing.assert_allclose(bounds, [df[['lat', 'lon']].min().values,
+                                        df[['lat', 'lon']].max().values])
+
+
+def test_bulk_circles_meters():
+    circles = plugins.BulkCircles([[0, 0], [1, 1]], radius=1000,
+                                  units='meters', canvas=False)
+    circles.add_to(folium.Map())
+    script = circles._template.module.script(circles)
+    assert 'L.circle(' in script
+    assert 'L.canvas()' not in script
+    assert json.loads(circles.options)['radius'] == 1000
+    assert json.loads(circles.columns) == ['lat', 'lng']
+
+
+def test_bulk_circles_validation():
+    with pytest.raises(ValueError):
+        plugins.BulkCircles([[0, 0], [1, 1]], radius=[1, float('nan')])
+    with pytest.raises(ValueError):
+        plugins.BulkCircles([[0, 0], [1, 1]], color=['red'])
+    with pytest.raises(ValueError):
+        plugins.BulkCircles([[0, 0]], units='feet')
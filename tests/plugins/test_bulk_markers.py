@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test BulkMarkers
+----------------
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import folium
+
+from folium import plugins
+
+import numpy as np
+
+import pandas as pd
+
+import pytest
+
+
+def test_bulk_markers():
+    np.random.seed(3141592)
+    n = 1000
+    df = pd.DataFrame({
+        'lat': np.random.uniform(40, 50, size=n),
+        'lon': np.random.uniform(0, 10, size=n),
+        'name': np.random.choice(['a', 'b', None], size=n),
+        'kind': np.random.choice(['red', 'blue'], size=n),
+    })
+    icons = {'red': folium.Icon(color='red'), 'blue': folium.Icon()}
+    m = folium.Map([45., 5.], zoom_start=6)
+    markers = plugins.BulkMarkers(
+        df[['lat', 'lon']],
+        popups=df['name'],
+        tooltips='click me',
+        icons=[icons[kind] for kind in df['kind']],
+        precision=4,
+    ).add_to(m)
+    assert not markers._children
+
+    out = m._parent.render()
+    script = markers._template.module.script(markers)
+    assert ''.join(script.split()) in ''.join(out.split())
+
+    coords = np.array(eval(markers.coordinates)).reshape(-1, 2)
+    np.testing.assert_allclose(coords, df[['lat', 'lon']].values, atol=1e-4)
+    assert sorted(eval(markers.popups)) == ['a', 'b']
+    assert eval(markers.tooltips) == ['click me']
+    assert markers.tooltip_codes == 'null'
+    assert len(markers._icons) == 2
+    assert 'L.AwesomeMarkers.icon({' in markers._icons[0]
+
+    bounds = m.get_bounds()
+    np.testing.assert_allclose(bounds, [df[['lat', 'lon']].min().values,
+                                        df[['lat', 'lon']].max().values])
+
+
+def test_bulk_markers_validation():
+    with pytest.raises(ValueError):
+        plugins.BulkMarkers([[0, 0], [float('nan'), 1]])
+    with pytest.raises(ValueError):
+        plugins.BulkMarkers([[0, 0], [1, 1]], popups=['a'])
+    with pytest.raises(TypeError):
+        plugins.BulkMarkers([[0, 0]], icons=['not an icon'])
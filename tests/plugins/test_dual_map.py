@@ -7,10 +7,13 @@ Test DualMap
 
 from __future__ import (absolute_import, division, print_function)
 
+import re
+
 from jinja2 import Template
 
 import folium
 import folium.plugins
+from folium.elements import tree_ids
 
 
 def test_dual_map():
@@ -33,3 +36,38 @@ def test_dual_map():
     """)
 
     assert tmpl.render(this=m) in out
+
+
+def test_dual_map_shared_data():
+    m = folium.plugins.DualMap((0, 0))
+    geo_json = folium.GeoJson({
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [12.345, 67.891]},
+        'properties': {},
+    }).add_to(m)
+    folium.plugins.HeatMap([[23.456, 78.912]]).add_to(m)
+    folium.GeoJson({
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [98.765, 43.21]},
+        'properties': {},
+    }).add_to(m.m1)
+
+    out = m.get_root().render()
+    # The data of the layers on both maps is written once.
+    assert out.count('12.345') == 1
+    assert out.count('23.456') == 1
+    assert out.count(geo_json.data_var) == 3
+    copy = [child for child in m.m2._children.values()
+            if isinstance(child, folium.GeoJson)][0]
+    assert copy is not geo_json
+    assert len(re.findall(r'L\.geoJson\(\s*' + geo_json.data_var, out)) == 2
+    # The layers of one map keep their data inline.
+    assert out.count('98.765') == 1
+    # Rendering again does not copy or declare anything again.
+    assert m.get_root().render() == out
+    # Nor does rendering with other ids.
+    with tree_ids(m):
+        renamed = m.get_root().render()
+        data_var = geo_json.data_var
+    assert renamed.count('12.345') == 1
+    assert renamed.count(data_var) == 3
@@ -7,6 +7,9 @@ Test FastMarkerCluster
 
 from __future__ import (absolute_import, division, print_function)
 
+import base64
+import json
+
 import folium
 
 from folium import plugins
@@ -15,6 +18,10 @@ from jinja2 import Template
 
 import numpy as np
 
+import pandas as pd
+
+import pytest
+
 
 def test_fast_marker_cluster():
     n = 100
@@ -57,3 +64,36 @@ def test_fast_marker_cluster():
     """)
 
     assert ''.join(tmpl.render(this=mc).split()) in ''.join(out.split())
+
+
+def _decode(mc):
+    deltas = np.frombuffer(base64.b64decode(mc.encoded_coordinates), '<i4')
+    return np.cumsum(deltas.reshape(-1, 2), axis=0) / 10 ** mc.precision
+
+
+def test_fast_marker_cluster_array_input():
+    n = 1000
+    np.random.seed(seed=26082009)
+    df = pd.DataFrame({
+        'lat': np.random.uniform(low=-85, high=85, size=n),
+        'lng': np.random.uniform(low=-180, high=180, size=n),
+        'name': ['point {}'.format(i) for i in range(n)],
+    })
+    m = folium.Map([45., 3.], zoom_start=4)
+    mc = plugins.FastMarkerCluster(df).add_to(m)
+    out = m._parent.render()
+    assert mc.encoded_coordinates in out
+
+    np.testing.assert_allclose(_decode(mc), df[['lat', 'lng']].values,
+                               atol=1e-6)
+    assert json.loads(mc.extras) == [[name] for name in df['name']]
+
+    mc = plugins.FastMarkerCluster(df[['lat', 'lng']].values, precision=3)
+    assert mc.extras == 'null'
+    np.testing.assert_allclose(_decode(mc), df[['lat', 'lng']].values,
+                               atol=1e-3)
+    assert mc.get_bounds() == [df[['lat', 'lng']].min().tolist(),
+                               df[['lat', 'lng']].max().tolist()]
+
+    with pytest.raises(ValueError):
+        plugins.FastMarkerCluster([[0, 0], [np.nan, 1]])
@@ -7,14 +7,21 @@ Test HeatMap
 
 from __future__ import (absolute_import, division, print_function)
 
+import json
+
 import folium
 
 from folium import plugins
+from folium.plugins.heat_map import aggregate_points
 
 from jinja2 import Template
 
 import numpy as np
 
+import pandas as pd
+
+import pytest
+
 
 def test_heat_map():
     np.random.seed(3141592)
@@ -51,3 +58,58 @@ def test_heat_map():
     bounds = m.get_bounds()
     assert bounds == [[46.218566840847025, 3.0302801394447734],
                       [50.75345011431167, 7.132453997672826]], bounds
+
+
+def test_heat_map_array_input():
+    np.random.seed(3141592)
+    df = pd.DataFrame({
+        'lat': np.random.normal(48, 1, size=1000),
+        'lng': np.random.normal(5, 1, size=1000),
+        'weight': np.random.uniform(size=1000),
+    })
+    m = folium.Map([48., 5.], zoom_start=6)
+    hm = plugins.HeatMap(df, precision=3).add_to(m)
+    out = m._parent.render()
+    assert hm.encoded_data in out
+
+    decoded = np.array(json.loads(hm.encoded_data)).reshape(-1, 3)
+    np.testing.assert_allclose(decoded[:, :2], df[['lat', 'lng']].values,
+                               atol=1e-3)
+    np.testing.assert_allclose(decoded[:, 2], df['weight'].values)
+    assert m.get_bounds() == [df[['lat', 'lng']].min().tolist(),
+                              df[['lat', 'lng']].max().tolist()]
+
+    assert plugins.HeatMap([]).get_bounds() == [[None, None], [None, None]]
+    for data in ([[48, 5], [np.nan, 5]], [[48, 5, np.inf]], [[1, 2, 3, 4]]):
+        with pytest.raises(ValueError):
+            plugins.HeatMap(data)
+
+
+@pytest.mark.parametrize('shape', ['square', 'hex'])
+def test_aggregate_points(shape):
+    np.random.seed(3141592)
+    data = np.column_stack([np.random.normal(48, 0.1, size=10000),
+                            np.random.normal(5, 0.1, size=10000),
+                            np.random.uniform(size=10000)])
+    binned = aggregate_points(data, zoom=8, bin_size=5, shape=shape)
+    assert binned.shape[1] == 3
+    assert len(binned) < len(data) / 10
+    np.testing.assert_allclose(binned[:, 2].sum(), data[:, 2].sum())
+    # Bin centroids stay within the data and keep its weighted mean.
+    assert (binned[:, :2].min(axis=0) >= data[:, :2].min(axis=0) - 1e-9).all()
+    assert (binned[:, :2].max(axis=0) <= data[:, :2].max(axis=0) + 1e-9).all()
+    np.testing.assert_allclose(
+        np.average(binned[:, 0], weights=binned[:, 2]),
+        np.average(data[:, 0], weights=data[:, 2]), atol=1e-3)
+
+    # A fine enough grid keeps every point.
+    sparse = data[:100, :2]
+    binned = aggregate_points(sparse, zoom=20, bin_size=1, shape=shape)
+    assert len(binned) == 100
+    np.testing.assert_allclose(np.sort(binned[:, 0]), np.sort(sparse[:, 0]))
+
+    hm = plugins.HeatMap(data, aggregate=shape, aggregate_zoom=8)
+    assert len(hm.data) < len(data) / 10
+
+    with pytest.raises(ValueError):
+        aggregate_points(data, zoom=8, shape='triangle')
@@ -15,6 +15,8 @@ from jinja2 import Template
 
 import numpy as np
 
+import pytest
+
 
 def _normalize(rendered):
     return ''.join(rendered.split())
@@ -73,7 +75,12 @@ def test_heat_map_with_time():
             })
             .addTo({{this._parent.get_name()}});
 
-            var {{this.get_name()}} = new TDHeatmap({{this.data}},
+            var {{this.get_name()}} = new TDHeatmap({
+                coordinates: {{ this.encoded_coordinates }},
+                offsets: {{ this.encoded_offsets }},
+                indices: {{ this.encoded_indices }},
+                weights: {{ this.encoded_weights }}
+            },
             {heatmapOptions: {
                     radius: {{this.radius}},
                     minOpacity: {{this.min_opacity}},
@@ -88,3 +95,75 @@ def test_heat_map_with_time():
     """)
 
     assert _normalize(tmpl.render(this=hm)) in _normalize(out)
+
+
+def test_heat_map_with_time_encoding():
+    np.random.seed(3141592)
+    stations = np.random.normal(size=(50, 2)) + np.array([[48, 5]])
+    frames = []
+    for i in range(20):
+        active = np.random.uniform(size=50) < 0.7
+        weights = np.random.uniform(size=active.sum())
+        frames.append(np.column_stack([stations[active], weights]))
+    frames.append([])
+    hm = plugins.HeatMapWithTime(frames)
+
+    assert len(hm.coordinates) == 50
+    assert len(hm.offsets) == len(frames) + 1
+    assert len(hm.indices) == sum(len(frame) for frame in frames)
+    for frame, decoded in zip(frames, hm.data):
+        np.testing.assert_allclose(np.reshape(decoded, (-1, 3)),
+                                   np.reshape(frame, (-1, 3)), atol=1e-6)
+    np.testing.assert_allclose(hm.get_bounds(),
+                               [stations.min(axis=0), stations.max(axis=0)],
+                               atol=1e-6)
+
+    hm = plugins.HeatMapWithTime([[[48, 5], [49, 6]], [[48, 5]]])
+    assert hm.encoded_weights == 'null'
+    assert hm.data == [[[48, 5], [49, 6]], [[48, 5]]]
+
+    with pytest.raises(ValueError):
+        plugins.HeatMapWithTime([[[48, 5], [np.nan, 6]]])
+
+
+def test_heat_map_with_time_chunks(tmpdir):
+    np.random.seed(3141592)
+    data = [np.random.normal(size=(10, 3)) + np.array([[48, 5, 0]])
+            for _ in range(7)]
+    m = folium.Map([48., 5.])
+    hm = plugins.HeatMapWithTime(data, frames_per_chunk=3).add_to(m)
+    out = m._parent.render()
+
+    chunks = hm.frame_chunks.chunks
+    assert len(chunks) == 3
+    assert [len(chunk['offsets']) for chunk in chunks] == [4, 4, 2]
+    for k, chunk in enumerate(chunks):
+        assert 'id="{}_chunk_{}"'.format(hm.get_name(), k) in out
+        start = hm.offsets[3 * k]
+        np.testing.assert_array_equal(chunk['offsets'],
+                                      hm.offsets[3 * k:3 * k + 4] - start)
+        np.testing.assert_array_equal(
+            chunk['indices'], hm.indices[start:start + len(chunk['indices'])])
+    assert 'framesPerChunk: 3' in out
+    assert hm.encoded_indices not in out
+
+    m = folium.Map([48., 5.])
+    hm = plugins.HeatMapWithTime(data, frames_per_chunk=4,
+                                 chunk_path='chunks').add_to(m)
+    # Renders that are not saved to a file embed the chunks.
+    with tmpdir.as_cwd():
+        out = m._parent.render()
+    assert out.count('application/json') == 2
+    assert not tmpdir.join('chunks').check()
+    # Saving writes them next to the page.
+    m.save(str(tmpdir.join('pages', 'map.html')))
+    out = tmpdir.join('pages', 'map.html').read()
+    assert len(tmpdir.join('pages', 'chunks').listdir()) == 2
+    assert 'application/json' not in out
+
+    with pytest.raises(ValueError):
+        plugins.HeatMapWithTime(data, frames_per_chunk=4,
+                                chunk_path=str(tmpdir.join('chunks')))
+
+    with pytest.raises(ValueError):
+        plugins.HeatMapWithTime(data, frames_per_chunk=0)
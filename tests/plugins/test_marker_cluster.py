@@ -7,6 +7,8 @@ Test MarkerCluster
 
 from __future__ import (absolute_import, division, print_function)
 
+import json
+
 import folium
 
 from folium import plugins
@@ -15,6 +17,10 @@ from jinja2 import Template
 
 import numpy as np
 
+import pandas as pd
+
+import pytest
+
 
 def test_marker_cluster():
     N = 100
@@ -60,3 +66,61 @@ def test_marker_cluster():
     bounds = m.get_bounds()
     assert bounds == [[35.147332572663785, -11.520684337300109],
                       [59.839718052359274, 29.94931046497927]], bounds
+
+
+def test_marker_cluster_shared_icon():
+    n = 1000
+    np.random.seed(seed=26082009)
+    df = pd.DataFrame({
+        'lat': np.random.uniform(low=35, high=60, size=n),
+        'lng': np.random.uniform(low=-12, high=30, size=n),
+        'name': ['point {}'.format(i) for i in range(n)],
+        'value': np.arange(n),
+    })
+    m = folium.Map([45., 3.], zoom_start=4)
+    mc = plugins.MarkerCluster(
+        df[['lat', 'lng']],
+        icons=folium.Icon(color='red', icon='star'),
+        popup_template='<b>{name}</b>: {value}',
+        popup_data=df[['name', 'value']],
+    ).add_to(m)
+    assert not mc._children
+    out = m._parent.render()
+
+    script = mc._template.module.script(mc)
+    assert ''.join(script.split()) in ''.join(out.split())
+    assert out.count('L.AwesomeMarkers.icon(') == 1
+    assert '{}.addLayers(markers);'.format(mc.get_name()) in out
+
+    popup_data = json.loads(mc.popup_data)
+    assert popup_data['name'] == df['name'].tolist()
+    assert popup_data['value'] == df['value'].tolist()
+
+    bounds = m.get_bounds()
+    assert bounds == [df[['lat', 'lng']].min().tolist(),
+                      df[['lat', 'lng']].max().tolist()]
+
+    mc = plugins.MarkerCluster(
+        [[0, 0], [1, 1], [2, 2]], icons=folium.Icon(),
+        popups=['a', 'b', 'a'])
+    assert json.loads(mc.popups) == ['a', 'b']
+    assert json.loads(mc.popup_codes) == [0, 1, 0]
+
+    with pytest.raises(ValueError):
+        plugins.MarkerCluster([[0, 0]], popup_template='{name}',
+                              popup_data={'name': ['a', 'b']})
+
+    # One icon per marker, each distinct icon declared once.
+    mc = plugins.MarkerCluster(
+        [[0, 0], [1, 1], [2, 2]],
+        icons=[folium.Icon(color='red'), None, folium.Icon(color='red')],
+        popup_template='{name}', popup_data={'name': ['a', 'b', 'c']})
+    assert len(mc._icons) == 1
+    assert json.loads(mc.icon_codes) == [0, -1, 0]
+
+    with pytest.raises(ValueError):
+        plugins.MarkerCluster([[0, 0]], popup_template='{name} {value}',
+                              popup_data={'name': ['a']})
+    with pytest.raises(ValueError):
+        plugins.MarkerCluster([[0, 0]], icons=folium.Icon(),
+                              popups=[folium.Popup('a')])
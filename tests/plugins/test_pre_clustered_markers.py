@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test PreClusteredMarkers
+------------------------
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import base64
+import json
+
+import folium
+
+from folium import plugins
+from folium.plugins.pre_clustered_markers import ClusterIndex
+
+import numpy as np
+
+import pytest
+
+
+def _decode(b64):
+    return np.frombuffer(base64.b64decode(b64), '<i4')
+
+
+def test_cluster_index():
+    np.random.seed(seed=26082009)
+    data = np.concatenate([
+        np.random.normal([48.85, 2.35], 0.01, size=(300, 2)),
+        np.random.normal([40.71, -74.0], 0.01, size=(200, 2)),
+        [[-33.87, 151.21]],
+    ])
+    index = ClusterIndex(data, min_zoom=0, max_zoom=12)
+
+    for zoom in range(0, 13):
+        locations, counts = index.get_clusters(zoom)
+        assert counts.sum() == len(data)
+        assert len(locations) == len(counts)
+        parents = index.levels[zoom]['parents']
+        if zoom > 0:
+            below = index.levels[zoom - 1]['counts']
+            np.testing.assert_array_equal(np.bincount(parents, counts),
+                                          below)
+        else:
+            assert parents is None
+
+    locations, counts = index.get_clusters(3)
+    assert sorted(counts) == [1, 200, 300]
+    paris = np.argmax(counts)
+    np.testing.assert_allclose(locations[paris], data[:300].mean(axis=0),
+                               atol=1e-9)
+    assert sorted(index.get_leaves(3, paris)) == list(range(300))
+    assert index.levels[3]['expansion_zoom'][paris] > 3
+    assert index.levels[3]['leaf'][np.argmin(counts)] == 500
+
+    assert sorted(index.order) == list(range(len(data)))
+    assert index.offsets[-1] == len(data)
+
+    with pytest.raises(ValueError):
+        ClusterIndex(data, min_zoom=5, max_zoom=2)
+
+
+def test_pre_clustered_markers(tmpdir):
+    np.random.seed(seed=26082009)
+    data = np.random.uniform([40, 0], [50, 10], size=(1000, 2))
+    m = folium.Map([45., 5.], zoom_start=5)
+    markers = plugins.PreClusteredMarkers(
+        data, popups=['point {}'.format(i) for i in range(1000)],
+        max_zoom=10).add_to(m)
+    out = m._parent.render()
+
+    assert 'MarkerCluster.Default.css' in out
+    script = markers._template.module.script(markers, {})
+    assert ''.join(script.split()) in ''.join(out.split())
+
+    levels = json.loads(markers.levels)
+    assert len(levels) == 11
+    for zoom, (coords, counts, expansion, leaf) in enumerate(levels):
+        level = markers.index.levels[zoom]
+        np.testing.assert_array_equal(_decode(counts), level['counts'])
+        np.testing.assert_allclose(
+            _decode(coords).reshape(-1, 2) / 1e6, level['locations'],
+            atol=1e-6)
+        np.testing.assert_array_equal(_decode(leaf), level['leaf'])
+
+    leaves = np.concatenate([_decode(chunk).reshape(-1, 3)
+                             for chunk in markers.leaf_chunks()])
+    np.testing.assert_allclose(leaves[:, :2] / 1e6, data[leaves[:, 2]],
+                               atol=1e-6)
+    assert sorted(leaves[:, 2]) == list(range(1000))
+    assert m.get_bounds() == [data.min(axis=0).tolist(),
+                              data.max(axis=0).tolist()]
+
+    # The points are split into chunks of whole clusters.
+    m = folium.Map([45., 5.], zoom_start=5)
+    markers = plugins.PreClusteredMarkers(
+        data, max_zoom=10, leaves_per_chunk=300, chunk_path='leaves').add_to(m)
+    starts = _decode(markers.chunk_starts)
+    assert len(starts) >= 4
+    offsets = markers.index.offsets[
+        np.append(starts, len(markers.index.offsets) - 1)]
+    sizes = [len(_decode(chunk)) // 3 for chunk in markers.leaf_chunks()]
+    assert sizes == np.diff(offsets).tolist()
+    assert sum(sizes) == 1000
+
+    m.save(str(tmpdir.join('map.html')))
+    assert len(tmpdir.join('leaves').listdir()) == len(starts)
+    assert 'application/json' not in tmpdir.join('map.html').read()
+
+    with pytest.raises(ValueError):
+        plugins.PreClusteredMarkers(data, leaves_per_chunk=0)
+    with pytest.raises(ValueError):
+        plugins.PreClusteredMarkers([[45, 120]], precision=8)
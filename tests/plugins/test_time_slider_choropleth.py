@@ -8,7 +8,7 @@ from __future__ import (absolute_import, division, print_function)
 
 import json
 
-from branca.colormap import linear
+from branca.colormap import StepColormap, linear
 
 import folium
 from folium.plugins import TimeSliderChoropleth
@@ -82,3 +82,44 @@ def test_timedynamic_geo_json():
 
     expected_styledict = json.dumps(styledict, sort_keys=True, indent=2)
     assert expected_styledict in rendered
+
+
+def test_time_slider_choropleth_values():
+    geojson = json.dumps({
+        'type': 'FeatureCollection',
+        'features': [
+            {'type': 'Feature', 'id': str(i), 'properties': {},
+             'geometry': {'type': 'Point', 'coordinates': [i, i]}}
+            for i in range(3)
+        ]
+    })
+    values = pd.DataFrame([[0., 5., np.nan], [10., 2.5, 7.5], [1., 1., 1.]],
+                          index=['0', '1', '2'],
+                          columns=pd.to_datetime(['2016-01-01', '2016-01-02',
+                                                  '2016-01-03']))
+    cmap = linear.PuRd_09.scale(0, 10)
+
+    m = folium.Map()
+    tsc = TimeSliderChoropleth(geojson, values=values, colormap=cmap).add_to(m)
+    out = m._parent.render()
+
+    assert tsc.timestamps == '["1451606400","1451692800","1451779200"]'
+    assert tsc.feature_ids == '["0","1","2"]'
+    palette = json.loads(tsc.palette)
+    codes = np.array(json.loads(tsc.codes)).reshape(3, 3)
+    assert len(palette) == 256
+    assert codes[0, 2] == -1
+    assert palette[codes[0, 0]] == cmap(0)
+    assert palette[codes[1, 0]] == cmap(10)
+    assert 'var codes = {};'.format(tsc.codes) in out
+
+    step = StepColormap(['red', 'blue'], index=[0, 5, 10], vmin=0, vmax=10)
+    tsc = TimeSliderChoropleth(geojson, values=values.values, colormap=step,
+                               feature_ids=[0, 1, 2], timestamps=[1, 2, 3])
+    assert json.loads(tsc.palette) == ['#ff0000', '#0000ff']
+    assert json.loads(tsc.codes) == [0, 0, -1, 1, 0, 1, 0, 0, 0]
+
+    with pytest.raises(ValueError):
+        TimeSliderChoropleth(geojson, values=values.values)
+    with pytest.raises(ValueError):
+        TimeSliderChoropleth(geojson, {'0': {}}, values=values)
@@ -8,14 +8,19 @@ Test TimestampedGeoJson
 
 from __future__ import (absolute_import, division, print_function)
 
+import json
+
 import folium
 
 from folium import plugins
+from folium.plugins.timestamped_geo_json import _time_to_ms, _times_to_ms
 
 from jinja2 import Template
 
 import numpy as np
 
+import pytest
+
 
 def test_timestamped_geo_json():
     coordinates = [[[[lon-8*np.sin(theta), -47+6*np.cos(theta)] for
@@ -165,3 +170,86 @@ def test_timestamped_geo_json():
 
     bounds = m.get_bounds()
     assert bounds == [[-53.0, -158.0], [50.0, 158.0]], bounds
+
+
+def test_timestamped_geo_json_chunks(tmpdir):
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [i, i]},
+            'properties': {'times': ['2017-06-0{}T00:00:00Z'.format(1 + i % 5)]}
+        }
+        for i in range(10)
+    ]
+    data = {'type': 'FeatureCollection', 'features': features}
+
+    m = folium.Map()
+    tgj = plugins.TimestampedGeoJson(data, frames_per_chunk=2).add_to(m)
+    out = m._parent.render()
+    assert len(tgj.frame_chunks.chunks) == 3
+    assert [len(chunk) for chunk in tgj.frame_chunks.chunks] == [4, 4, 2]
+    assert tgj.times == '["2017-06-01T00:00:00Z","2017-06-02T00:00:00Z",' \
+                        '"2017-06-03T00:00:00Z","2017-06-04T00:00:00Z",' \
+                        '"2017-06-05T00:00:00Z"]'
+    assert 'new FoliumChunkedGeoJson(' in out
+    for k in range(3):
+        assert 'id="{}_chunk_{}"'.format(tgj.get_name(), k) in out
+    assert '"2017-06-05T00:00:00Z"]}}' not in out.split('FoliumChunkedGeoJson(')[1]
+
+    m = folium.Map()
+    tgj = plugins.TimestampedGeoJson(data, frames_per_chunk=3,
+                                     chunk_path='chunks').add_to(m)
+    m.save(str(tmpdir.join('map.html')))
+    assert sorted(tmpdir.join('chunks').listdir()) == [
+        tmpdir.join('chunks', '{}_chunk_{}.json'.format(tgj.get_name(), k))
+        for k in range(2)]
+
+    with pytest.raises(ValueError):
+        plugins.TimestampedGeoJson('data.json', frames_per_chunk=2)
+
+
+def test_timestamped_geo_json_from_columns():
+    pd = pytest.importorskip('pandas')
+    df = pd.DataFrame({
+        'lat': [1., 2., 3., 10., 20.],
+        'lon': [4., 5., 6., 30., 40.],
+        'time': pd.to_datetime(['2017-06-03', '2017-06-01', '2017-06-02',
+                                '2017-06-01', '2017-06-02']),
+        'track': ['b', 'b', 'b', 'a', 'c'],
+        'color': ['red', 'red', 'red', 'blue', 'green'],
+    })
+    tgj = plugins.TimestampedGeoJson.from_columns(
+        df['lat'], df['lon'], df['time'], tracks=df['track'],
+        styles={'color': df['color']}, period='PT1H')
+    assert tgj.period == 'PT1H'
+
+    features = json.loads(tgj.data)['features']
+    assert [f['geometry']['type'] for f in features] == ['Point', 'LineString', 'Point']
+    line = features[1]
+    assert line['geometry']['coordinates'] == [[5., 2.], [6., 3.], [4., 1.]]
+    day = 86400000
+    assert line['properties']['times'] == [1496275200000,
+                                           1496275200000 + day,
+                                           1496275200000 + 2 * day]
+    assert line['properties']['style'] == {'color': 'red'}
+    assert features[0]['properties']['iconstyle'] == {'color': 'blue'}
+    assert tgj.get_bounds() == [[1., 4.], [20., 40.]]
+
+    tgj = plugins.TimestampedGeoJson.from_columns(
+        [1, 2], [3, 4], ['2017-06-01T00:00:00Z', '2017-06-02T00:00:00Z'])
+    features = json.loads(tgj.data)['features']
+    assert len(features) == 2
+    assert features[1]['properties']['times'] == [1496275200000 + day]
+
+    with pytest.raises(ValueError):
+        plugins.TimestampedGeoJson.from_columns([1, 2], [3], [0, 1])
+
+
+def test_time_to_ms_utc_offset():
+    utc = _time_to_ms('2017-06-01T00:00:00Z')
+    assert utc == 1496275200000
+    assert _time_to_ms('2017-06-01T02:00:00+02:00') == utc
+    assert _time_to_ms('2017-05-31T22:30:00-0130') == utc
+    assert _time_to_ms('2017-06-01T02:00+02') == utc
+    assert _time_to_ms('2017-06-01') == utc
+    assert _times_to_ms(['2017-06-01T02:00:00+02:00']).tolist() == [utc]
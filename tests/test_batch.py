@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+"""
+Folium batch Tests
+------------------
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import folium
+from folium.batch import save_maps
+
+
+def _region_map(regions, name):
+    m = folium.Map(location=regions[name], zoom_start=5)
+    folium.Marker(regions[name]).add_to(m)
+    return m
+
+
+def _failing_map(regions):
+    raise ValueError('No data.')
+
+
+def test_save_maps(tmpdir):
+    regions = {'a': [45., 3.], 'b': [10., -20.], 'c': [-30., 150.]}
+    jobs = [(str(tmpdir.join(name + '.html')), _region_map, {'name': name})
+            for name in sorted(regions)]
+    jobs.append((str(tmpdir.join('d.html')), _failing_map))
+
+    for processes in (1, 2):
+        results = save_maps(jobs, processes=processes, shared=regions)
+        assert [r.outfile for r in results] == [job[0] for job in jobs]
+        assert all(r.seconds >= 0 for r in results)
+        assert [r.error is None for r in results] == [True, True, True, False]
+        assert 'ValueError: No data.' in results[-1].error
+        for name in regions:
+            assert tmpdir.join(name + '.html').check()
+        assert '[10.0, -20.0]' in tmpdir.join('b.html').read()
+        assert not tmpdir.join('d.html').check()
+
+
+def test_save_maps_deterministic(tmpdir):
+    regions = {'a': [45., 3.], 'b': [10., -20.]}
+    jobs = [(str(tmpdir.join(name + '.html')), _region_map, {'name': name})
+            for name in sorted(regions)]
+    digests = [[r.digest for r in save_maps(jobs, processes=processes,
+                                            shared=regions,
+                                            deterministic=True)]
+               for processes in (1, 2)]
+    assert digests[0] == digests[1]
+    assert len(set(digests[0])) == 2
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+"""
+Folium elements Tests
+---------------------
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import hashlib
+import os
+import subprocess
+import sys
+
+import folium
+from folium import plugins
+from folium.elements import MacroElement, StaticElement, Template
+
+
+def test_render_cache():
+    m = folium.Map()
+    geo_json = folium.GeoJson({
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [1, 2]},
+        'properties': {},
+    }).add_to(m)
+    marker = folium.Marker([1, 2]).add_to(m)
+    first = m._parent.render()
+
+    cached = geo_json._rendered
+    assert cached is not None
+    assert isinstance(geo_json, MacroElement)
+
+    # Unchanged elements reuse their fragments.
+    second_marker = folium.Marker([3, 4]).add_to(m)
+    second = m._parent.render()
+    assert geo_json._rendered is cached
+    assert second_marker.get_name() in second
+    assert second_marker.get_name() not in first
+
+    # Setting an attribute discards the cache.
+    marker.location = [5, 6]
+    assert marker._rendered is None
+    assert '[5, 6]' in m._parent.render()
+
+    # In-place changes need an explicit invalidation.
+    geo_json.data['features'][0]['geometry']['coordinates'] = [7, 8]
+    assert '[7, 8]' not in m._parent.render()
+    geo_json.invalidate()
+    assert '[7, 8]' in m._parent.render()
+
+
+def test_template_shared():
+    source = u'{{ this }}!'
+    assert Template(source) is Template(source)
+    assert Template(source).render(this='a') == 'a!'
+    assert StaticElement('{{ this }}').render() == '{{ this }}'
+
+
+def test_template_bytecode_cache(tmpdir):
+    env = dict(os.environ, FOLIUM_TEMPLATE_CACHE=str(tmpdir))
+    subprocess.check_call([sys.executable, '-c', 'import folium'], env=env)
+    assert len(tmpdir.listdir()) > 0
+
+
+def test_sequential_ids():
+    markers = [folium.Marker([0, 0]) for _ in range(3)]
+    ids = [int(marker._id, 16) for marker in markers]
+    assert ids[1] == ids[0] + 1 and ids[2] == ids[1] + 1
+    popup = folium.Popup('text')
+    assert len(popup._id) < 32
+    assert popup.get_name() != folium.Popup('text').get_name()
+
+
+def _build_map():
+    m = folium.Map([45, 3], zoom_start=5)
+    group = folium.FeatureGroup().add_to(m)
+    folium.Marker([45, 3], popup='Popup', tooltip='Tooltip').add_to(group)
+    folium.LayerControl().add_to(m)
+    return m
+
+
+def test_deterministic_save(tmpdir):
+    m1 = _build_map()
+    m1._repr_html_()
+    # Elements created in between shift the sequential ids.
+    folium.Marker([0, 0])
+    m2 = _build_map()
+    assert m1.get_name() != m2.get_name()
+
+    outfile = str(tmpdir.join('map.html'))
+    digest = m1.save(outfile, deterministic=True)
+    html = tmpdir.join('map.html').read()
+    assert digest == hashlib.sha256(html.encode('utf8')).hexdigest()
+    assert m2.save(outfile, deterministic=True) == digest
+    assert 'map_t1' in html
+    # The ids are restored after saving.
+    assert m1.get_name() != 'map_t1'
+    assert m1.get_name() in m1._parent.render()
+    # Default layer names follow the names, given ones are kept.
+    named = folium.FeatureGroup(name='zone_4').add_to(m1)
+    folium.LayerControl().add_to(m1)
+    m1.save(outfile, deterministic=True)
+    html = tmpdir.join('map.html').read()
+    assert '"zone_4"' in html
+    assert '"feature_group_t3"' in html
+    assert named.layer_name == 'zone_4'
+
+
+def _build_chunked_map():
+    m = folium.Map([45, 3], zoom_start=5)
+    frames = [[[45, 3, 1.], [46, 4, 1.]] for _ in range(4)]
+    plugins.HeatMapWithTime(frames, frames_per_chunk=2).add_to(m)
+    plugins.PreClusteredMarkers([[45, 3], [46, 4]], max_zoom=5,
+                                leaves_per_chunk=1).add_to(m)
+    features = [{'type': 'Feature',
+                 'geometry': {'type': 'Point', 'coordinates': [3, 45]},
+                 'properties': {'times': ['2017-06-0{}'.format(day)]}}
+                for day in range(1, 5)]
+    plugins.TimestampedGeoJson(
+        {'type': 'FeatureCollection', 'features': features},
+        frames_per_chunk=2).add_to(m)
+    return m
+
+
+def test_deterministic_save_chunks(tmpdir):
+    outfile = str(tmpdir.join('map.html'))
+    digests = []
+    for n_before in [0, 5]:
+        for _ in range(n_before):
+            folium.Marker([0, 0])
+        m = _build_chunked_map()
+        # Rendered first with the sequential names.
+        m._repr_html_()
+        digests.append(m.save(outfile, deterministic=True))
+    assert digests[0] == digests[1]
+    html = tmpdir.join('map.html').read()
+    assert 'heat_map_t3Control' in html
+    assert html.count('type="application/json"') == 6
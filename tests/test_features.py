@@ -6,6 +6,7 @@ Folium Features Tests
 
 """
 
+import json
 import os
 import warnings
 
@@ -204,3 +205,42 @@ def test_geojson_tooltip():
         warnings.simplefilter('always')
         m._repr_html_()
         assert issubclass(w[-1].category, UserWarning), "GeoJsonTooltip GeometryCollection test failed."
+
+
+# GeoJson clip_to_bounds
+def test_geojson_clip_to_bounds():
+    def point(lon, lat):
+        return {'type': 'Feature', 'properties': {},
+                'geometry': {'type': 'Point', 'coordinates': [lon, lat]}}
+    line = {'type': 'Feature', 'properties': {},
+            'geometry': {'type': 'LineString',
+                         'coordinates': [[-10, 40], [10, 50]]}}
+    data = {'type': 'FeatureCollection',
+            'features': [point(2, 48), point(20, 10), line]}
+    geojson = folium.GeoJson(data, clip_to_bounds=[[45, 0], [49, 5]])
+    assert geojson.data['features'] == [data['features'][0], line]
+    assert len(data['features']) == 3
+    assert geojson.get_bounds() == [[40, -10], [50, 10]]
+
+
+# GeoJsonDataset
+def test_geojson_dataset():
+    data = {'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'id': str(i), 'properties': {'value': i},
+         'geometry': {'type': 'Point', 'coordinates': [i, i]}}
+        for i in range(3)]}
+    dataset = folium.GeoJsonDataset(data, name='points')
+    m = folium.Map()
+    folium.Choropleth(dataset, data={'0': 1., '1': 2., '2': 3.},
+                      key_on='feature.id', fill_color='YlGn',
+                      highlight=True).add_to(m)
+    folium.GeoJson(dataset, style_function=lambda x: {'color': 'red'}
+                   ).add_to(m)
+    out = m._parent.render()
+
+    # The features are written once, without the styles of the layers.
+    assert out.count('"coordinates"') == 3
+    assert out.count('var data_points = ') == 1
+    assert 'style' not in json.dumps(data)
+    assert '"styles": [{"color": "red"}]' in out
+    assert out.count('L.geoJson(\n            data_points') == 2
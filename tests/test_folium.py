@@ -67,8 +67,10 @@ class TestFolium(object):
 
     def setup(self):
         """Setup Folium Map."""
-        with mock.patch('branca.element.uuid4') as uuid4:
+        with mock.patch('branca.element.uuid4') as uuid4, \
+                mock.patch('folium.elements._new_id') as new_id:
             uuid4().hex = '0' * 32
+            new_id.return_value = '0' * 32
             attr = 'http://openstreetmap.org'
             self.m = folium.Map(
                 location=[45.5236, -122.6750],
@@ -383,6 +385,51 @@ class TestFolium(object):
         assert m.global_switches.no_touch
         assert m.global_switches.disable_3d
 
+    def test_prefer_canvas_auto(self):
+        m = folium.Map(prefer_canvas='auto')
+        m.max_svg_paths = 10
+        folium.PolyLine([[0, 0], [1, 1], [2, 0]]).add_to(m)
+        folium.GeoJson({'type': 'FeatureCollection', 'features': [
+            {'type': 'Feature', 'properties': {},
+             'geometry': {'type': 'Point', 'coordinates': [0, 0]}},
+            {'type': 'Feature', 'properties': {},
+             'geometry': {'type': 'Polygon',
+                          'coordinates': [[[0, 0], [1, 0], [1, 1], [0, 0]]]}},
+        ]}).add_to(m)
+        group = folium.FeatureGroup().add_to(m)
+        for i in range(5):
+            folium.CircleMarker([i, i]).add_to(group)
+
+        stats = m.get_vector_stats()
+        assert stats['paths'] == 7
+        assert stats['vertices'] == 12
+        assert stats['by_type']['GeoJson'] == [1, 4]
+        assert not stats['canvas']
+        out = m._parent.render()
+        assert 'L_PREFER_CANVAS=false' in out
+        assert 'preferCanvas' not in out
+        assert m.vector_stats == stats
+
+        for i in range(5):
+            folium.CircleMarker([i, -i]).add_to(group)
+        out = m._parent.render()
+        assert m.vector_stats['canvas']
+        assert 'L_PREFER_CANVAS=true' in out
+        assert 'preferCanvas: true' in out
+
+        with pytest.raises(ValueError):
+            folium.Map(prefer_canvas='yes')
+
+    def test_prefer_canvas_changed(self):
+        m = folium.Map(prefer_canvas='auto')
+        for i in range(m.max_svg_paths + 1):
+            folium.CircleMarker([0, i % 180]).add_to(m)
+        assert 'L_PREFER_CANVAS=true' in m._parent.render()
+        m.prefer_canvas = False
+        assert 'L_PREFER_CANVAS=false' in m._parent.render()
+        m.prefer_canvas = True
+        assert 'L_PREFER_CANVAS=true' in m._parent.render()
+
     @pytest.mark.web
     def test_json_request(self):
         """Test requests for remote GeoJSON files."""
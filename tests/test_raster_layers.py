@@ -12,6 +12,8 @@ import folium
 
 from jinja2 import Template
 
+import pytest
+
 
 def test_tile_layer():
     m = folium.Map([48., 5.], tiles='stamentoner', zoom_start=6)
@@ -73,6 +75,20 @@ def test_custom_tile_subdomains():
     assert '9012' in out
 
 
+def test_register_tile_provider():
+    folium.raster_layers.register_tile_provider(
+        'Test Tiles', 'https://tiles.example.com/{{ API_key }}/{z}/{x}/{y}.png',
+        'Test attribution', api_key_required=True)
+    with pytest.raises(ValueError):
+        folium.Map(tiles='test tiles')
+    m = folium.Map(tiles='Test Tiles', API_key='key')
+    layer = m._children['testtiles']
+    assert layer.tiles == 'https://tiles.example.com/key/{z}/{x}/{y}.png'
+    assert layer.attr == 'Test attribution'
+    # The built-in tilesets are still known.
+    assert 'openstreetmap' in folium.raster_layers._get_tile_providers()
+
+
 def test_wms():
     m = folium.Map([40, -100], zoom_start=4)
     url = 'http://mesonet.agron.iastate.edu/cgi-bin/wms/nexrad/n0r.cgi'
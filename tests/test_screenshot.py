@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+"""
+Folium screenshot Tests
+-----------------------
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import folium
+from folium.screenshot import ScreenshotEngine, _inject_ready_script
+
+import pytest
+
+from six.moves.urllib.request import urlopen
+
+
+class FakeDriver(object):
+    """Records the pages it opens, and is ready after two polls."""
+    def __init__(self, width, height, pixel_ratio):
+        self.size = (width, height, pixel_ratio)
+        self.urls = []
+        self.polls = 0
+        self.closed = False
+
+    def get(self, url):
+        self.urls.append(url)
+        if url.startswith('http'):
+            self.page = urlopen(url).read().decode('utf8')
+        else:
+            with open(url[len('file:///'):]) as f:
+                self.page = f.read()
+
+    def execute_script(self, script):
+        self.polls += 1
+        return self.polls % 2 == 0
+
+    def get_screenshot_as_png(self):
+        return b'png'
+
+    def quit(self):
+        self.closed = True
+
+
+def test_inject_ready_script():
+    html = folium.Map()._parent.render()
+    out = _inject_ready_script(html)
+    assert out.index('L.GridLayer.addInitHook') < out.index('</head>')
+    assert out.index('leaflet.js') < out.index('L.GridLayer.addInitHook')
+    with pytest.raises(ValueError):
+        _inject_ready_script('<html></html>')
+
+
+def test_screenshot_engine(tmpdir):
+    tmpdir.join('tiles', '0', '0').ensure(dir=True)
+    tmpdir.join('tiles', '0', '0', '0.png').write_binary(b'tile')
+    drivers = []
+
+    def factory(width, height, pixel_ratio):
+        drivers.append(FakeDriver(width, height, pixel_ratio))
+        return drivers[-1]
+
+    maps = [folium.Map(tiles='tiles/{z}/{x}/{y}.png', attr='local')
+            for _ in range(5)]
+    with ScreenshotEngine(size=(200, 100), pixel_ratio=2, sessions=2,
+                          directory=str(tmpdir),
+                          driver_factory=factory) as engine:
+        assert urlopen(engine._server.url + '/tiles/0/0/0.png').read() == b'tile'
+        assert engine.screenshots(maps) == [b'png'] * 5
+        engine.export([(str(tmpdir.join('a.png')), maps[0])])
+    assert tmpdir.join('a.png').read_binary() == b'png'
+    assert 1 <= len(drivers) <= 2
+    assert all(driver.closed for driver in drivers)
+    assert all(driver.size == (200, 100, 2) for driver in drivers)
+    assert sum(len(driver.urls) for driver in drivers) == 6
+    assert 'window.foliumReady' in drivers[0].page
+
+    with pytest.raises(ValueError):
+        ScreenshotEngine(sessions=0)
+
+
+def test_to_png_engine():
+    engine = ScreenshotEngine(driver_factory=FakeDriver)
+    m = folium.Map()
+    assert m._to_png(engine=engine) == b'png'
+    engine.close()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test SpatialIndex
+-----------------
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import os
+
+import folium
+from folium.spatial_index import SpatialIndex, feature_boxes, pruned_to_bounds
+
+import numpy as np
+
+
+def test_spatial_index_query():
+    np.random.seed(0)
+    points = np.random.uniform(-50, 50, size=(1000, 2))
+    bounds = [[[lat, lon], [lat + 1, lon + 1]] for lat, lon in points]
+    index = SpatialIndex(list(range(1000)), bounds, node_capacity=8)
+    query = [[-10, -5], [10, 20]]
+    expected = [i for i, (lat, lon) in enumerate(points)
+                if lat <= 10 and lat + 1 >= -10 and lon <= 20 and lon + 1 >= -5]
+    assert index.query(query) == expected
+    assert index.query([[80, 80], [85, 85]]) == []
+    assert SpatialIndex([], []).query(query) == []
+
+
+def test_feature_boxes():
+    features = [
+        {'geometry': {'type': 'Point', 'coordinates': [2, 48]}},
+        {'geometry': None},
+        {'geometry': {'type': 'Polygon',
+                      'coordinates': [[[0, 0], [4, 0], [4, 3], [0, 0]]]}},
+        {'geometry': {'type': 'MultiPolygon', 'coordinates': [
+            [[[0, 0, 100], [1, 0, 100], [1, 1, 100], [0, 0, 100]]],
+            [[[5, 5], [6, 5], [6, 7, 100], [5, 5]]]]}},
+        {'geometry': {'type': 'GeometryCollection', 'geometries': [
+            {'type': 'Point', 'coordinates': [-1, -2]},
+            {'type': 'LineString', 'coordinates': [[3, 4], [5, 6]]}]}},
+    ]
+    boxes = feature_boxes(features)
+    assert boxes[0].tolist() == [48, 2, 48, 2]
+    assert np.isnan(boxes[1]).all()
+    assert boxes[2].tolist() == [0, 0, 3, 4]
+    assert boxes[3].tolist() == [0, 0, 7, 6]
+    assert boxes[4].tolist() == [-2, -1, 6, 5]
+
+
+def test_map_save_pruned(tmpdir):
+    m = folium.Map([45, 5], zoom_start=12)
+    fg = folium.FeatureGroup().add_to(m)
+    inside = folium.Marker([45, 5]).add_to(fg)
+    outside = folium.Marker([10, 10], popup='far away').add_to(fg)
+    circle = folium.CircleMarker([45.01, 5.01]).add_to(m)
+    folium.LayerControl().add_to(m)
+
+    path = os.path.join(str(tmpdir), 'map.html')
+    with pruned_to_bounds(m, [[44.9, 4.9], [45.1, 5.1]]):
+        assert list(fg._children.values()) == [inside]
+    assert list(fg._children.values()) == [inside, outside]
+
+    m.save(path, bounds=[[44.99, 4.99], [45.0, 5.0]], margin=0.05)
+    with open(path) as f:
+        out = f.read()
+    assert inside.get_name() in out
+    assert circle.get_name() in out
+    assert outside.get_name() not in out
+    assert m._children[fg.get_name()] is fg
+    assert outside.get_name() in fg._children
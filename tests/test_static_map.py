@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+"""
+Folium static_map Tests
+-----------------------
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import os
+import struct
+import zlib
+
+import folium
+from folium.static_map import _read_png, render_image, render_png
+from folium.utilities import _web_mercator, write_png
+
+import numpy as np
+
+import pytest
+
+
+def _write_tile(directory, z, x, y, color):
+    path = os.path.join(str(directory), str(z), str(x))
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    tile = np.zeros((256, 256, 4), np.uint8)
+    tile[:] = color
+    with open(os.path.join(path, '{}.png'.format(y)), 'wb') as f:
+        f.write(write_png(tile))
+
+
+def test_read_png():
+    data = np.random.RandomState(0).randint(0, 256, (5, 7, 4)).astype(np.uint8)
+    np.testing.assert_array_equal(_read_png(write_png(data)), data)
+
+
+def test_read_png_filters():
+    # An RGB image of two rows using the Sub and Up filters.
+    rows = [[1, 10, 20, 30, 1, 1, 1], [2, 5, 5, 5, 5, 5, 5]]
+    raw = zlib.compress(np.array(rows, np.uint8).tobytes())
+
+    def chunk(tag, payload):
+        return (struct.pack('!I', len(payload)) + tag + payload +
+                struct.pack('!I', zlib.crc32(tag + payload) & 0xffffffff))
+    ihdr = struct.pack('!2I5B', 2, 2, 8, 2, 0, 0, 0)
+    png = (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', ihdr) +
+           chunk(b'IDAT', raw) + chunk(b'IEND', b''))
+    expected = [[[10, 20, 30, 255], [11, 21, 31, 255]],
+                [[15, 25, 35, 255], [16, 26, 36, 255]]]
+    np.testing.assert_array_equal(_read_png(png), expected)
+
+
+def test_render_image_tiles(tmpdir):
+    _write_tile(tmpdir, 1, 0, 0, (255, 0, 0, 255))
+    _write_tile(tmpdir, 1, 1, 1, (0, 0, 255, 255))
+    m = folium.Map(location=[0, 0], zoom_start=1, tiles=None)
+    image = render_image(m, width=512, height=512, tiles=str(tmpdir))
+    assert image.shape == (512, 512, 4)
+    assert tuple(image[10, 10]) == (255, 0, 0, 255)
+    assert tuple(image[500, 500]) == (0, 0, 255, 255)
+    # Missing tiles are left to the background color.
+    assert tuple(image[10, 500]) == (0xdd, 0xdd, 0xdd, 255)
+
+
+def test_render_image_tiles_template(tmpdir):
+    # A TMS layout, with the tiles of the subdomains in different folders.
+    _write_tile(tmpdir.join('a'), 1, 0, 1, (255, 0, 0, 255))
+    _write_tile(tmpdir.join('b'), 1, 1, 1, (0, 0, 255, 255))
+    m = folium.Map(location=[0, 0], zoom_start=1, tiles=None)
+    tiles = os.path.join(str(tmpdir), '{s}', '{z}', '{x}', '{-y}.png')
+    image = render_image(m, width=512, height=512, tiles=tiles,
+                         subdomains='ab')
+    assert tuple(image[10, 10]) == (255, 0, 0, 255)
+    assert tuple(image[10, 500]) == (0, 0, 255, 255)
+    assert tuple(image[500, 500]) == (0xdd, 0xdd, 0xdd, 255)
+
+
+def test_render_image_tiles_options(tmpdir):
+    _write_tile(tmpdir, 1, 0, 0, (255, 0, 0, 255))
+    m = folium.Map(location=[0, 0], zoom_start=1, tiles=None)
+    folium.TileLayer(os.path.join(str(tmpdir), '{z}', '{x}', '{y}.{ext}'),
+                     attr='test', ext='png').add_to(m)
+    image = render_image(m, width=512, height=512)
+    assert tuple(image[10, 10]) == (255, 0, 0, 255)
+
+
+def test_render_image_tiles_unsupported():
+    m = folium.Map(location=[0, 0], zoom_start=1, tiles=None)
+    with pytest.raises(ValueError, match=r'\{apikey\}'):
+        render_image(m, tiles='https://tiles.example.com/{z}/{x}/{y}.png?'
+                              'key={apikey}')
+
+
+def test_render_image_vectors():
+    m = folium.Map(location=[0, 0], zoom_start=4, tiles=None)
+    folium.Polygon([[-5, -5], [-5, 5], [5, 5], [5, -5]], color='red',
+                   fill_color='blue', fill_opacity=1).add_to(m)
+    folium.PolyLine([[-20, -20], [-20, 20]], color='green',
+                    weight=5).add_to(m)
+    folium.CircleMarker([20, 20], radius=5, color='black', fill=True,
+                        fill_opacity=1).add_to(m)
+    folium.GeoJson({
+        'type': 'Feature',
+        'geometry': {'type': 'Polygon', 'coordinates': [
+            [[-25, 10], [-15, 10], [-15, 20], [-25, 20], [-25, 10]]]},
+        'properties': {},
+    }, style_function=lambda feature: {'fillColor': 'yellow',
+                                       'fillOpacity': 1,
+                                       'stroke': False}).add_to(m)
+    image = render_image(m, width=512, height=512)
+    # Inside the polygon, and on its border.
+    assert tuple(image[256, 256, :3]) == (0, 0, 255)
+    center = 256 + 5 / 360. * 4096
+    assert tuple(image[256, int(center), :3]) == (255, 0, 0)
+    # The line, south of the center.
+    row = int(_web_mercator(np.array([[-20., 0.]]))[1][0] * 4096) - 2048 + 256
+    assert tuple(image[row, 256, :3]) == (0, 128, 0)
+    assert tuple(image[row + 10, 256, :3]) == (0xdd, 0xdd, 0xdd)
+    # The GeoJson polygon, north west of the center.
+    assert tuple(image[256 - 200, 256 - 230, :3]) == (255, 255, 0)
+
+
+def test_render_png(tmpdir):
+    m = folium.Map(location=[45, 3], zoom_start=6, tiles=None)
+    folium.Marker([45, 3]).add_to(m)
+    outfile = str(tmpdir.join('map.png'))
+    png = render_png(m, outfile, width=100, height=80)
+    assert png.startswith(b'\x89PNG')
+    with open(outfile, 'rb') as f:
+        assert f.read() == png
+    image = _read_png(png)
+    assert image.shape == (80, 100, 4)
+    # The pin is drawn above its location.
+    assert tuple(image[40 - 20, 50, :3]) == (0x2a, 0x81, 0xcb)
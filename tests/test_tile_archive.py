@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+"""
+Folium tile_archive Tests
+-------------------------
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import gzip
+import io
+import json
+import os
+import sqlite3
+import struct
+
+import folium
+from folium.raster_layers import LocalTileLayer
+from folium.tile_archive import (MBTiles, PMTiles, open_archive,
+                                 tile_id_to_zxy, zxy_to_tile_id)
+from folium.tile_server import TileServer, save_offline
+
+import pytest
+
+from six.moves.urllib.request import urlopen
+
+
+TILES = {(0, 0, 0): b'\x89PNG-0', (1, 0, 1): b'\x89PNG-1',
+         (1, 1, 0): b'\x89PNG-2', (2, 3, 3): b'\x89PNG-2'}
+
+
+def _write_mbtiles(path):
+    db = sqlite3.connect(path)
+    db.execute('CREATE TABLE metadata (name text, value text)')
+    db.execute('CREATE TABLE tiles (zoom_level integer, tile_column integer, '
+               'tile_row integer, tile_data blob)')
+    db.executemany('INSERT INTO metadata VALUES (?, ?)', [
+        ('format', 'png'), ('attribution', 'Test tiles'),
+        ('bounds', '-180,-85,180,85'), ('minzoom', '0'), ('maxzoom', '2')])
+    db.executemany('INSERT INTO tiles VALUES (?, ?, ?, ?)', [
+        (z, x, 2 ** z - 1 - y, sqlite3.Binary(data))
+        for (z, x, y), data in TILES.items()])
+    db.commit()
+    db.close()
+
+
+def _varint(value):
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _write_pmtiles(path):
+    """Writes the tiles in a PMTiles file with a gzipped root directory
+    and identical tiles stored once."""
+    entries, data, offsets = [], b'', {}
+    for tile_id, content in sorted(
+            (zxy_to_tile_id(*key), content) for key, content in TILES.items()):
+        if content not in offsets:
+            offsets[content] = len(data)
+            data += content
+        if (entries and entries[-1][0] + entries[-1][1] == tile_id and
+                offsets[content] == entries[-1][3]):
+            entries[-1][1] += 1
+        else:
+            entries.append([tile_id, 1, len(content), offsets[content]])
+    directory = _varint(len(entries))
+    last = 0
+    for entry in entries:
+        directory += _varint(entry[0] - last)
+        last = entry[0]
+    directory += b''.join(_varint(entry[1]) for entry in entries)
+    directory += b''.join(_varint(entry[2]) for entry in entries)
+    directory += b''.join(_varint(entry[3] + 1) for entry in entries)
+
+    def gzipped(payload):
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode='wb') as f:
+            f.write(payload)
+        return buffer.getvalue()
+    directory = gzipped(directory)
+    metadata = gzipped(json.dumps({'attribution': 'PM tiles'}).encode())
+    root = 127
+    header = struct.pack(
+        '<7sB11Q6B4iB2i', b'PMTiles', 3,
+        root, len(directory), root + len(directory), len(metadata),
+        0, 0, root + len(directory) + len(metadata), len(data),
+        len(TILES), len(entries), len(offsets),
+        1, 2, 1, 2, 0, 2,
+        -1800000000, -850000000, 1800000000, 850000000, 0, 0, 0)
+    with open(path, 'wb') as f:
+        f.write(header + directory + metadata + data)
+
+
+def test_tile_ids():
+    assert [tile_id_to_zxy(i) for i in range(5)] == [
+        (0, 0, 0), (1, 0, 0), (1, 0, 1), (1, 1, 1), (1, 1, 0)]
+    for z in range(5):
+        for x in range(2 ** z):
+            for y in range(2 ** z):
+                assert tile_id_to_zxy(zxy_to_tile_id(z, x, y)) == (z, x, y)
+
+
+@pytest.mark.parametrize('kind', ['mbtiles', 'pmtiles'])
+def test_archive(tmpdir, kind):
+    path = str(tmpdir.join('tiles.' + kind))
+    (_write_mbtiles if kind == 'mbtiles' else _write_pmtiles)(path)
+    with open_archive(path) as archive:
+        assert isinstance(archive, MBTiles if kind == 'mbtiles' else PMTiles)
+        assert (archive.min_zoom, archive.max_zoom) == (0, 2)
+        assert archive.format == 'png'
+        assert archive.bounds == [[-85, -180], [85, 180]]
+        for key, data in TILES.items():
+            assert archive.get_tile(*key) == data
+        assert archive.get_tile(1, 0, 0) is None
+        assert archive.get_tile(5, 0, 0) is None
+        assert sorted(archive.tiles()) == sorted(
+            key + (data,) for key, data in TILES.items())
+
+        assert archive.export(str(tmpdir.join('export'))) == 4
+        with open(str(tmpdir.join('export', '2', '3', '3.png')), 'rb') as f:
+            assert f.read() == TILES[(2, 3, 3)]
+
+        if kind == 'mbtiles':
+            # The connections do not write to the file.
+            with pytest.raises(sqlite3.OperationalError):
+                archive._connection().execute('DELETE FROM tiles')
+
+
+def test_local_tile_layer(tmpdir):
+    path = str(tmpdir.join('basemap.mbtiles'))
+    _write_mbtiles(path)
+    with TileServer() as server:
+        m = folium.Map(tiles=None)
+        layer = LocalTileLayer(path, server=server).add_to(m)
+        assert layer.tile_name == 'basemap'
+        assert layer.attr == 'Test tiles'
+        assert json.loads(layer.options)['maxNativeZoom'] == 2
+        url = layer.tiles.format(z=1, x=1, y=0, r='')
+        assert urlopen(url).read() == TILES[(1, 1, 0)]
+
+        outfile = str(tmpdir.join('map.html'))
+        assert save_offline(m, outfile) == 4
+        assert os.path.isdir(str(tmpdir.join('map_tiles')))
+        with open(outfile) as f:
+            html = f.read()
+        assert server.url not in html
+        assert "'map_tiles/" in html
+        assert layer.tiles.startswith(server.url)
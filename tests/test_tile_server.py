@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+"""
+Folium tile_server Tests
+------------------------
+
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import os
+import threading
+import time
+from multiprocessing.pool import ThreadPool
+
+import folium
+from folium.tile_server import TileCache, TileProxy, tile_range
+
+from six.moves.urllib.error import HTTPError
+from six.moves.urllib.request import urlopen
+
+import pytest
+
+
+class FakeFetch(object):
+    """Returns the URL as the tile, slowly, and records the calls."""
+    def __init__(self):
+        self.urls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, url, timeout):
+        time.sleep(0.05)
+        with self.lock:
+            self.urls.append(url)
+        if 'missing' in url:
+            return None
+        return b'\x89PNG' + url.encode('utf8')
+
+
+def test_tile_cache_lru(tmpdir):
+    cache = TileCache(str(tmpdir), max_bytes=20)
+    cache.put(('a', 1, 0, 0), b'0123456789')
+    cache.put(('a', 1, 0, 1), b'0123456789')
+    assert cache.get(('a', 1, 0, 0)) == b'0123456789'
+    # The least recently used tile is evicted.
+    cache.put(('a', 1, 1, 0), b'0123456789')
+    assert cache.get(('a', 1, 0, 1)) is None
+    assert cache.get(('a', 1, 0, 0)) is not None
+    assert cache.size == 20
+    # The cache is kept on disk.
+    assert len(TileCache(str(tmpdir))) == 2
+    assert len(TileCache(str(tmpdir), max_bytes=10)) == 1
+    # Temporary files left by interrupted writes are not tiles.
+    tmpdir.join('a', '1', 'left.tmp').write('01234')
+    cache = TileCache(str(tmpdir))
+    assert len(cache) == 1
+    assert cache.size == 10
+
+
+def test_tile_range():
+    assert tile_range([[-10, -10], [10, 10]], 1) == (range(0, 2), range(0, 2))
+    assert tile_range([[1, 1], [10, 10]], 2) == (range(2, 3), range(1, 2))
+
+
+def test_tile_proxy(tmpdir):
+    fetch = FakeFetch()
+    with TileProxy(str(tmpdir), fetch=fetch) as proxy:
+        m = folium.Map(tiles='http://{s}.example.com/{z}/{x}/{y}.png',
+                       attr='test', tile_proxy=proxy)
+        tile_layer = list(m._children.values())[0]
+        assert tile_layer.tiles.startswith(proxy.url)
+        assert tile_layer.tiles.endswith('/{z}/{x}/{y}{r}')
+        url = tile_layer.tiles.format(z=3, x=1, y=2, r='')
+
+        # Concurrent requests of a tile are fetched once.
+        pool = ThreadPool(4)
+        tiles = pool.map(lambda _: urlopen(url).read(), range(4))
+        pool.close()
+        assert set(tiles) == {b'\x89PNGhttp://a.example.com/3/1/2.png'}
+        assert len(fetch.urls) == 1
+        # Then served from the cache.
+        response = urlopen(url)
+        assert response.info()['Content-Type'] == 'image/png'
+        assert len(fetch.urls) == 1
+
+        with pytest.raises(HTTPError):
+            urlopen(proxy.url + '/unknown/1/0/0')
+        with pytest.raises(ValueError):
+            proxy.register('http://example.com/{z}/{x}/{-y}.png')
+        with pytest.raises(ValueError):
+            proxy.register('http://example.com/{z}/{x}/{y}?{accessToken}')
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='POSIX permissions')
+def test_tile_proxy_default_cache_dir(tmpdir, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmpdir))
+    proxy = TileProxy(fetch=FakeFetch())
+    directory = str(tmpdir.join('folium', 'tiles'))
+    assert proxy.cache.directory == directory
+    assert os.stat(directory).st_mode & 0o077 == 0
+    # A cache other users can write to is refused.
+    os.chmod(directory, 0o777)
+    with pytest.raises(ValueError):
+        TileProxy(fetch=FakeFetch())
+
+
+def test_tile_proxy_seed(tmpdir):
+    fetch = FakeFetch()
+    proxy = TileProxy(str(tmpdir), fetch=fetch)
+    tiles = 'http://example.com/{z}/{x}/{y}.png'
+    assert proxy.seed(tiles, [[-10, -10], [10, 10]], 0, 2) == 1 + 4 + 4
+    assert len(fetch.urls) == 9
+    assert proxy.seed(tiles, [[-10, -10], [10, 10]], 0, 2) == 9
+    assert len(fetch.urls) == 9
+    assert proxy.seed('http://missing/{z}/{x}/{y}.png',
+                      [[-10, -10], [10, 10]], 0, 0) == 0
+    # Built-in tiles are resolved to their URL.
+    proxy.seed('OpenStreetMap', [[-10, -10], [10, 10]], 0, 0)
+    assert 'openstreetmap' in fetch.urls[-1]
+    assert proxy._server is None
@@ -1,6 +1,6 @@
 from __future__ import (absolute_import, division, print_function)
 
-from folium.utilities import camelize, deep_copy
+from folium.utilities import _factorize, camelize, deep_copy
 from folium import Map, FeatureGroup, Marker
 
 
@@ -30,3 +30,16 @@ def test_deep_copy():
             check(child, child_copy)
 
     check(m, m_copy)
+
+
+def test_factorize():
+    uniques, codes = _factorize(['a', None, 'b', 'a', float('nan')])
+    assert uniques == ['a', 'b']
+    assert codes.tolist() == [0, -1, 1, 0, -1]
+
+
+def test_factorize_unhashable():
+    values = [[1, 2], {'b': 1, 'a': 2}, [1, 2], {'a': 2, 'b': 1}, '[1, 2]']
+    uniques, codes = _factorize(values)
+    assert uniques == [[1, 2], {'a': 2, 'b': 1}, '[1, 2]']
+    assert codes.tolist() == [0, 1, 0, 1, 2]